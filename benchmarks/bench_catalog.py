@@ -0,0 +1,206 @@
+#!/usr/bin/env python3
+"""
+Benchmark catalog loading, searching and filtering
+
+Generates radio-browser shaped catalogs of several sizes and measures, in a
+fresh process per size and without any GTK widgets: load time, peak
+memory, per-keystroke search latency, filter latency and favorite lookups.
+Results are written to a JSON file so that runs can be diffed between
+versions.
+
+Usage: python3 benchmarks/bench_catalog.py [--sizes 54000,250000,1000000] [--output FILE]
+"""
+import argparse
+import contextlib
+import json
+import os
+import platform
+import random
+import resource
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from catalog_gen import write_catalog
+
+# Searches typed one keystroke at a time
+QUERIES = ["rock", "jazz fm", "deutschlandfunk", "greece", "радио", "news talk", "zzzz"]
+
+# Filters of the station list
+FILTERS = ["All Stations", "Favorites"]
+
+# Number of favorites of the simulated user
+FAVORITES = 50
+
+
+def percentile(values, fraction):
+    """Return the value at the given fraction of the sorted values"""
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * fraction))]
+
+
+def summarize(seconds):
+    """Summarize timings in milliseconds"""
+    ms = [s * 1000 for s in seconds]
+    return {
+        'n': len(ms),
+        'mean_ms': round(statistics.mean(ms), 3),
+        'p50_ms': round(percentile(ms, 0.5), 3),
+        'p95_ms': round(percentile(ms, 0.95), 3),
+        'max_ms': round(max(ms), 3),
+    }
+
+
+def max_rss_mb():
+    """Peak resident memory of this process in MB"""
+    # ru_maxrss survives exec on Linux and would include the generator's peak
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("VmHWM:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def run_worker(stations_file):
+    """Measure one catalog in this process and return the results"""
+    from src.catalog.stations import StationCatalog, is_favorite
+    from src.utils import config
+
+    baseline_rss = max_rss_mb()
+
+    # Loading, as StationsList.load_stations does it
+    started = time.perf_counter()
+    catalog = StationCatalog()
+    catalog.load(stations_file)
+    first_page = catalog.stations[:config.PAGE_SIZE]
+    load_seconds = time.perf_counter() - started
+    peak_rss = max_rss_mb()
+
+    # Searching, one call per keystroke
+    keystrokes = []
+    per_query = {}
+    for query in QUERIES:
+        timings = []
+        for length in range(1, len(query) + 1):
+            started = time.perf_counter()
+            matches = catalog.search(query[:length])
+            first_page = matches[:config.PAGE_SIZE]
+            timings.append(time.perf_counter() - started)
+        keystrokes.extend(timings)
+        per_query[query] = dict(summarize(timings), matches=len(matches))
+
+    # Filtering
+    rng = random.Random(0)
+    favorites = rng.sample(catalog.stations, min(FAVORITES, len(catalog)))
+    filters = {}
+    for filter_type in FILTERS:
+        timings = []
+        for _ in range(3):
+            started = time.perf_counter()
+            catalog.filter(filter_type, favorites)
+            timings.append(time.perf_counter() - started)
+        filters[filter_type] = summarize(timings)
+
+    # Sorting: the first use computes the order, later ones gather from it
+    from src.catalog.query import SORT_KEYS
+    filtered = catalog.search("#rock")
+    sorts = {}
+    for key in SORT_KEYS:
+        started = time.perf_counter()
+        catalog.sort(catalog.stations, key)
+        first = time.perf_counter() - started
+        timings = []
+        for _ in range(3):
+            started = time.perf_counter()
+            catalog.sort(filtered, key)
+            timings.append(time.perf_counter() - started)
+        sorts[key] = {'first_ms': round(first * 1000, 3), 'filtered': summarize(timings)}
+
+    # Favorite checks, as done for every row shown
+    sample = rng.sample(catalog.stations, min(10000, len(catalog)))
+    started = time.perf_counter()
+    for station in sample:
+        is_favorite(station, favorites)
+    favorite_us = (time.perf_counter() - started) / len(sample) * 1e6
+
+    return {
+        'stations': len(catalog),
+        'duplicates': catalog.duplicate_count,
+        'file_mb': round(os.path.getsize(stations_file) / 1e6, 1),
+        'load_seconds': round(load_seconds, 3),
+        'peak_rss_mb': round(peak_rss, 1),
+        'load_rss_mb': round(peak_rss - baseline_rss, 1),
+        'search_keystroke': summarize(keystrokes),
+        'search_queries': per_query,
+        'filters': filters,
+        'sorts': sorts,
+        'is_favorite_us': round(favorite_us, 3),
+    }
+
+
+def git_revision():
+    """Return the current commit, if known"""
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT,
+                              capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark catalog loading, searching and filtering")
+    parser.add_argument("--sizes", default="54000,250000,1000000", help="Comma separated catalog sizes")
+    parser.add_argument("--output", default="catalog-bench.json", help="JSON file for the results")
+    parser.add_argument("--seed", type=int, default=0, help="Seed of the generated catalogs")
+    parser.add_argument("--worker", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        # The catalog's own messages must not mix with the results
+        with contextlib.redirect_stdout(sys.stderr):
+            result = run_worker(args.worker)
+        json.dump(result, sys.stdout)
+        return
+
+    results = {
+        'revision': git_revision(),
+        'python': platform.python_version(),
+        'machine': platform.machine(),
+        'seed': args.seed,
+        'sizes': {},
+    }
+
+    with tempfile.TemporaryDirectory() as tmp:
+        for size in [int(s) for s in args.sizes.split(',')]:
+            stations_file = os.path.join(tmp, f"stations-{size}.json")
+            write_catalog(stations_file, size, args.seed)
+
+            # A fresh process per size keeps peak memory readings apart
+            output = subprocess.run([sys.executable, os.path.abspath(__file__), "--worker", stations_file],
+                                    capture_output=True, text=True, check=True).stdout
+            result = json.loads(output)
+            os.remove(stations_file)
+            results['sizes'][str(size)] = result
+
+            print(f"{size:>8} stations ({result['duplicates']} duplicates): "
+                  f"load {result['load_seconds']:.2f} s, "
+                  f"peak {result['peak_rss_mb']:.0f} MB, "
+                  f"keystroke p50 {result['search_keystroke']['p50_ms']:.1f} ms "
+                  f"p95 {result['search_keystroke']['p95_ms']:.1f} ms, "
+                  f"favorites filter {result['filters']['Favorites']['p50_ms']:.1f} ms")
+
+    with open(args.output, 'w') as f:
+        json.dump(results, f, indent=2)
+    print(f"Results written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
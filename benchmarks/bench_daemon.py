@@ -0,0 +1,107 @@
+#!/usr/bin/env python3
+"""
+Measure resident memory and CPU use of the headless daemon
+
+Starts the daemon in a subprocess, lets it idle, plays a stand-in stream
+through the control socket and samples /proc for RSS and CPU time.
+
+Usage: python3 benchmarks/bench_daemon.py [--stations FILE] [--rss-target MB]
+"""
+import argparse
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from catalog_gen import write_catalog
+from standin import StandinServer
+
+CLOCK_TICKS = os.sysconf('SC_CLK_TCK')
+
+
+def read_rss_mb(pid):
+    """Return the current and peak resident set size of a process in MB"""
+    values = {}
+    with open(f"/proc/{pid}/status") as f:
+        for line in f:
+            key, _, value = line.partition(':')
+            if key in ('VmRSS', 'VmHWM'):
+                values[key] = int(value.split()[0]) / 1024
+    return values.get('VmRSS', 0.0), values.get('VmHWM', 0.0)
+
+
+def read_cpu_seconds(pid):
+    """Return the user + system CPU time of a process in seconds"""
+    with open(f"/proc/{pid}/stat") as f:
+        fields = f.read().rsplit(')', 1)[1].split()
+    # utime and stime are fields 14 and 15 of /proc/<pid>/stat
+    return (int(fields[11]) + int(fields[12])) / CLOCK_TICKS
+
+
+def cpu_percent(pid, seconds):
+    """Sample the CPU use of a process over a period"""
+    start_cpu, start = read_cpu_seconds(pid), time.monotonic()
+    time.sleep(seconds)
+    return 100.0 * (read_cpu_seconds(pid) - start_cpu) / (time.monotonic() - start)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--stations", help="Catalog to load (default: synthetic catalog)")
+    parser.add_argument("--count", type=int, default=54000, help="Size of the synthetic catalog")
+    parser.add_argument("--seconds", type=float, default=10.0, help="Sampling period per phase")
+    parser.add_argument("--rss-target", type=float, default=80.0, help="Resident memory target in MB")
+    args = parser.parse_args()
+
+    from src.daemon import send_command
+
+    server = StandinServer().start()
+    stream_url = server.url("/tone/daemon.wav")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        stations_file = args.stations
+        if not stations_file:
+            stations_file = os.path.join(tmp, "stations.json")
+            write_catalog(stations_file, args.count, stream_url=stream_url)
+        socket_path = os.path.join(tmp, "control.sock")
+
+        started = time.monotonic()
+        daemon = subprocess.Popen(
+            [sys.executable, os.path.join(ROOT, "framenux_radio.py"), "--daemon",
+             "--stations", stations_file, "--socket", socket_path],
+            stdout=subprocess.DEVNULL
+        )
+        try:
+            while not os.path.exists(socket_path):
+                if daemon.poll() is not None:
+                    raise RuntimeError("The daemon exited during startup")
+                time.sleep(0.05)
+            print(f"startup: {(time.monotonic() - started) * 1000:.0f} ms")
+
+            idle_cpu = cpu_percent(daemon.pid, args.seconds)
+            rss, peak = read_rss_mb(daemon.pid)
+            print(f"idle:    rss={rss:.1f} MB peak={peak:.1f} MB cpu={idle_cpu:.1f}%")
+
+            response = send_command("play stand-in station 1", socket_path)
+            if not response.get('ok'):
+                raise RuntimeError(response.get('error'))
+            send_command("volume 0", socket_path)
+
+            playing_cpu = cpu_percent(daemon.pid, args.seconds)
+            rss, peak = read_rss_mb(daemon.pid)
+            print(f"playing: rss={rss:.1f} MB peak={peak:.1f} MB cpu={playing_cpu:.1f}%")
+
+            verdict = "within" if rss <= args.rss_target else "OVER"
+            print(f"resident memory {verdict} the {args.rss_target:.0f} MB target")
+        finally:
+            daemon.terminate()
+            daemon.wait()
+            server.stop()
+
+
+if __name__ == "__main__":
+    main()
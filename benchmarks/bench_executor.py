@@ -0,0 +1,249 @@
+#!/usr/bin/env python3
+"""
+Benchmark the shared background task executor against ad-hoc threads
+
+Replays a burst of background work against a simulated main loop that
+draws a frame every 16.7 ms: a health check on a thread of its own and a
+catalog load holding a worker for a long time, a page of image downloads
+of which most are no longer wanted by the time they finish (the user
+scrolled on), an interactive search submitted in the middle of it, and
+the image of the station the user then plays. The work runs once with a
+thread and an idle callback per task, as the application used to, and
+once through TaskExecutor with its cancellation tokens.
+
+Usage: python3 benchmarks/bench_executor.py [--images N]
+"""
+import argparse
+import os
+import queue
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.utils.executor import TaskExecutor, CancelToken, PRIORITY_SEARCH, PRIORITY_IMAGES, PRIORITY_REFRESH
+
+# Frame interval of the simulated main loop
+FRAME_SECONDS = 1 / 60
+
+# Main-loop cost of handling one finished image, e.g. scaling a pixbuf
+CALLBACK_SECONDS = 0.0015
+
+# Simulated durations of the background work
+IMAGE_SECONDS = 0.03
+SEARCH_SECONDS = 0.05
+HEALTH_SECONDS = 1.5
+REFRESH_SECONDS = 1.0
+
+# Share of the images still visible when they finish
+VISIBLE_SHARE = 0.25
+
+
+class FrameLoop:
+    """
+    Main loop drawing a frame every FRAME_SECONDS and running idle callbacks
+    between frames, with the semantics of GLib.idle_add
+    """
+
+    def __init__(self):
+        self.callbacks = queue.Queue()
+        self.wakeups = 0
+        self.frame_times = []
+        self.stopping = threading.Event()
+        self.thread = threading.Thread(target=self.run)
+
+    def idle_add(self, function, *args):
+        """Run a function on the loop, again while it returns True"""
+        self.callbacks.put((function, args))
+
+    def run(self):
+        while not self.stopping.is_set():
+            started = time.perf_counter()
+
+            # Callbacks queued before this frame run in it, repeating ones go again next frame
+            for _ in range(self.callbacks.qsize()):
+                function, args = self.callbacks.get()
+                self.wakeups += 1
+                if function(*args):
+                    self.callbacks.put((function, args))
+
+            self.frame_times.append(time.perf_counter() - started)
+            time.sleep(max(0.0, FRAME_SECONDS - (time.perf_counter() - started)))
+
+    def start(self):
+        self.thread.start()
+        return self
+
+    def stop(self):
+        self.stopping.set()
+        self.thread.join()
+
+
+class Outcome:
+    """What a scenario observed"""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.threads = 0
+        self.peak_threads = 0
+        self.images_shown = 0
+        self.stale_images = 0
+        self.search_latency = None
+        self.now_playing_latency = None
+
+    def enter(self):
+        with self.lock:
+            self.threads += 1
+            self.peak_threads = max(self.peak_threads, self.threads)
+
+    def leave(self):
+        with self.lock:
+            self.threads -= 1
+
+
+def work(outcome, seconds):
+    """A background task: blocking I/O for some time"""
+    outcome.enter()
+    try:
+        time.sleep(seconds)
+    finally:
+        outcome.leave()
+
+
+def run_adhoc(images, visible):
+    """Every task gets a thread and an idle callback of its own"""
+    loop = FrameLoop().start()
+    outcome = Outcome()
+
+    def spawn(seconds, callback=None):
+        def thread():
+            work(outcome, seconds)
+            if callback:
+                loop.idle_add(callback)
+        threading.Thread(target=thread, daemon=True).start()
+
+    def show_image(index):
+        time.sleep(CALLBACK_SECONDS)
+        outcome.images_shown += 1
+        if index not in visible:
+            outcome.stale_images += 1
+
+    spawn(HEALTH_SECONDS)
+    spawn(REFRESH_SECONDS)
+    for index in range(images):
+        spawn(IMAGE_SECONDS, lambda index=index: show_image(index))
+
+    # The user searches while the images load; nothing can stop the stale ones
+    time.sleep(0.02)
+    submitted = time.perf_counter()
+    done = threading.Event()
+
+    def show_results(_=None):
+        outcome.search_latency = time.perf_counter() - submitted
+        done.set()
+
+    spawn(SEARCH_SECONDS, show_results)
+    done.wait()
+
+    # The user plays a station from the results, its image is shown large
+    played = time.perf_counter()
+    shown = threading.Event()
+
+    def show_now_playing(_=None):
+        outcome.now_playing_latency = time.perf_counter() - played
+        shown.set()
+
+    spawn(IMAGE_SECONDS, show_now_playing)
+    shown.wait()
+
+    time.sleep(HEALTH_SECONDS + 0.5)
+    loop.stop()
+    return loop, outcome
+
+
+def run_executor(images, visible):
+    """Tasks go through the executor, the invisible images share a cancelled token"""
+    loop = FrameLoop().start()
+    outcome = Outcome()
+    executor = TaskExecutor(schedule=loop.idle_add)
+
+    def show_image(index):
+        time.sleep(CALLBACK_SECONDS)
+        outcome.images_shown += 1
+        if index not in visible:
+            outcome.stale_images += 1
+
+    # The health prober runs for a long time, on a thread of its own
+    threading.Thread(target=work, args=(outcome, HEALTH_SECONDS), daemon=True).start()
+    executor.submit(PRIORITY_REFRESH, work, outcome, REFRESH_SECONDS)
+    scrolled_away = CancelToken()
+    for index in range(images):
+        token = None if index in visible else scrolled_away
+        executor.submit(PRIORITY_IMAGES, work, outcome, IMAGE_SECONDS, token=token,
+                        on_complete=lambda _, index=index: show_image(index))
+
+    # The user searches and scrolls on, the images no longer shown are cancelled
+    time.sleep(0.02)
+    scrolled_away.cancel()
+    submitted = time.perf_counter()
+    done = threading.Event()
+
+    def show_results(_=None):
+        outcome.search_latency = time.perf_counter() - submitted
+        done.set()
+
+    executor.submit(PRIORITY_SEARCH, work, outcome, SEARCH_SECONDS, on_complete=show_results)
+    done.wait()
+
+    # The image of the played station goes ahead of the list images
+    played = time.perf_counter()
+    shown = threading.Event()
+
+    def show_now_playing(_=None):
+        outcome.now_playing_latency = time.perf_counter() - played
+        shown.set()
+
+    executor.submit(PRIORITY_IMAGES, work, outcome, IMAGE_SECONDS, on_complete=show_now_playing, foreground=True)
+    shown.wait()
+
+    time.sleep(HEALTH_SECONDS + 0.5)
+    loop.stop()
+    return loop, outcome, executor.metrics()
+
+
+def report(label, loop, outcome):
+    frames = sorted(loop.frame_times)
+    over = sum(1 for t in frames if t > FRAME_SECONDS)
+    print(f"{label}:")
+    print(f"  search latency        {outcome.search_latency * 1000:8.1f} ms")
+    print(f"  now-playing image     {outcome.now_playing_latency * 1000:8.1f} ms")
+    print(f"  peak threads          {outcome.peak_threads:8d}")
+    print(f"  images shown          {outcome.images_shown:8d}  ({outcome.stale_images} no longer visible)")
+    print(f"  main-loop wakeups     {loop.wakeups:8d}")
+    print(f"  longest frame         {frames[-1] * 1000:8.1f} ms  ({over} frames over {FRAME_SECONDS * 1000:.1f} ms)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--images", type=int, default=200, help="Image downloads in the burst")
+    args = parser.parse_args()
+
+    visible = set(range(0, args.images, int(1 / VISIBLE_SHARE)))
+
+    loop, outcome = run_adhoc(args.images, visible)
+    report("Ad-hoc threads", loop, outcome)
+
+    loop, outcome, metrics = run_executor(args.images, visible)
+    report("Shared executor", loop, outcome)
+
+    print("Executor metrics:")
+    for name, figures in metrics['classes'].items():
+        print(f"  {name:<8} done {figures['completed']:4d}  cancelled {figures['cancelled']:4d}  "
+              f"wait p50 {figures['wait_ms_p50']} ms  p95 {figures['wait_ms_p95']} ms")
+    print(f"  {metrics['dispatch_batches']} dispatches, largest batch {metrics['largest_batch']}, "
+          f"longest {metrics['longest_batch_ms']} ms")
+
+
+if __name__ == "__main__":
+    main()
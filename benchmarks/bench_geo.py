@@ -0,0 +1,126 @@
+#!/usr/bin/env python3
+"""
+Check and benchmark the spatial index of the Nearby filter
+
+Builds GeoIndex over random stations, denser around a few cities and
+along the antimeridian and the poles, for several cell sizes (including
+ones that do not divide 360 and are snapped), and compares nearest() and
+within() with a brute-force scan for queries all over the globe, across
+the antimeridian and next to the poles. Also reports the query times.
+
+Usage: python3 benchmarks/bench_geo.py [--stations N] [--queries N]
+"""
+import argparse
+import math
+import os
+import random
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.catalog.geo import GeoIndex, haversine_km
+
+# Cell sizes checked, in degrees
+CELL_SIZES = (0.5, 1.0, 2.5, 3.0, 7.0, 13.0, 45.0)
+
+# Stations asked of nearest(), and radius of within() in km
+NEAREST_COUNT = 25
+RADIUS_KM = 500
+
+# Places the stations cluster around
+CITIES = [(37.98, 23.73), (52.52, 13.40), (40.71, -74.01), (-33.87, 151.21), (35.68, 139.69)]
+
+
+def random_point(rng):
+    """A point spread evenly over the sphere"""
+    return math.degrees(math.asin(rng.uniform(-1, 1))), rng.uniform(-180, 180)
+
+
+def generate_stations(count, rng):
+    """Stations around cities, on the antimeridian, near the poles and anywhere"""
+    stations = []
+    for i in range(count):
+        kind = i % 4
+        if kind == 0:
+            lat, lon = rng.choice(CITIES)
+            lat, lon = lat + rng.gauss(0, 1), lon + rng.gauss(0, 1)
+        elif kind == 1:
+            lat, lon = rng.uniform(-60, 60), rng.choice((-1, 1)) * rng.uniform(175, 180)
+        elif kind == 2:
+            lat, lon = rng.choice((-1, 1)) * rng.uniform(85, 90), rng.uniform(-180, 180)
+        else:
+            lat, lon = random_point(rng)
+        lat = max(-90.0, min(90.0, lat))
+        lon = (lon + 180) % 360 - 180
+        stations.append({'geo_lat': lat, 'geo_long': lon})
+    return stations
+
+
+def generate_queries(count, rng):
+    """Query locations, a third of them at the antimeridian or the poles"""
+    queries = []
+    for i in range(count):
+        if i % 3 == 0:
+            queries.append((rng.uniform(-60, 60), rng.choice((-179.9, 179.9, 180.0, -180.0))))
+        elif i % 3 == 1:
+            queries.append((rng.choice((-1, 1)) * rng.uniform(88, 90), rng.uniform(-180, 180)))
+        else:
+            queries.append(random_point(rng))
+    return queries
+
+
+def brute_force(stations, lat, lon):
+    """Distances to every station, closest first"""
+    return sorted((haversine_km(lat, lon, s['geo_lat'], s['geo_long']), i) for i, s in enumerate(stations))
+
+
+def same(found, expected):
+    """Whether two result lists agree, allowing ties in another order"""
+    if len(found) != len(expected):
+        return False
+    return all(math.isclose(a[0], b[0], abs_tol=1e-9) for a, b in zip(found, expected))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--stations", type=int, default=20000, help="Stations with coordinates")
+    parser.add_argument("--queries", type=int, default=200, help="Query locations per cell size")
+    args = parser.parse_args()
+
+    rng = random.Random(43)
+    stations = generate_stations(args.stations, rng)
+    queries = generate_queries(args.queries, rng)
+    expected = [brute_force(stations, lat, lon) for lat, lon in queries]
+
+    failures = 0
+    for cell_degrees in CELL_SIZES:
+        index = GeoIndex(stations, cell_degrees)
+        nearest_mismatches = within_mismatches = 0
+        nearest_times, within_times = [], []
+
+        for (lat, lon), distances in zip(queries, expected):
+            started = time.perf_counter()
+            found = index.nearest(lat, lon, NEAREST_COUNT)
+            nearest_times.append(time.perf_counter() - started)
+            nearest_mismatches += not same(found, distances[:NEAREST_COUNT])
+
+            started = time.perf_counter()
+            found = index.within(lat, lon, RADIUS_KM)
+            within_times.append(time.perf_counter() - started)
+            within_mismatches += not same(found, [d for d in distances if d[0] <= RADIUS_KM])
+
+        failures += nearest_mismatches + within_mismatches
+        print(f"cells {cell_degrees:5.1f} deg -> {index.cell_degrees:7.4f} ({index.columns:3d} columns): "
+              f"nearest {nearest_mismatches}/{len(queries)} mismatches, "
+              f"median {statistics.median(nearest_times) * 1000:.2f} ms; "
+              f"within {within_mismatches}/{len(queries)} mismatches, "
+              f"median {statistics.median(within_times) * 1000:.2f} ms")
+
+    if failures:
+        raise AssertionError(f"{failures} queries disagree with the brute-force scan")
+
+
+if __name__ == "__main__":
+    main()
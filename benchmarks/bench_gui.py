@@ -0,0 +1,292 @@
+#!/usr/bin/env python3
+"""
+Benchmark station list rendering under real GTK on a virtual display
+
+Starts Xvfb (or the GTK Broadway backend if Xvfb is missing), runs RadioApp
+against a synthetic catalog in an isolated home directory and drives
+scripted search, scroll, favorite toggle and station switch sequences. For
+every step it records the time spent in the call, the time until the next
+frame is painted and the number of widgets, and writes the results to a
+JSON file. No physical display is needed.
+
+Usage: python3 benchmarks/bench_gui.py [--count N] [--backend auto|xvfb|broadway] [--output FILE]
+"""
+import argparse
+import json
+import os
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+# Searches typed one keystroke at a time, an empty search shows all stations
+QUERIES = ["rock", "", "jazz fm", ""]
+
+# Pages loaded by scrolling to the bottom of the list
+SCROLL_PAGES = 20
+
+# Favorites toggled on and off again with a deep list shown
+FAVORITE_TOGGLES = 10
+
+# Stations shown in the now playing view
+STATION_SWITCHES = 20
+
+
+def percentile(values, fraction):
+    """Return the value at the given fraction of the sorted values"""
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * fraction))]
+
+
+def summarize(ms):
+    """Summarize timings in milliseconds"""
+    if not ms:
+        return None
+    return {
+        'n': len(ms),
+        'mean_ms': round(statistics.mean(ms), 3),
+        'p50_ms': round(percentile(ms, 0.5), 3),
+        'p95_ms': round(percentile(ms, 0.95), 3),
+        'max_ms': round(max(ms), 3),
+    }
+
+
+class GuiDriver:
+    """
+    Drives RadioApp through scripted steps from its own main loop and times
+    each step until the frame showing its result has been painted
+    """
+
+    def __init__(self, app, output, timeout):
+        from gi.repository import GLib
+
+        self.GLib = GLib
+        self.app = app
+        self.output = output
+        self.steps = []
+        self.samples = []
+        self.frame_intervals = []
+        self.last_paint = None
+        self.pending = None
+        self.started = None
+
+        app.connect("activate", self.on_activate)
+        GLib.timeout_add_seconds(timeout, self.on_timeout)
+
+    def on_activate(self, app):
+        """Start once RadioApp has built its window and loaded the catalog"""
+        self.window = app.window
+        self.manager = app.stations_manager
+        self.view = app.now_playing_view
+
+        clock = self.window.get_frame_clock()
+        if clock is None:
+            # The window is not realized yet, try again from the main loop
+            self.GLib.idle_add(self.on_activate, app)
+            return False
+        clock.connect("after-paint", self.on_after_paint)
+
+        self.build_script()
+        self.GLib.idle_add(self.run_next_step)
+        return False
+
+    def build_script(self):
+        """Queue the scripted steps"""
+        manager = self.manager
+
+        for query in QUERIES:
+            for length in range(1, len(query) + 1):
+                self.steps.append(("search", lambda text=query[:length]: manager.search_stations(text)))
+            if not query:
+                self.steps.append(("search", lambda: manager.search_stations("")))
+
+        for _ in range(SCROLL_PAGES):
+            self.steps.append(("scroll", self.scroll_to_bottom))
+
+        for i in range(FAVORITE_TOGGLES * 2):
+            self.steps.append(("toggle_favorite", lambda i=i: manager.toggle_favorite(
+                manager.filtered_stations[(i % FAVORITE_TOGGLES) * 7])))
+
+        for i in range(STATION_SWITCHES):
+            # No favicon, image downloads would measure the network
+            station = dict(manager.filtered_stations[i], favicon="")
+            self.steps.append(("update_station", lambda station=station: self.view.update_station(station, True)))
+
+    def scroll_to_bottom(self):
+        """Load the next page as reaching the bottom of the list does"""
+        from gi.repository import Gtk
+
+        # Moving the adjustment would emit edge-reached again for the old end
+        self.manager._on_edge_reached(self.manager.scrolled_window, Gtk.PositionType.BOTTOM)
+
+    def run_next_step(self):
+        """Run one step and wait for the frame that shows its result"""
+        if not self.steps:
+            self.finish()
+            return False
+
+        name, action = self.steps.pop(0)
+        started = time.perf_counter()
+        action()
+        call_ms = (time.perf_counter() - started) * 1000
+
+        self.pending = (name, started, call_ms)
+        self.window.queue_draw()
+        return False
+
+    def on_after_paint(self, clock):
+        """Record frame times and finish the pending step"""
+        now = time.perf_counter()
+        if self.last_paint is not None:
+            self.frame_intervals.append((now - self.last_paint) * 1000)
+        self.last_paint = now
+
+        if self.pending is None:
+            return
+        name, started, call_ms = self.pending
+        self.pending = None
+
+        self.samples.append({
+            'step': name,
+            'call_ms': round(call_ms, 3),
+            'frame_ms': round((now - started) * 1000, 3),
+            'rows': len(self.manager.stations_list.get_children()),
+            'widgets': count_widgets(self.window),
+        })
+        self.GLib.idle_add(self.run_next_step)
+
+    def on_timeout(self):
+        """Give up if the script hangs"""
+        print("GUI benchmark timed out", file=sys.stderr)
+        self.finish()
+        return False
+
+    def finish(self):
+        """Write the results and quit"""
+        steps = {}
+        for sample in self.samples:
+            steps.setdefault(sample['step'], []).append(sample)
+
+        results = {
+            'steps': {
+                name: {
+                    'call': summarize([s['call_ms'] for s in samples]),
+                    'frame': summarize([s['frame_ms'] for s in samples]),
+                    'rows_max': max(s['rows'] for s in samples),
+                    'widgets_max': max(s['widgets'] for s in samples),
+                }
+                for name, samples in steps.items()
+            },
+            'frame_intervals': summarize(self.frame_intervals),
+            'samples': self.samples,
+        }
+        with open(self.output, 'w') as f:
+            json.dump(results, f, indent=2)
+        self.app.quit()
+
+
+def count_widgets(widget):
+    """Count a widget and all its descendants"""
+    from gi.repository import Gtk
+
+    count = 1
+    if isinstance(widget, Gtk.Container):
+        for child in widget.get_children():
+            count += count_widgets(child)
+    return count
+
+
+def run_worker(output, timeout):
+    """Run RadioApp with the benchmark driver attached"""
+    from src.utils import config
+
+    # Nothing in the background that would compete for the main loop
+    config.HEALTH_CHECKS_ENABLED = False
+    config.REBROADCAST_ENABLED = False
+
+    from src.ui.app import RadioApp
+
+    app = RadioApp()
+    GuiDriver(app, output, timeout)
+    app.run([])
+
+
+def start_display(backend):
+    """
+    Start a virtual display
+
+    Returns:
+        tuple: (process, environment overrides)
+    """
+    if backend in ("auto", "xvfb") and shutil.which("Xvfb"):
+        read_fd, write_fd = os.pipe()
+        process = subprocess.Popen(
+            ["Xvfb", "-displayfd", str(write_fd), "-screen", "0", "1280x1024x24", "-nolisten", "tcp"],
+            pass_fds=(write_fd,), stderr=subprocess.DEVNULL)
+        os.close(write_fd)
+        with os.fdopen(read_fd) as f:
+            display = f.readline().strip()
+        return process, {'DISPLAY': f":{display}", 'GDK_BACKEND': "x11"}
+
+    if backend in ("auto", "broadway") and shutil.which("broadwayd"):
+        display = ":7"
+        process = subprocess.Popen(["broadwayd", display], stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        time.sleep(1.0)
+        return process, {'BROADWAY_DISPLAY': display, 'GDK_BACKEND': "broadway"}
+
+    raise SystemExit("Neither Xvfb nor broadwayd is installed")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark station list rendering under GTK")
+    parser.add_argument("--count", type=int, default=54000, help="Size of the synthetic catalog")
+    parser.add_argument("--backend", choices=("auto", "xvfb", "broadway"), default="auto",
+                        help="Virtual display to use")
+    parser.add_argument("--output", default="gui-bench.json", help="JSON file for the results")
+    parser.add_argument("--timeout", type=int, default=300, help="Seconds before giving up")
+    parser.add_argument("--worker", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        run_worker(args.output, args.timeout)
+        return
+
+    from catalog_gen import write_catalog
+
+    with tempfile.TemporaryDirectory() as home:
+        # A private home keeps the user's favorites, caches and settings out of it
+        app_dir = os.path.join(home, ".framenux-radio")
+        os.makedirs(app_dir)
+        write_catalog(os.path.join(app_dir, "stations.json"), args.count)
+
+        display, display_env = start_display(args.backend)
+        try:
+            env = dict(os.environ, HOME=home, **display_env)
+            env.pop('WAYLAND_DISPLAY', None)
+            started = time.monotonic()
+            subprocess.run([sys.executable, os.path.abspath(__file__), "--worker",
+                            "--output", os.path.abspath(args.output), "--timeout", str(args.timeout)],
+                           env=env, cwd=ROOT, check=True)
+            elapsed = time.monotonic() - started
+        finally:
+            display.terminate()
+            display.wait()
+
+    with open(args.output) as f:
+        results = json.load(f)
+
+    print(f"{args.count} stations on {display_env['GDK_BACKEND']}, session took {elapsed:.1f} s")
+    for name, step in results['steps'].items():
+        print(f"{name:>16}: call p50 {step['call']['p50_ms']:.1f} ms p95 {step['call']['p95_ms']:.1f} ms, "
+              f"frame p50 {step['frame']['p50_ms']:.1f} ms p95 {step['frame']['p95_ms']:.1f} ms, "
+              f"up to {step['rows_max']} rows / {step['widgets_max']} widgets")
+    print(f"Results written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,131 @@
+#!/usr/bin/env python3
+"""
+Benchmark the station health prober
+
+Probes a synthetic catalog spread over a farm of stand-in servers, some of
+them down or slow and some URLs pointing at closed ports, and checks the
+results, the concurrency limits and the throughput.
+
+Usage: python3 benchmarks/bench_health.py [--stations N] [--servers N]
+"""
+import argparse
+import asyncio
+import os
+import socket
+import sys
+import tempfile
+import time
+from urllib.parse import urlparse
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.utils.health import HealthStore, HealthProber
+from standin import StandinFarm
+
+
+class CountingProber(HealthProber):
+    """Prober tracking its requests in flight per host"""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.active = {}
+        self.peak_active = 0
+        self.peak_tasks = 0
+
+    async def _request(self, url):
+        host = urlparse(url).netloc
+        self.active[host] = self.active.get(host, 0) + 1
+        self.peak_active = max(self.peak_active, self.active[host])
+        self.peak_tasks = max(self.peak_tasks, len(asyncio.all_tasks()))
+        try:
+            return await super()._request(url)
+        finally:
+            self.active[host] -= 1
+
+
+def closed_port():
+    """Find a local port nothing listens on"""
+    sock = socket.socket()
+    sock.bind(("127.0.0.1", 0))
+    port = sock.getsockname()[1]
+    sock.close()
+    return port
+
+
+def build_catalog(farm, count):
+    """
+    Spread stations over the farm
+
+    Returns:
+        tuple: (stations, set of uuids expected to be dead)
+    """
+    dead_port = closed_port()
+    refusing = farm.servers[-1]
+    stations = []
+    expected_dead = set()
+
+    for i in range(count):
+        server = farm.servers[i % len(farm.servers)]
+        uuid = f"station-{i}"
+        kind = i % 10
+        if kind == 0:
+            url = f"http://127.0.0.1:{dead_port}/tone/{i}.wav"
+            expected_dead.add(uuid)
+        elif kind == 1:
+            url = server.url(f"/playlist/station{i}.pls")
+        elif kind == 2:
+            url = server.url(f"/redirect/2/tone/{i}.wav")
+        else:
+            url = server.url(f"/tone/{i}.wav")
+        if server is refusing and kind != 0:
+            expected_dead.add(uuid)
+        stations.append({'stationuuid': uuid, 'url': url})
+
+    return stations, expected_dead
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the station health prober")
+    parser.add_argument("--stations", type=int, default=400, help="Number of stations")
+    parser.add_argument("--servers", type=int, default=8, help="Number of stand-in servers")
+    parser.add_argument("--concurrency", type=int, default=32, help="Probes in flight")
+    parser.add_argument("--per-host", type=int, default=2, help="Probes in flight per host")
+    args = parser.parse_args()
+
+    farm = StandinFarm(args.servers, connect_delays=(0.0, 0.05, 0.2))
+    farm.servers[-1].set_refuse_streams(True)
+    farm.start()
+
+    stations, expected_dead = build_catalog(farm, args.stations)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        store = HealthStore(os.path.join(tmp, "health.json"))
+        prober = CountingProber(store, concurrency=args.concurrency, per_host=args.per_host,
+                               host_interval=0.0, timeout=5)
+
+        started = time.monotonic()
+        asyncio.run(prober.probe_all(stations))
+        elapsed = time.monotonic() - started
+
+        dead = {s['stationuuid'] for s in stations if store.is_dead(s['stationuuid'])}
+        latencies = sorted(store.latency(s['stationuuid']) for s in stations
+                           if store.latency(s['stationuuid']) is not None)
+        file_size = os.path.getsize(store.path)
+
+    farm.stop()
+
+    print(f"probed {len(stations)} stations on {args.servers} servers in {elapsed:.2f} s "
+          f"({len(stations) / elapsed:.0f} stations/s)")
+    print(f"dead: {len(dead)} (expected {len(expected_dead)}), "
+          f"misclassified: {len(dead ^ expected_dead)}")
+    if latencies:
+        print(f"latency: p50={latencies[len(latencies) // 2]} ms "
+              f"p95={latencies[int(len(latencies) * 0.95)]} ms")
+    print(f"peak requests in flight per host: {prober.peak_active} (limit {args.per_host})")
+    print(f"peak asyncio tasks: {prober.peak_tasks} for {len(stations)} stations "
+          f"({args.concurrency} workers)")
+    print(f"store size: {file_size} bytes ({file_size / len(stations):.1f} bytes/station)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,304 @@
+#!/usr/bin/env python3
+"""
+Memory accounting and leak regression harness
+
+Runs a long scripted session on a virtual display against stand-in
+servers: station switches with image downloads, keystroke searches, deep
+scrolling and bursts of stream metadata. After every round it collects
+garbage and records Python allocations (tracemalloc), GObject instances,
+widgets and threads, attributed to StationsList, NowPlayingView,
+RadioPlayer and StationDownloader. Growth between the first and last round
+beyond the thresholds fails the run.
+
+Usage: python3 benchmarks/bench_leaks.py [--rounds N] [--threshold-kb KB] [--output FILE]
+"""
+import argparse
+import gc
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import tracemalloc
+from collections import Counter
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+# Source files whose allocations are attributed to each component
+COMPONENTS = {
+    'StationsList': os.path.join("src", "ui", "stations.py"),
+    'NowPlayingView': os.path.join("src", "ui", "now_playing.py"),
+    'RadioPlayer': os.path.join("src", "player.py"),
+    'StationDownloader': os.path.join("src", "utils", "downloader.py"),
+}
+
+# Searches typed one keystroke at a time in every round
+QUERIES = ["rock", "radio fm", ""]
+
+# Pages loaded by scrolling in every round
+SCROLL_PAGES = 10
+
+# Stations switched to in every round
+SWITCHES = 5
+
+# Tag messages posted per metadata burst
+METADATA_BURST = 50
+
+
+def pump(seconds):
+    """Run the GLib main loop for a while"""
+    from gi.repository import GLib
+
+    context = GLib.MainContext.default()
+    deadline = time.monotonic() + seconds
+    while time.monotonic() < deadline:
+        if not context.iteration(False):
+            time.sleep(0.005)
+
+
+def component_of(filename):
+    """Return the component a source file belongs to, or None"""
+    for name, path in COMPONENTS.items():
+        if filename.endswith(path):
+            return name
+    return None
+
+
+def gobject_counts():
+    """Count live GObject wrappers by type name"""
+    from gi.repository import GObject
+
+    return Counter(type(obj).__name__ for obj in gc.get_objects() if isinstance(obj, GObject.Object))
+
+
+def count_widgets(widget):
+    """Count a widget and all its descendants"""
+    from gi.repository import Gtk
+
+    count = 1
+    if isinstance(widget, Gtk.Container):
+        for child in widget.get_children():
+            count += count_widgets(child)
+    return count
+
+
+class LeakSession:
+    """Drives the components through the scripted rounds and measures them"""
+
+    def __init__(self, stations_file, server):
+        from gi.repository import Gtk
+        from src.player import RadioPlayer
+        from src.ui.now_playing import NowPlayingView
+        from src.ui.stations import StationsList
+
+        self.server = server
+        self.window = Gtk.Window(title="Leak harness")
+        self.window.set_default_size(800, 600)
+        box = Gtk.Box(orientation=Gtk.Orientation.HORIZONTAL)
+        self.window.add(box)
+
+        self.stations = StationsList()
+        self.stations.load_stations(stations_file)
+        box.pack_start(self.stations.scrolled_window, True, True, 0)
+
+        self.view = NowPlayingView()
+        box.pack_start(self.view, False, False, 0)
+
+        self.player = RadioPlayer()
+        self.player.set_metadata_callback(self.view.update_now_playing)
+        self.window.show_all()
+
+        self.round = 0
+
+    def run_round(self):
+        """Run one scripted round"""
+        self.round += 1
+
+        for i in range(SWITCHES):
+            station = dict(self.stations.filtered_stations[i],
+                           url=self.server.url(f"/tone/{self.round}-{i}.wav"),
+                           favicon=self.server.url(f"/favicon/{self.round}-{i}.png"))
+            # A new uuid per switch makes every image a fresh download
+            station['stationuuid'] = f"leak-{self.round}-{i}"
+            self.player.play(station['url'], station.get('name'))
+            self.view.update_station(station, True)
+            pump(0.3)
+            self.metadata_burst(station)
+
+        for query in QUERIES:
+            for length in range(1, len(query) + 1):
+                self.stations.search_stations(query[:length])
+                pump(0.01)
+            self.stations.search_stations(query)
+
+        for _ in range(SCROLL_PAGES):
+            self.stations._load_more_stations()
+            pump(0.01)
+
+        self.player.stop()
+        pump(0.2)
+
+    def metadata_burst(self, station):
+        """Post a burst of tag messages on the playing pipeline"""
+        from gi.repository import Gst
+
+        bus = self.player.player.get_bus()
+        for i in range(METADATA_BURST):
+            tags = Gst.TagList.new_empty()
+            tags.add_value(Gst.TagMergeMode.REPLACE, Gst.TAG_TITLE, f"{station['name']} song {self.round}-{i}")
+            tags.add_value(Gst.TagMergeMode.REPLACE, Gst.TAG_ARTIST, f"Artist {i % 7}")
+            bus.post(Gst.Message.new_tag(self.player.player, tags))
+        pump(0.2)
+
+    def measure(self):
+        """Collect garbage and take the measurements of this point"""
+        gc.collect()
+        snapshot = tracemalloc.take_snapshot()
+
+        allocated = Counter()
+        for stat in snapshot.statistics('traceback'):
+            # Attribute each allocation to the innermost frame of a component
+            for frame in stat.traceback:
+                component = component_of(frame.filename)
+                if component:
+                    allocated[component] += stat.size
+                    break
+            else:
+                allocated['other'] += stat.size
+
+        return {
+            'round': self.round,
+            'python_kb': {name: round(size / 1024, 1) for name, size in allocated.items()},
+            'gobjects': dict(gobject_counts()),
+            'widgets': {
+                'StationsList': count_widgets(self.stations.stations_list),
+                'NowPlayingView': count_widgets(self.view),
+            },
+            'player_metadata': len(self.player.metadata),
+            'threads': threading.active_count(),
+        }
+
+
+def growth(first, last):
+    """Compare two measurements"""
+    python_kb = {name: round(last['python_kb'].get(name, 0) - first['python_kb'].get(name, 0), 1)
+                 for name in list(COMPONENTS) + ['other']}
+    gobjects = {name: last['gobjects'].get(name, 0) - first['gobjects'].get(name, 0)
+                for name in set(first['gobjects']) | set(last['gobjects'])}
+    return {
+        'python_kb': python_kb,
+        'gobjects': {name: delta for name, delta in sorted(gobjects.items()) if delta},
+        'widgets': {name: last['widgets'][name] - first['widgets'][name] for name in last['widgets']},
+        'threads': last['threads'] - first['threads'],
+    }
+
+
+def run_worker(args):
+    """Run the session in this process"""
+    tracemalloc.start(args.frames)
+
+    import gi
+    gi.require_version("Gtk", "3.0")
+    gi.require_version("Gst", "1.0")
+    from gi.repository import Gst
+    Gst.init(None)
+
+    from catalog_gen import write_catalog
+    from standin import StandinServer
+
+    server = StandinServer().start()
+    stations_file = os.path.join(os.environ['HOME'], "stations.json")
+    write_catalog(stations_file, args.count)
+
+    session = LeakSession(stations_file, server)
+    measurements = []
+
+    # The first round warms caches and imports, growth counts from its end
+    for _ in range(args.rounds + 1):
+        session.run_round()
+        measurements.append(session.measure())
+        print(f"round {session.round}: " + ", ".join(
+            f"{name} {kb:.0f} KB" for name, kb in sorted(measurements[-1]['python_kb'].items())),
+            file=sys.stderr)
+
+    server.stop()
+
+    result = {
+        'rounds': args.rounds,
+        'growth': growth(measurements[0], measurements[-1]),
+        'measurements': measurements,
+    }
+
+    # Per component growth budgets
+    failures = []
+    for name, kb in result['growth']['python_kb'].items():
+        if name in COMPONENTS and kb > args.threshold_kb:
+            failures.append(f"{name} grew by {kb:.0f} KB of Python allocations")
+    for name, delta in result['growth']['widgets'].items():
+        if delta > args.widget_threshold:
+            failures.append(f"{name} grew by {delta} widgets")
+    if result['growth']['threads'] > args.thread_threshold:
+        failures.append(f"{result['growth']['threads']} more threads are alive")
+    result['failures'] = failures
+
+    with open(args.output, 'w') as f:
+        json.dump(result, f, indent=2)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Memory accounting and leak regression harness")
+    parser.add_argument("--rounds", type=int, default=50, help="Measured rounds of the session")
+    parser.add_argument("--count", type=int, default=5000, help="Size of the synthetic catalog")
+    parser.add_argument("--threshold-kb", type=float, default=256, help="Allowed growth per component")
+    parser.add_argument("--widget-threshold", type=int, default=0, help="Allowed widget growth per component")
+    parser.add_argument("--thread-threshold", type=int, default=2, help="Allowed growth of live threads")
+    parser.add_argument("--frames", type=int, default=10, help="Traceback depth recorded by tracemalloc")
+    parser.add_argument("--backend", choices=("auto", "xvfb", "broadway"), default="auto",
+                        help="Virtual display to use")
+    parser.add_argument("--output", default="leak-report.json", help="JSON file for the results")
+    parser.add_argument("--worker", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        run_worker(args)
+        return
+
+    from bench_gui import start_display
+
+    args.output = os.path.abspath(args.output)
+    with tempfile.TemporaryDirectory() as home:
+        display, display_env = start_display(args.backend)
+        try:
+            # A private home keeps the user's favorites and image cache out of it
+            env = dict(os.environ, HOME=home, **display_env)
+            env.pop('WAYLAND_DISPLAY', None)
+            subprocess.run([sys.executable, os.path.abspath(__file__), "--worker"] + sys.argv[1:] +
+                           ["--output", args.output],
+                           env=env, cwd=ROOT, check=True)
+        finally:
+            display.terminate()
+            display.wait()
+
+    with open(args.output) as f:
+        result = json.load(f)
+
+    print(f"Growth over {result['rounds']} rounds:")
+    for name, kb in result['growth']['python_kb'].items():
+        print(f"{name:>18}: {kb:+.1f} KB")
+    for name, delta in result['growth']['gobjects'].items():
+        print(f"{name:>18}: {delta:+d} instances")
+    print(f"{'threads':>18}: {result['growth']['threads']:+d}")
+    print(f"Report written to {args.output}")
+
+    if result['failures']:
+        for failure in result['failures']:
+            print(f"FAIL: {failure}")
+        sys.exit(1)
+    print("OK")
+
+
+if __name__ == "__main__":
+    main()
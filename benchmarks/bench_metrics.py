@@ -0,0 +1,95 @@
+#!/usr/bin/env python3
+"""
+Benchmark the cost of the metrics export
+
+Measures what the instrumentation adds to the code paths it sits in (a
+counter increment, a histogram observation), how long rendering the
+process registry takes, and the latency of scraping it over HTTP and of
+writing the metrics file, to check it is cheap enough to leave on.
+
+Usage: python3 benchmarks/bench_metrics.py [--operations N]
+"""
+import argparse
+import os
+import statistics
+import sys
+import tempfile
+import time
+import urllib.request
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.utils import metrics
+from src.utils.executor import get_executor, PRIORITY_IMAGES
+
+# Scrapes timed over HTTP
+SCRAPES = 200
+
+
+def per_operation_ns(function, operations):
+    """Average ns of a call, minus the cost of an empty call"""
+    def empty(_):
+        pass
+
+    def run(target):
+        started = time.perf_counter()
+        for value in range(operations):
+            target(value * 1e-4)
+        return time.perf_counter() - started
+
+    return (run(function) - run(empty)) / operations * 1e9
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--operations", type=int, default=500000, help="Increments and observations timed")
+    args = parser.parse_args()
+
+    print("Instrumentation cost:")
+    print(f"  counter increment     {per_operation_ns(lambda _: metrics.PLAYS.inc(), args.operations):7.0f} ns")
+    print(f"  histogram observe     {per_operation_ns(metrics.SEARCH_DURATION.observe, args.operations):7.0f} ns")
+
+    # Some executor activity, so its function-backed metrics have samples
+    executor = get_executor()
+    for _ in range(50):
+        executor.submit(PRIORITY_IMAGES, time.sleep, 0.001)
+    time.sleep(0.5)
+
+    renders = []
+    for _ in range(SCRAPES):
+        started = time.perf_counter()
+        text = metrics.REGISTRY.render()
+        renders.append(time.perf_counter() - started)
+    samples = sum(1 for line in text.splitlines() if not line.startswith('#'))
+    print(f"Registry: {samples} samples, {len(text)} bytes, render median "
+          f"{statistics.median(renders) * 1000:.2f} ms")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        exporter = metrics.MetricsExporter(port=0, host="127.0.0.1", file_path=os.path.join(tmp, "framenux.prom"),
+                                           file_interval=1).start()
+        try:
+            url = f"http://127.0.0.1:{exporter.port}/metrics"
+            scrapes = []
+            for _ in range(SCRAPES):
+                started = time.perf_counter()
+                with urllib.request.urlopen(url) as response:
+                    body = response.read()
+                    content_type = response.headers.get('Content-Type')
+                scrapes.append(time.perf_counter() - started)
+            print(f"HTTP scrape: median {statistics.median(scrapes) * 1000:.2f} ms, "
+                  f"max {max(scrapes) * 1000:.2f} ms ({content_type})")
+
+            started = time.perf_counter()
+            exporter.write_file()
+            print(f"File write: {(time.perf_counter() - started) * 1000:.2f} ms")
+        finally:
+            exporter.stop()
+
+    print("Sample of the output:")
+    for line in body.decode().splitlines():
+        if line.startswith(('framenux_plays', 'process_', 'framenux_executor_tasks_total{class="images"')):
+            print(f"  {line}")
+
+
+if __name__ == "__main__":
+    main()
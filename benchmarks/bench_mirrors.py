@@ -0,0 +1,158 @@
+#!/usr/bin/env python3
+"""
+Benchmark catalog mirror selection and failover
+
+Runs several stand-in catalog mirrors with injected latency and failures
+(down, refusing connections, breaking off or stalling mid-download) and
+measures how long MirrorSelector takes to pick a mirror and deliver a
+valid catalog in each scenario.
+
+Usage: python3 benchmarks/bench_mirrors.py [--stations N]
+"""
+import argparse
+import json
+import os
+import socket
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.utils import config
+from src.utils.mirrors import MirrorSelector
+from catalog_gen import generate_stations
+from standin import StandinHandler, StandinServer
+
+# Catalog bodies are sent in this many pieces so failures can hit mid-body
+BODY_PIECES = 20
+
+# Read timeout of the selector, kept short so stalls are cheap to measure
+READ_TIMEOUT = 1.0
+
+
+class MirrorHandler(StandinHandler):
+    """Serves the probe and catalog endpoints of a radio-browser mirror"""
+
+    def do_GET(self):
+        server = self.server
+        if server.connect_delay:
+            time.sleep(server.connect_delay)
+
+        if server.mode == 'down':
+            self.send_error(503)
+        elif self.path == config.MIRROR_PROBE_PATH:
+            self.send_body(b'{"stations": 1}')
+        elif self.path == config.STATIONS_API_PATH:
+            self.send_body(server.catalog)
+        else:
+            self.send_error(404)
+
+    def send_body(self, data):
+        """Send a JSON body, breaking off or stalling halfway if configured"""
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+
+        piece = max(1, len(data) // BODY_PIECES)
+        try:
+            for offset in range(0, len(data), piece):
+                if offset >= len(data) // 2 and len(data) > 100:
+                    if self.server.mode == 'truncate':
+                        return
+                    if self.server.mode == 'stall':
+                        time.sleep(READ_TIMEOUT * 3)
+                        return
+                self.wfile.write(data[offset:offset + piece])
+        except (BrokenPipeError, ConnectionResetError):
+            pass
+
+
+def start_mirror(catalog, delay, mode='ok'):
+    """Start a stand-in mirror and return it"""
+    server = StandinServer(connect_delay=delay, handler_class=MirrorHandler)
+    server.httpd.catalog = catalog
+    server.httpd.mode = mode
+    return server.start()
+
+
+def closed_port_url():
+    """Return a local URL nothing listens on"""
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return f"http://127.0.0.1:{s.getsockname()[1]}"
+
+
+def validate(path):
+    """Same check as StationDownloader"""
+    with open(path, 'r') as f:
+        json.load(f)
+
+
+def run_scenario(label, mirrors, cache_path, expected=None):
+    """Download the catalog once and print which mirror delivered it"""
+    selector = MirrorSelector(mirrors=[m.url("") if hasattr(m, 'url') else m for m in mirrors],
+                              cache_path=cache_path, probe_timeout=2.0, read_timeout=READ_TIMEOUT)
+    with tempfile.TemporaryDirectory() as tmp:
+        destination = os.path.join(tmp, "stations.json")
+        started = time.perf_counter()
+        try:
+            chosen, _ = selector.download(config.STATIONS_API_PATH, destination, validate=validate)
+            with open(destination) as f:
+                count = len(json.load(f))
+            outcome = f"{count} stations from mirror {selector.mirrors.index(chosen)}"
+        except OSError as e:
+            chosen = None
+            outcome = f"failed ({e})"
+        elapsed = time.perf_counter() - started
+
+    check = ""
+    if expected is not None:
+        check = " ok" if chosen == selector.mirrors[expected] else " UNEXPECTED"
+    print(f"{label:<44} {elapsed * 1000:8.1f} ms  {outcome}{check}")
+    return chosen
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--stations", type=int, default=5000, help="Stations in the served catalog")
+    args = parser.parse_args()
+
+    catalog = json.dumps(generate_stations(args.stations)).encode()
+    print(f"Catalog: {len(catalog) / 1e6:.1f} MB, read timeout {READ_TIMEOUT:.1f} s")
+
+    servers = []
+
+    def mirror(delay, mode='ok'):
+        server = start_mirror(catalog, delay, mode)
+        servers.append(server)
+        return server
+
+    try:
+        with tempfile.TemporaryDirectory() as tmp:
+            cache_path = os.path.join(tmp, "mirror.json")
+            down = closed_port_url()
+
+            # The first configured mirror is the slowest; the race should pick index 2
+            healthy = [mirror(0.4), mirror(0.2), mirror(0.02), mirror(0.1, 'down')]
+            run_scenario("race picks the fastest mirror", healthy + [down], cache_path, expected=2)
+            run_scenario("remembered mirror, no race", healthy + [down], cache_path, expected=2)
+
+            cache_path = os.path.join(tmp, "mirror-failover.json")
+            breaking = [mirror(0.3), mirror(0.02, 'truncate'), mirror(0.1)]
+            run_scenario("fastest breaks off mid-download", breaking, cache_path, expected=2)
+
+            cache_path = os.path.join(tmp, "mirror-stall.json")
+            stalling = [mirror(0.3), mirror(0.02, 'stall'), mirror(0.1)]
+            run_scenario("fastest stalls mid-download", stalling, cache_path, expected=2)
+
+            cache_path = os.path.join(tmp, "mirror-down.json")
+            run_scenario("all mirrors down", [mirror(0.0, 'down'), down], cache_path)
+    finally:
+        for server in servers:
+            server.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,133 @@
+#!/usr/bin/env python3
+"""
+Exercise the LAN rebroadcast with a stand-in source and local listeners
+
+Feeds a stand-in stream into a StreamRebroadcaster the way the player's
+source probe does, connects several listeners plus one that reads too
+slowly, and reports per-listener throughput and whether the rebroadcaster
+dropped the listener or the listener only saw its connection end.
+
+Usage: python3 benchmarks/bench_rebroadcast.py [--listeners N] [--seconds S]
+"""
+import argparse
+import http.client
+import os
+import socket
+import sys
+import threading
+import time
+import urllib.request
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.utils.rebroadcast import StreamRebroadcaster
+from standin import StandinServer
+
+
+def feed_source(url, rebroadcaster, stop):
+    """Read the upstream stand-in stream once and feed it to the rebroadcaster"""
+    with urllib.request.urlopen(url) as upstream:
+        rebroadcaster.set_source(upstream.headers.get_content_type(), "Stand-in")
+        while not stop.is_set():
+            data = upstream.read1(4096)
+            if not data:
+                break
+            rebroadcaster.feed(data)
+
+
+def listen(port, result, stop):
+    """Read from the rebroadcast as fast as the stream arrives"""
+    result['bytes'] = 0
+    result['disconnected'] = False
+    connection = http.client.HTTPConnection("127.0.0.1", port)
+    try:
+        connection.request("GET", "/stream")
+        # The rebroadcaster knows its listeners by client address
+        result['port'] = connection.sock.getsockname()[1]
+        stream = connection.getresponse()
+        while not stop.is_set():
+            data = stream.read1(4096)
+            if not data:
+                break
+            result['bytes'] += len(data)
+    except OSError:
+        pass
+    finally:
+        connection.close()
+    result['disconnected'] = not stop.is_set()
+
+
+def listen_slowly(port, result, stop):
+    """Read from the rebroadcast through a tiny receive window, far too slowly"""
+    result['bytes'] = 0
+    result['disconnected'] = False
+    with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as client:
+        client.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, 4096)
+        client.connect(("127.0.0.1", port))
+        result['port'] = client.getsockname()[1]
+        client.sendall(b"GET /stream HTTP/1.0\r\n\r\n")
+        while not stop.is_set():
+            data = client.recv(1024)
+            if not data:
+                break
+            result['bytes'] += len(data)
+            time.sleep(0.1)
+    result['disconnected'] = not stop.is_set()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--listeners", type=int, default=8, help="Number of well-behaved listeners")
+    parser.add_argument("--seconds", type=float, default=10.0, help="Run time")
+    args = parser.parse_args()
+
+    server = StandinServer().start()
+    # A small per-listener buffer makes the slow listener fall behind quickly
+    rebroadcaster = StreamRebroadcaster(port=0, host="127.0.0.1", client_buffer=128 * 1024).start()
+    stop = threading.Event()
+
+    # Keep every listener the rebroadcaster accepts, by client port, to read its drop flag
+    listeners = {}
+    add_listener = rebroadcaster.add_listener
+
+    def track_listener(address):
+        listener = add_listener(address)
+        if listener is not None:
+            listeners[address[1]] = listener
+        return listener
+
+    rebroadcaster.add_listener = track_listener
+
+    threads = [threading.Thread(target=feed_source,
+                                args=(server.url("/tone/shared.wav"), rebroadcaster, stop))]
+    results = [{} for _ in range(args.listeners + 1)]
+    for result in results[:-1]:
+        threads.append(threading.Thread(target=listen, args=(rebroadcaster.port, result, stop)))
+    threads.append(threading.Thread(target=listen_slowly, args=(rebroadcaster.port, results[-1], stop)))
+
+    for thread in threads:
+        thread.daemon = True
+        thread.start()
+        if thread is threads[0]:
+            # Listeners of the wrong format get disconnected, wait for the source
+            while rebroadcaster.bytes_received == 0:
+                time.sleep(0.01)
+    time.sleep(args.seconds)
+    stop.set()
+
+    stats = rebroadcaster.get_stats()
+    rebroadcaster.stop()
+    server.stop()
+
+    print(f"upstream: {stats['bytes_received'] * 8 / args.seconds / 1000:.0f} kbps received once")
+    for i, result in enumerate(results):
+        label = "slow listener" if i == args.listeners else f"listener {i}"
+        kbps = result.get('bytes', 0) * 8 / args.seconds / 1000
+        listener = listeners.get(result.get('port'))
+        dropped = listener is not None and listener.dropped
+        print(f"{label:>14}: {kbps:6.0f} kbps  dropped={dropped}  connection ended={result.get('disconnected')}")
+    print(f"dropped listeners: {stats['dropped_listeners']}")
+
+
+if __name__ == "__main__":
+    main()
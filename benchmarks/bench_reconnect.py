@@ -0,0 +1,74 @@
+#!/usr/bin/env python3
+"""
+Exercise stream reconnects against a stand-in server that drops connections
+
+Plays a stand-in stream that closes the connection every few seconds and
+goes down completely for a while, then reports the state changes seen by
+the app callback and how long each recovery took.
+
+Usage: python3 benchmarks/bench_reconnect.py [--drop SECONDS] [--outage SECONDS]
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import gi
+gi.require_version('Gst', '1.0')
+from gi.repository import GLib
+
+from src.player import RadioPlayer
+from standin import StandinServer
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--drop", type=float, default=4.0, help="Seconds before the server drops each connection")
+    parser.add_argument("--outage", type=float, default=6.0, help="Seconds the server refuses connections")
+    parser.add_argument("--duration", type=float, default=30.0, help="Total run time in seconds")
+    args = parser.parse_args()
+
+    server = StandinServer().start()
+    url = server.url(f"/tone/dropping.wav?drop={args.drop}")
+
+    loop = GLib.MainLoop()
+    player = RadioPlayer()
+    player.set_volume(0.0)
+
+    started = time.monotonic()
+    events = []
+    outage = {'since': None}
+
+    def _on_state(state, attempt):
+        elapsed = time.monotonic() - started
+        events.append((elapsed, state, attempt))
+        print(f"{elapsed:6.1f} s  {state:<12} attempt={attempt}")
+        if state == 'reconnecting' and outage['since'] is None:
+            outage['since'] = elapsed
+        elif state == 'playing' and outage['since'] is not None:
+            print(f"         recovered after {elapsed - outage['since']:.1f} s")
+            outage['since'] = None
+        elif state == 'failed':
+            loop.quit()
+
+    player.set_state_callback(_on_state)
+    player.play(url)
+
+    # Take the server down for a while in the middle of the run
+    outage_start = args.duration / 3
+    GLib.timeout_add(int(outage_start * 1000), lambda: server.set_refuse_streams(True) or False)
+    GLib.timeout_add(int((outage_start + args.outage) * 1000), lambda: server.set_refuse_streams(False) or False)
+    GLib.timeout_add(int(args.duration * 1000), lambda: loop.quit() or False)
+    loop.run()
+
+    player.stop()
+    server.stop()
+
+    print(f"reconnects={player.reconnect.total_reconnects} "
+          f"failed={any(state == 'failed' for _, state, _ in events)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,120 @@
+#!/usr/bin/env python3
+"""
+Benchmark conditional catalog refreshes and applying a new catalog
+
+Serves a generated catalog from a stand-in API and measures, with
+CatalogRefresher, the bytes and time of the first download, of refreshes
+while nothing changed (with and without ETag/Last-Modified support on the
+server) and after the catalog changed. Then measures how long the main
+thread stalls while a new catalog is loaded: synchronously, as a manual
+update used to, and in a background thread as the refresher does, and
+while the replaced catalog is freed.
+
+Usage: python3 benchmarks/bench_refresh.py [--stations N]
+"""
+import argparse
+import os
+import sys
+import tempfile
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.utils.mirrors import MirrorSelector
+from src.utils.refresh import CatalogRefresher
+from src.catalog.stations import StationCatalog
+from catalog_gen import generate_stations
+from standin_api import StandinApi
+
+# Interval of the simulated main loop's ticks
+TICK_SECONDS = 0.005
+
+
+def measure_refresh(label, api, refresher, conditional=True):
+    """Refresh once and print the cost"""
+    sent = api.bytes_sent
+    started = time.perf_counter()
+    changed = refresher.refresh(conditional=conditional)
+    elapsed = time.perf_counter() - started
+    print(f"  {label:<38} {elapsed * 1000:8.1f} ms {(api.bytes_sent - sent) / 1e6:8.2f} MB  changed={changed}")
+
+
+def longest_stall(work):
+    """
+    Run work while ticking like a main loop and return the longest gap
+    between ticks in ms
+    """
+    done = threading.Event()
+    longest = 0.0
+    last = time.perf_counter()
+
+    thread = threading.Thread(target=lambda: (work(), done.set()))
+    thread.start()
+    while not done.is_set():
+        time.sleep(TICK_SECONDS)
+        now = time.perf_counter()
+        longest = max(longest, now - last)
+        last = now
+    thread.join()
+    return longest * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--stations", type=int, default=54000, help="Stations in the served catalog")
+    args = parser.parse_args()
+
+    print(f"Generating {args.stations} stations...")
+    api = StandinApi(generate_stations(args.stations, seed=1)).start()
+    plain_api = StandinApi(api.httpd.stations, send_validators=False).start()
+
+    try:
+        with tempfile.TemporaryDirectory() as tmp:
+            def new_refresher(server, name):
+                mirrors = MirrorSelector(mirrors=[server.url("")], cache_path=os.path.join(tmp, f"{name}-mirror.json"))
+                return CatalogRefresher(mirrors=mirrors, destination=os.path.join(tmp, f"{name}.json"),
+                                        meta_path=os.path.join(tmp, f"{name}-meta.json"))
+
+            print("Server with ETag and Last-Modified:")
+            refresher = new_refresher(api, "stations")
+            measure_refresh("first download", api, refresher)
+            measure_refresh("unchanged, conditional", api, refresher)
+            measure_refresh("unchanged, unconditional", api, refresher, conditional=False)
+            api.set_stations(generate_stations(args.stations, seed=2))
+            measure_refresh("changed, conditional", api, refresher)
+            measure_refresh("unchanged again", api, refresher)
+
+            print("Server without validators:")
+            plain = new_refresher(plain_api, "plain")
+            measure_refresh("first download", plain_api, plain)
+            measure_refresh("unchanged, recognized by hash", plain_api, plain)
+
+            # Applying: the main loop keeps ticking unless the load runs on it
+            path = refresher.destination
+            started = time.perf_counter()
+            StationCatalog().load(path)
+            synchronous = (time.perf_counter() - started) * 1000
+            plain_load = longest_stall(lambda: StationCatalog().load(path))
+            background = longest_stall(lambda: StationCatalog().load(path, incremental=True))
+
+            old = StationCatalog()
+            old.load(path)
+            freed_at_once = longest_stall(lambda: old.__dict__.clear())
+            old = StationCatalog()
+            old.load(path)
+            released = longest_stall(old.release)
+
+            print("Applying a new catalog:")
+            print(f"  {'main loop stall, load on main loop':<38} {synchronous:8.1f} ms")
+            print(f"  {'stall, json.load in background':<38} {plain_load:8.1f} ms")
+            print(f"  {'stall, incremental load in background':<38} {background:8.1f} ms")
+            print(f"  {'stall, old catalog freed at once':<38} {freed_at_once:8.1f} ms")
+            print(f"  {'stall, old catalog released':<38} {released:8.1f} ms")
+    finally:
+        api.stop()
+        plain_api.stop()
+
+
+if __name__ == "__main__":
+    main()
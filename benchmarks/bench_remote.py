@@ -0,0 +1,181 @@
+#!/usr/bin/env python3
+"""
+Benchmark the remote (server-side query) station source
+
+Runs a stand-in radio-browser API with an injected round-trip delay and
+replays a session against RemoteCatalog: loading, typing a search one
+keystroke at a time, scrolling through the results, switching filters and
+sort orders. The session is replayed cold, again with the disk cache
+warm, and once more with the API down and the cache expired.
+
+Also types a search the way the station list does, fetching the rows of
+each keystroke on the executor, and measures how long the main loop is
+busy per keystroke and which results reach the list.
+
+Usage: python3 benchmarks/bench_remote.py [--stations N] [--delay SECONDS]
+"""
+import argparse
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.utils import config
+from src.utils.http_cache import ResponseCache
+from src.utils.mirrors import MirrorSelector
+from src.utils.executor import TaskExecutor, CancelToken, PRIORITY_SEARCH
+from src.catalog.remote import RemoteCatalog
+from catalog_gen import generate_stations
+from standin_api import StandinApi
+
+# What the user types, one search per keystroke
+TYPED = "rock"
+
+# Pages scrolled through, and the pause between them
+SCROLL_PAGES = 5
+SCROLL_PAUSE = 0.3
+
+
+def timed(function):
+    """Run a function and return (result, milliseconds)"""
+    started = time.perf_counter()
+    result = function()
+    return result, (time.perf_counter() - started) * 1000
+
+
+def replay(catalog):
+    """Replay a session and return the timings of its steps in ms"""
+    timings = {}
+
+    _, timings['load'] = timed(catalog.load)
+
+    # The full listing's first page is prefetched while the window appears
+    time.sleep(SCROLL_PAUSE)
+    _, timings['first_page'] = timed(lambda: catalog.stations[:config.PAGE_SIZE])
+
+    keystrokes = []
+    for length in range(1, len(TYPED) + 1):
+        _, ms = timed(lambda: catalog.search(TYPED[:length])[:config.PAGE_SIZE])
+        keystrokes.append(ms)
+        time.sleep(0.15)
+    timings['keystrokes'] = keystrokes
+
+    results = catalog.search(TYPED)
+    pages = []
+    for page in range(1, SCROLL_PAGES + 1):
+        time.sleep(SCROLL_PAUSE)
+        start = page * config.PAGE_SIZE
+        _, ms = timed(lambda: results[start:start + config.PAGE_SIZE])
+        pages.append(ms)
+    timings['scroll_pages'] = pages
+
+    _, timings['tag_filter'] = timed(lambda: catalog.filter("tag:jazz")[:config.PAGE_SIZE])
+    _, timings['sort_bitrate'] = timed(
+        lambda: catalog.sort(catalog.filter("tag:jazz"), 'bitrate')[:config.PAGE_SIZE])
+    _, timings['field_search'] = timed(
+        lambda: catalog.search("country:germany bitrate:>=128")[:config.PAGE_SIZE])
+    return timings
+
+
+def run_until_done(dispatch):
+    """Run the executor's callback dispatch right away, until it has nothing left"""
+    while dispatch():
+        pass
+
+
+def type_like_station_list(catalog):
+    """
+    Type a search the way StationsList does: cheap calls on the main loop,
+    rows fetched on the executor, each keystroke superseding the last
+
+    Returns:
+        tuple: (main-loop ms per keystroke, searches whose rows were shown)
+    """
+    # The rows are shown on whichever worker finished them, no main loop runs here
+    executor = TaskExecutor(schedule=run_until_done)
+    shown = []
+    main_loop = []
+    token = None
+    for length in range(1, len(TYPED) + 1):
+        text = TYPED[:length]
+        started = time.perf_counter()
+        if token is not None:
+            token.cancel()
+        results = catalog.search(text)
+        len(results)
+        if results.fetched(0, config.PAGE_SIZE):
+            shown.append(text)
+        else:
+            token = CancelToken()
+            executor.submit(PRIORITY_SEARCH, results.fetch, 0, config.PAGE_SIZE, token, token=token,
+                            on_complete=lambda rows, text=text: shown.append(text))
+        main_loop.append((time.perf_counter() - started) * 1000)
+        time.sleep(0.03)
+
+    deadline = time.monotonic() + 10
+    while TYPED not in shown and time.monotonic() < deadline:
+        time.sleep(0.01)
+    executor.shutdown()
+    return main_loop, shown
+
+
+def report(label, timings, requests):
+    """Print the timings of a session"""
+    print(f"{label}: {sum(requests.values())} API requests")
+    for step, value in timings.items():
+        if isinstance(value, list):
+            print(f"  {step:<14} " + " ".join(f"{ms:7.1f}" for ms in value) +
+                  f"   (median {statistics.median(value):.1f} ms)")
+        else:
+            print(f"  {step:<14} {value:7.1f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--stations", type=int, default=20000, help="Stations served by the stand-in API")
+    parser.add_argument("--delay", type=float, default=0.08, help="Simulated round-trip time in seconds")
+    args = parser.parse_args()
+
+    api = StandinApi(generate_stations(args.stations), delay=args.delay).start()
+    try:
+        with tempfile.TemporaryDirectory() as tmp:
+            cache_dir = os.path.join(tmp, "api_cache")
+
+            def new_catalog(ttl=None):
+                mirrors = MirrorSelector(mirrors=[api.url("")], cache_path=os.path.join(tmp, "mirror.json"))
+                return RemoteCatalog(mirrors=mirrors, cache=ResponseCache(cache_dir, ttl=ttl))
+
+            print(f"Stand-in API: {args.stations} stations, {args.delay * 1000:.0f} ms per request")
+
+            timings = replay(new_catalog())
+            report("Cold cache", timings, api.requests)
+
+            api.requests.clear()
+            timings = replay(new_catalog())
+            report("Warm disk cache, new process", timings, api.requests)
+
+            cache = ResponseCache(cache_dir)
+            print(f"Cache on disk: {len(cache.entries)} responses, {cache.total_bytes / 1e6:.1f} MB")
+
+            # Fast typing against a cold cache, rows fetched in the background
+            mirrors = MirrorSelector(mirrors=[api.url("")], cache_path=os.path.join(tmp, "mirror.json"))
+            catalog = RemoteCatalog(mirrors=mirrors, cache=ResponseCache(os.path.join(tmp, "typing_cache")))
+            main_loop, shown = type_like_station_list(catalog)
+            print("Station list typing, cold cache: main loop " +
+                  " ".join(f"{ms:.2f}" for ms in main_loop) + " ms per keystroke, "
+                  f"rows shown for {shown}")
+
+            # Expired entries are still served while the API is unreachable
+            api.stop()
+            timings = replay(new_catalog(ttl=0))
+            report("API down, expired cache", timings, api.requests)
+    finally:
+        if not api.httpd.stopping:
+            api.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,85 @@
+#!/usr/bin/env python3
+"""
+Benchmark stream URL resolution
+
+Resolves playlist and redirect-chain station URLs served by a stand-in
+server, first cold and then from the resolver cache.
+
+Usage: python3 benchmarks/bench_resolver.py [--stations N] [--delay SECONDS]
+"""
+import argparse
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.utils.resolver import StreamResolver
+from standin import StandinServer
+
+
+def station_urls(server, count):
+    """Build a mix of playlist and redirect URLs, all wrapping a tone stream"""
+    urls = []
+    for i in range(count):
+        kind = i % 3
+        if kind == 0:
+            urls.append(server.url(f"/playlist/station{i}.pls"))
+        elif kind == 1:
+            urls.append(server.url(f"/redirect/2/playlist/station{i}.m3u"))
+        else:
+            urls.append(server.url(f"/redirect/3/tone/station{i}.wav"))
+    return urls
+
+
+def report(label, timings):
+    """Print a summary line for a set of timings"""
+    ms = [t * 1000 for t in timings]
+    print(f"{label}: n={len(ms)} mean={statistics.mean(ms):.2f} ms "
+          f"median={statistics.median(ms):.2f} ms max={max(ms):.2f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--stations", type=int, default=30, help="Number of station URLs")
+    parser.add_argument("--delay", type=float, default=0.05, help="Simulated per-request server delay")
+    args = parser.parse_args()
+
+    server = StandinServer(connect_delay=args.delay).start()
+    urls = station_urls(server, args.stations)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        resolver = StreamResolver(cache_path=os.path.join(tmp, "resolved.json"))
+
+        # Cold resolution: what playbin pays on every play without the resolver
+        cold = []
+        for url in urls:
+            start = time.perf_counter()
+            resolved = resolver.resolve(url)
+            cold.append(time.perf_counter() - start)
+            assert "/tone/" in resolved, resolved
+        report("cold resolve", cold)
+
+        # Background pre-warming of all stations
+        start = time.perf_counter()
+        resolver.prewarm(urls)
+        while resolver.pending:
+            time.sleep(0.01)
+        print(f"background prewarm of {len(urls)} stations: {(time.perf_counter() - start) * 1000:.0f} ms")
+
+        # Cached lookups: what play() pays once a station is pre-warmed
+        cached = []
+        for url in urls:
+            start = time.perf_counter()
+            resolved = resolver.lookup(url)
+            cached.append(time.perf_counter() - start)
+            assert resolved and "/tone/" in resolved, url
+        report("cached lookup", cached)
+
+    server.stop()
+
+
+if __name__ == "__main__":
+    main()
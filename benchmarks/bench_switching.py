@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+"""
+Benchmark station switching time-to-first-audio
+
+Switches between stand-in stations with and without the standby pre-roll
+pipeline and reports how long each switch takes until audio plays.
+
+Usage: python3 benchmarks/bench_switching.py [--switches N] [--delay SECONDS]
+"""
+import argparse
+import os
+import statistics
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import gi
+gi.require_version('Gst', '1.0')
+from gi.repository import GLib
+
+from src.player import RadioPlayer
+from standin import StandinServer
+
+# How long to let each station play before switching
+PLAY_SECONDS = 2.0
+
+
+def run_switches(player, urls, use_preroll):
+    """
+    Play each URL in turn and collect the time-to-first-audio of each switch
+
+    Args:
+        player: RadioPlayer to drive
+        urls: Station URLs to switch between
+        use_preroll: Whether to pre-roll the next URL while one is playing
+
+    Returns:
+        list: Time-to-first-audio of every switch in seconds
+    """
+    loop = GLib.MainLoop()
+    timings = []
+    position = {'index': 0}
+
+    player.preroll_enabled = use_preroll
+
+    def _next_station():
+        # Record the previous switch
+        if position['index'] > 0:
+            if player.last_time_to_first_audio is not None:
+                timings.append(player.last_time_to_first_audio)
+
+        if position['index'] >= len(urls):
+            loop.quit()
+            return False
+
+        player.play(urls[position['index']])
+        position['index'] += 1
+
+        # Pre-roll the next station while this one plays
+        if use_preroll and position['index'] < len(urls):
+            player.preroll(urls[position['index']])
+        return True
+
+    _next_station()
+    GLib.timeout_add(int(PLAY_SECONDS * 1000), _next_station)
+    loop.run()
+
+    player.stop()
+    player.cancel_preroll()
+    return timings
+
+
+def report(label, timings):
+    """Print a summary line for a set of timings"""
+    if not timings:
+        print(f"{label}: no audio was played")
+        return
+    ms = [t * 1000 for t in timings]
+    print(f"{label}: switches={len(ms)} mean={statistics.mean(ms):.0f} ms "
+          f"median={statistics.median(ms):.0f} ms max={max(ms):.0f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--switches", type=int, default=8, help="Number of station switches")
+    parser.add_argument("--delay", type=float, default=0.3, help="Simulated server connect delay")
+    args = parser.parse_args()
+
+    server = StandinServer(connect_delay=args.delay).start()
+    urls = [server.url(f"/tone/{i}.wav?freq={300 + 40 * i}") for i in range(args.switches + 1)]
+
+    try:
+        player = RadioPlayer()
+        player.set_volume(0.0)
+        report("without pre-roll", run_switches(player, urls, use_preroll=False))
+        report("with pre-roll", run_switches(player, urls, use_preroll=True))
+    finally:
+        server.stop()
+
+
+if __name__ == "__main__":
+    main()
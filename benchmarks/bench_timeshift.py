@@ -0,0 +1,163 @@
+#!/usr/bin/env python3
+"""
+Exercise the timeshift buffer with a synthetic stream
+
+Feeds a deterministic byte pattern into a TimeshiftBuffer at a fixed rate,
+pauses the reader, resumes, rewinds into the disk-spilled part of the
+window and checks every byte that comes back. Also reports the memory cap
+and read/write throughput.
+
+Then runs a TimeshiftSession against a stand-in station that drops the
+connection and then refuses it, and checks that the local stream ends
+instead of hanging, that the ingest thread survives and that playback
+resumes once the station is back.
+
+Usage: python3 benchmarks/bench_timeshift.py [--bitrate KBPS] [--minutes M]
+"""
+import argparse
+import os
+import sys
+import time
+import urllib.request
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.utils import config
+from src.utils.timeshift import TimeshiftBuffer, TimeshiftSession
+from standin import StandinServer
+
+CHUNK_SIZE = 4096
+
+# Seconds the stand-in station streams before it drops the connection
+DROP_AFTER = 1.0
+
+# Seconds a local read may block before the stream counts as hung
+HANG_SECONDS = 10
+
+
+def pattern(offset, size):
+    """Bytes of the synthetic stream at an absolute offset"""
+    return bytes((i * 7 + i // 251) & 0xFF for i in range(offset, offset + size))
+
+
+def verify(buffer, offset, size):
+    """Read a range back from the buffer and compare it with the pattern"""
+    checked = 0
+    while checked < size:
+        data, at = buffer.read(offset + checked, size - checked, timeout=0)
+        if at != offset + checked:
+            raise AssertionError(f"read at {offset + checked} returned data from {at}")
+        if not data:
+            raise AssertionError(f"no data at {offset + checked}")
+        if data != pattern(at, len(data)):
+            raise AssertionError(f"corrupt data at {at}")
+        checked += len(data)
+    return checked
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--bitrate", type=int, default=128, help="Synthetic stream bitrate in kbps")
+    parser.add_argument("--minutes", type=float, default=10, help="Simulated stream length")
+    parser.add_argument("--memory", type=int, default=1024 * 1024, help="Memory cap in bytes")
+    parser.add_argument("--disk", type=int, default=8 * 1024 * 1024, help="Disk ring size in bytes")
+    args = parser.parse_args()
+
+    byte_rate = args.bitrate * 1000 // 8
+    total = int(args.minutes * 60 * byte_rate)
+    buffer = TimeshiftBuffer(memory_limit=args.memory, disk_limit=args.disk)
+
+    # Ingest the whole stream as fast as possible while the reader is "paused"
+    peak_memory = 0
+    started = time.perf_counter()
+    for offset in range(0, total, CHUNK_SIZE):
+        buffer.feed(pattern(offset, min(CHUNK_SIZE, total - offset)))
+        peak_memory = max(peak_memory, buffer.memory_bytes)
+    ingest_seconds = time.perf_counter() - started
+
+    window = buffer.end - buffer.start
+    print(f"ingested {total / 1e6:.1f} MB at {total / ingest_seconds / 1e6:.0f} MB/s")
+    print(f"memory peak {peak_memory / 1024:.0f} KB (cap {args.memory / 1024:.0f} KB), "
+          f"window {window / byte_rate:.0f} s of {total / byte_rate:.0f} s")
+    if peak_memory > args.memory + CHUNK_SIZE:
+        raise AssertionError("memory cap exceeded")
+
+    # Resume a reader that paused longer than the window: it lands on the oldest byte
+    data, offset = buffer.read(0, CHUNK_SIZE, timeout=0)
+    if offset != buffer.start:
+        raise AssertionError("stale offset was not moved into the window")
+    print(f"resume after a long pause continues at {(buffer.end - offset) / byte_rate:.0f} s behind live")
+
+    # Rewind 30 seconds from the live edge (memory) and into the spilled part (disk)
+    started = time.perf_counter()
+    checked = verify(buffer, buffer.end - 30 * byte_rate, 30 * byte_rate)
+    checked += verify(buffer, buffer.start, min(window, 60 * byte_rate))
+    read_seconds = time.perf_counter() - started
+    print(f"verified {checked / 1e6:.1f} MB from memory and disk at {checked / read_seconds / 1e6:.0f} MB/s")
+
+    buffer.close()
+
+    dropped_upstream()
+
+
+def read_local_stream(url):
+    """
+    Play the local timeshift stream like the player would
+
+    Returns:
+        tuple: (bytes received, seconds until the stream ended)
+    """
+    started = time.monotonic()
+    received = 0
+    with urllib.request.urlopen(url, timeout=HANG_SECONDS) as response:
+        while True:
+            data = response.read1(CHUNK_SIZE)
+            if not data:
+                break
+            received += len(data)
+    return received, time.monotonic() - started
+
+
+def dropped_upstream():
+    """Drop and refuse the upstream of a timeshift session and watch the local stream"""
+    # Retry the upstream quickly, the backoff itself is not measured here
+    config.RECONNECT_BASE_DELAY = 0.5
+    config.RECONNECT_MAX_DELAY = 0.5
+
+    server = StandinServer().start()
+    session = TimeshiftSession(server.url(f"/tone/timeshift.wav?drop={DROP_AFTER}")).start()
+    try:
+        # The station drops the connection: the local stream ends after the buffered data
+        received, seconds = read_local_stream(session.url())
+        stats = session.get_stats()
+        print(f"upstream dropped: local stream ended after {seconds:.1f} s and {received / 1e3:.0f} KB, "
+              f"upstream errors {stats['upstream_errors']}")
+
+        # The station refuses connections: a reconnecting player gets an empty stream
+        server.set_refuse_streams(True)
+        time.sleep(1.5)
+        received, seconds = read_local_stream(session.url())
+        if received:
+            raise AssertionError("live edge served data while the upstream was down")
+        if not session.source.thread.is_alive():
+            raise AssertionError("ingest thread died on an upstream error")
+        print(f"upstream refused: reconnect ended after {seconds * 1000:.0f} ms, ingest thread alive, "
+              f"upstream errors {session.get_stats()['upstream_errors']}")
+
+        # The station is back: the next reconnect plays again
+        server.set_refuse_streams(False)
+        deadline = time.monotonic() + HANG_SECONDS
+        received = 0
+        while not received and time.monotonic() < deadline:
+            time.sleep(0.2)
+            received, seconds = read_local_stream(session.url())
+        if not received:
+            raise AssertionError("playback did not resume after the station came back")
+        print(f"upstream back: reconnect received {received / 1e3:.0f} KB")
+    finally:
+        session.stop()
+        server.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,157 @@
+#!/usr/bin/env python3
+"""
+Benchmark the main-loop stall watchdog
+
+Runs a simulated main loop whose handlers stand in for the usual suspects
+of a hitching window: a slow search, filling the station list, decoding
+an image in C code that holds the GIL, and cheap bus messages. Checks
+that StallWatchdog reports a stall for every handler that blocked the
+loop longer than the threshold, no more and none shorter than the
+handler ran, to which handler it attributes them, and measures the CPU
+the watchdog costs while the loop is idle. Exits with an error when the
+reported stalls do not match the handlers that ran.
+
+Usage: python3 benchmarks/bench_watchdog.py
+"""
+import json
+import os
+import sys
+import tempfile
+import time
+from collections import deque
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.utils.watchdog import StallWatchdog
+
+# Seconds the loop idles while the watchdog's overhead is measured
+IDLE_SECONDS = 3.0
+
+# Reported stalls may exceed the handler by a tick interval plus this much loop jitter
+JITTER_SECONDS = 0.02
+
+# JSON decoded by the image handler; json.loads holds the GIL throughout
+DECODE_DOCUMENT = json.dumps([{"name": f"station {i}", "bitrate": i} for i in range(400000)])
+
+
+class TimerLoop:
+    """Main loop running due timers before idle callbacks, like GLib"""
+
+    def __init__(self):
+        self.timers = []
+        self.idle = deque()
+        # Name and run time of every idle callback, in order
+        self.handled = []
+
+    def timeout_add(self, milliseconds, callback):
+        """Call a function every interval while it returns True"""
+        self.timers.append([time.monotonic() + milliseconds / 1000, milliseconds / 1000, callback])
+
+    def idle_add(self, function, *args):
+        self.idle.append((function, args))
+
+    def run(self, seconds):
+        end = time.monotonic() + seconds
+        while time.monotonic() < end:
+            now = time.monotonic()
+            for timer in list(self.timers):
+                if timer[0] <= now:
+                    if timer[2]():
+                        timer[0] = now + timer[1]
+                    else:
+                        self.timers.remove(timer)
+
+            if self.idle:
+                function, args = self.idle.popleft()
+                started = time.monotonic()
+                function(*args)
+                self.handled.append((function.__name__, time.monotonic() - started))
+            else:
+                time.sleep(0.001)
+
+
+def busy(seconds):
+    """Python code running for some time"""
+    end = time.perf_counter() + seconds
+    total = 0
+    while time.perf_counter() < end:
+        total += sum(range(200))
+    return total
+
+
+def search_stations(text):
+    return busy(0.45)
+
+
+def populate_stations_list(rows):
+    for _ in range(rows):
+        busy(0.3 / rows)
+
+
+def set_station_image(path):
+    return json.loads(DECODE_DOCUMENT)
+
+
+def on_message(message):
+    busy(0.002)
+
+
+def main():
+    with tempfile.TemporaryDirectory() as tmp:
+        log_path = os.path.join(tmp, "stalls.log")
+
+        # Timed before the watchdog runs, it would count as a stall
+        started = time.perf_counter()
+        set_station_image(None)
+        print(f"Image decode stand-in takes {(time.perf_counter() - started) * 1000:.0f} ms")
+
+        # Overhead: CPU used by an idle loop with and without the watchdog
+        loop = TimerLoop()
+        started = time.process_time()
+        loop.run(IDLE_SECONDS)
+        baseline = time.process_time() - started
+
+        loop = TimerLoop()
+        watchdog = StallWatchdog(log_path=log_path)
+        watchdog.start(loop.timeout_add)
+        started = time.process_time()
+        loop.run(IDLE_SECONDS)
+        watched = time.process_time() - started
+        print(f"Idle CPU: {baseline / IDLE_SECONDS * 1000:.1f} ms/s without the watchdog, "
+              f"{watched / IDLE_SECONDS * 1000:.1f} ms/s with it")
+
+        # Handlers that block the loop, with pauses in between
+        for handler, argument in [(on_message, "tag"), (search_stations, "rock"), (on_message, "buffering"),
+                                  (populate_stations_list, 50), (set_station_image, "logo.png"),
+                                  (on_message, "eos"), (search_stations, "jazz")]:
+            loop.idle_add(handler, argument)
+            loop.run(0.3)
+        loop.run(0.3)
+        watchdog.stop()
+
+        # Every handler over the threshold must show up as a stall at least as long
+        expected = [(name, seconds) for name, seconds in loop.handled if seconds >= watchdog.threshold]
+        stats = watchdog.get_stats()
+        print(f"Stalls: {stats['stalls']} (expected {len(expected)}), p50 {stats['stall_ms_p50']} ms, "
+              f"max {stats['stall_ms_max']} ms; tick lateness p50 {stats['latency_ms_p50']} ms")
+
+        errors = []
+        if len(watchdog.stalls) != len(expected):
+            errors.append(f"{len(watchdog.stalls)} stalls reported for {len(expected)} slow handlers")
+        for stall, (name, seconds) in zip(watchdog.stalls, expected):
+            print(f"  {stall['duration'] * 1000:6.0f} ms  {stall['handler']}  at {stall['location']}  "
+                  f"({name} ran {seconds * 1000:.0f} ms)")
+            if not seconds <= stall['duration'] <= seconds + watchdog.interval + JITTER_SECONDS:
+                errors.append(f"{name} ran {seconds * 1000:.0f} ms, reported as {stall['duration'] * 1000:.0f} ms")
+
+        with open(log_path) as f:
+            lines = f.read().splitlines()
+        print(f"Log: {len(lines)} lines, ending with")
+        print("\n".join(lines[-8:]))
+
+    if errors:
+        raise AssertionError("; ".join(errors))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,208 @@
+#!/usr/bin/env python3
+"""
+Synthetic radio-browser catalogs for benchmarks
+
+Generates station lists with the fields and value distributions of the
+radio-browser /json/stations dump: a few countries, languages, codecs and
+tags account for most stations, names mix common words and non-ASCII
+text. A few percent of the entries are the same broadcast listed again
+with a slightly different URL or name, as in the real catalog. Output is
+deterministic for a given seed.
+
+Usage: python3 benchmarks/catalog_gen.py COUNT OUTPUT [--seed N]
+"""
+import argparse
+import json
+import random
+import uuid
+
+# (country, countrycode, language, languagecodes, weight), roughly as in the real catalog
+COUNTRIES = [
+    ("The United States Of America", "US", "english", "en", 60),
+    ("Germany", "DE", "german", "de", 35),
+    ("Russia", "RU", "russian", "ru", 12),
+    ("France", "FR", "french", "fr", 12),
+    ("Greece", "GR", "greek", "el", 10),
+    ("China", "CN", "chinese", "zh", 9),
+    ("Italy", "IT", "italian", "it", 9),
+    ("United Kingdom", "GB", "english", "en", 9),
+    ("Mexico", "MX", "spanish", "es", 8),
+    ("Spain", "ES", "spanish", "es", 8),
+    ("Brazil", "BR", "portuguese", "pt", 8),
+    ("Canada", "CA", "english,french", "en,fr", 6),
+    ("The Netherlands", "NL", "dutch", "nl", 6),
+    ("Poland", "PL", "polish", "pl", 5),
+    ("Japan", "JP", "japanese", "ja", 3),
+    ("Turkey", "TR", "turkish", "tr", 4),
+    ("India", "IN", "hindi", "hi", 4),
+    ("Argentina", "AR", "spanish", "es", 4),
+    ("Ukraine", "UA", "ukrainian", "uk", 3),
+    ("Australia", "AU", "english", "en", 3),
+    ("", "", "", "", 2),
+]
+
+STATES = ["", "", "", "Bavaria", "California", "Attica", "Île-de-France", "Texas", "Lombardy", "Ontario"]
+
+# (codec, weight)
+CODECS = [("MP3", 70), ("AAC", 15), ("AAC+", 8), ("OGG", 3), ("FLAC", 1), ("UNKNOWN", 3)]
+BITRATES = [0, 32, 48, 64, 96, 128, 128, 128, 192, 256, 320]
+
+TAGS = [
+    "pop", "music", "news", "rock", "talk", "classical", "dance", "jazz", "hits", "electronic",
+    "oldies", "80s", "90s", "top 40", "country", "christian", "public radio", "community radio",
+    "house", "local", "sports", "chillout", "ambient", "hip-hop", "folk", "latin", "metal",
+    "alternative", "indie", "blues", "reggae", "soul", "variety", "adult contemporary", "rnb",
+    "techno", "trance", "lounge", "easy listening", "world music", "schlager", "greek", "íslensk",
+    "música", "радио", "流行", "ニュース",
+]
+
+NAME_WORDS = [
+    "Radio", "FM", "Classic", "Hits", "Rock", "Jazz", "Love", "City", "Star", "Sky", "Wave",
+    "Energy", "Kiss", "Nova", "Music", "Top", "Live", "Sound", "Dance", "Gold", "Capital",
+    "Mix", "One", "Active", "Deep", "Chill", "Smooth", "Latino", "Planet", "Sunshine",
+    "Deutschlandfunk", "Ράδιο", "Μουσική", "Радио", "Русское", "ラジオ", "电台", "Música", "Élan",
+]
+
+# Weights of tag counts per station (many stations have none)
+TAG_COUNTS = [(0, 30), (1, 25), (2, 20), (3, 12), (4, 8), (6, 5)]
+
+# Share of entries that repeat an earlier station
+DUPLICATE_RATE = 0.04
+
+
+def _weighted(rng, items):
+    """Pick the first element of a weighted (value..., weight) tuple"""
+    return rng.choices(items, weights=[item[-1] for item in items])[0]
+
+
+def generate_station(rng, index, stream_url=None):
+    """
+    Generate one station dictionary
+
+    Args:
+        rng: random.Random instance
+        index: Position of the station in the catalog
+        stream_url: Optional URL all stations point at, told apart by a
+            query parameter (default: unique fake URLs)
+    """
+    country, countrycode, language, languagecodes, _ = _weighted(rng, COUNTRIES)
+    codec = _weighted(rng, CODECS)[0]
+    tag_count = _weighted(rng, TAG_COUNTS)[0]
+    tags = rng.sample(TAGS[:rng.randint(12, len(TAGS))], tag_count)
+    name = " ".join(rng.sample(NAME_WORDS, rng.randint(1, 4)))
+    if rng.random() < 0.3:
+        name += f" {rng.randint(80, 108)}.{rng.randint(0, 9)}"
+
+    station_uuid = str(uuid.UUID(int=rng.getrandbits(128), version=4))
+    host = f"stream{index % 5000}.example-radio{index % 97}.net"
+    url = f"{stream_url}?station={index}" if stream_url else f"http://{host}:8000/{station_uuid[:8]}"
+    lastcheckok = int(rng.random() < 0.9)
+    day = f"2024-{rng.randint(1, 12):02d}-{rng.randint(1, 28):02d}"
+    time_of_day = f"{rng.randint(0, 23):02d}:{rng.randint(0, 59):02d}:{rng.randint(0, 59):02d}"
+
+    return {
+        'changeuuid': str(uuid.UUID(int=rng.getrandbits(128), version=4)),
+        'stationuuid': station_uuid,
+        'serveruuid': None,
+        'name': name,
+        'url': url,
+        'url_resolved': url,
+        'homepage': f"https://{host}/",
+        'favicon': f"https://{host}/favicon.png" if rng.random() < 0.6 else "",
+        'tags': ",".join(tags),
+        'country': country,
+        'countrycode': countrycode,
+        'iso_3166_2': None,
+        'state': rng.choice(STATES),
+        'language': language,
+        'languagecodes': languagecodes,
+        'votes': int(rng.paretovariate(1.2)) - 1,
+        'lastchangetime': f"{day} {time_of_day}",
+        'lastchangetime_iso8601': f"{day}T{time_of_day}Z",
+        'codec': codec,
+        'bitrate': rng.choice(BITRATES),
+        'hls': int(rng.random() < 0.03),
+        'lastcheckok': lastcheckok,
+        'lastchecktime': f"{day} {time_of_day}",
+        'lastchecktime_iso8601': f"{day}T{time_of_day}Z",
+        'lastcheckoktime': f"{day} {time_of_day}",
+        'lastcheckoktime_iso8601': f"{day}T{time_of_day}Z",
+        'lastlocalchecktime': f"{day} {time_of_day}",
+        'lastlocalchecktime_iso8601': f"{day}T{time_of_day}Z",
+        'clicktimestamp': f"{day} {time_of_day}",
+        'clicktimestamp_iso8601': f"{day}T{time_of_day}Z",
+        'clickcount': int(rng.paretovariate(1.1)) - 1,
+        'clicktrend': rng.randint(-5, 5),
+        'ssl_error': 0,
+        'geo_lat': round(rng.uniform(-60, 70), 6) if rng.random() < 0.4 else None,
+        'geo_long': round(rng.uniform(-180, 180), 6) if rng.random() < 0.4 else None,
+        'geo_distance': None,
+        'has_extended_info': False,
+    }
+
+
+def duplicate_station(rng, station):
+    """
+    Copy a station the way radio-browser entries get listed twice
+
+    Args:
+        rng: random.Random instance
+        station: Station to copy
+    """
+    duplicate = dict(station)
+    duplicate['changeuuid'] = str(uuid.UUID(int=rng.getrandbits(128), version=4))
+    duplicate['stationuuid'] = str(uuid.UUID(int=rng.getrandbits(128), version=4))
+    duplicate['votes'] = rng.randint(0, max(0, station['votes']))
+
+    variant = rng.randrange(3)
+    if variant == 0:
+        # Same stream, URL spelled differently
+        duplicate['url'] = duplicate['url_resolved'] = station['url'].replace("http://", "HTTP://", 1) + "/"
+    elif variant == 1:
+        # Same stream, Shoutcast style URL
+        duplicate['url'] = duplicate['url_resolved'] = station['url'] + ";"
+    else:
+        # Another mirror, same name and homepage
+        duplicate['name'] = station['name'].upper() + " "
+        duplicate['url'] = duplicate['url_resolved'] = station['url'].replace("stream", "mirror", 1)
+    return duplicate
+
+
+def generate_stations(count, seed=0, stream_url=None, duplicate_rate=DUPLICATE_RATE):
+    """
+    Generate a catalog of the given size
+
+    Args:
+        count: Number of stations
+        seed: Random seed, the same seed gives the same catalog
+        stream_url: Optional URL all stations point at
+        duplicate_rate: Share of entries that repeat an earlier station
+    """
+    rng = random.Random(seed)
+    stations = []
+    for i in range(count):
+        if stations and rng.random() < duplicate_rate:
+            stations.append(duplicate_station(rng, rng.choice(stations)))
+        else:
+            stations.append(generate_station(rng, i, stream_url))
+    return stations
+
+
+def write_catalog(path, count, seed=0, stream_url=None):
+    """Write a generated catalog to a JSON file"""
+    with open(path, 'w') as f:
+        json.dump(generate_stations(count, seed, stream_url), f)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate a synthetic radio-browser catalog")
+    parser.add_argument("count", type=int, help="Number of stations")
+    parser.add_argument("output", help="JSON file to write")
+    parser.add_argument("--seed", type=int, default=0, help="Random seed")
+    args = parser.parse_args()
+
+    write_catalog(args.output, args.count, args.seed)
+
+
+if __name__ == "__main__":
+    main()
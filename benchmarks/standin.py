@@ -0,0 +1,244 @@
+#!/usr/bin/env python3
+"""
+Stand-in radio servers for benchmarks
+
+Serves endless, real-time paced WAV streams, PLS/M3U playlists, redirect
+chains and station images from a local port so that player code can be
+measured without depending on public broadcasters.
+"""
+import math
+import struct
+import threading
+import time
+import zlib
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qs
+
+# Audio format of the generated streams
+SAMPLE_RATE = 22050
+CHANNELS = 1
+BYTES_PER_SAMPLE = 2
+BYTE_RATE = SAMPLE_RATE * CHANNELS * BYTES_PER_SAMPLE
+
+# Pacing of the generated streams
+CHUNK_SECONDS = 0.1
+BURST_SECONDS = 2.0  # Icecast style burst sent right after connecting
+
+
+def wav_header():
+    """Build a WAV header announcing an (almost) endless data chunk"""
+    data_size = 0x7FFFFFFF
+    return struct.pack(
+        '<4sI4s4sIHHIIHH4sI',
+        b'RIFF', data_size + 36, b'WAVE',
+        b'fmt ', 16, 1, CHANNELS, SAMPLE_RATE, BYTE_RATE,
+        CHANNELS * BYTES_PER_SAMPLE, BYTES_PER_SAMPLE * 8,
+        b'data', data_size
+    )
+
+
+def tone_chunk(frequency, seconds):
+    """
+    Generate one chunk of a sine tone as 16-bit PCM
+
+    Args:
+        frequency: Tone frequency in Hz
+        seconds: Length of the chunk
+    """
+    samples = int(SAMPLE_RATE * seconds)
+    return b''.join(
+        struct.pack('<h', int(8000 * math.sin(2 * math.pi * frequency * i / SAMPLE_RATE)))
+        for i in range(samples)
+    )
+
+
+def png_image(size=16, color=(200, 60, 40)):
+    """Build a solid color RGB PNG image"""
+    def chunk(kind, data):
+        return struct.pack('>I', len(data)) + kind + data + struct.pack('>I', zlib.crc32(kind + data))
+
+    row = b'\x00' + bytes(color) * size
+    return (b'\x89PNG\r\n\x1a\n' +
+            chunk(b'IHDR', struct.pack('>IIBBBBB', size, size, 8, 2, 0, 0, 0)) +
+            chunk(b'IDAT', zlib.compress(row * size)) +
+            chunk(b'IEND', b''))
+
+
+class StandinHandler(BaseHTTPRequestHandler):
+    """Request handler for the stand-in server"""
+
+    protocol_version = "HTTP/1.0"
+
+    def log_message(self, format, *args):
+        # Keep benchmark output readable
+        pass
+
+    def do_GET(self):
+        parsed = urlparse(self.path)
+        query = parse_qs(parsed.query)
+
+        # Simulate the connect cost of a remote broadcaster
+        delay = float(query.get('delay', [self.server.connect_delay])[0])
+        if delay:
+            time.sleep(delay)
+
+        if parsed.path.startswith('/tone/'):
+            self.send_tone(query)
+        elif parsed.path.startswith('/redirect/'):
+            self.send_redirect(parsed.path)
+        elif parsed.path.startswith('/playlist/'):
+            self.send_playlist(parsed.path)
+        elif parsed.path.startswith('/favicon/'):
+            self.send_favicon()
+        else:
+            self.send_error(404)
+
+    def send_redirect(self, path):
+        """
+        Redirect /redirect/<n>/<rest> to /redirect/<n-1>/<rest>, and
+        /redirect/0/<rest> to /<rest>
+        """
+        _, _, hops, rest = path.split('/', 3)
+        hops = int(hops)
+        target = f"/redirect/{hops - 1}/{rest}" if hops > 1 else f"/{rest}"
+
+        self.send_response(302)
+        self.send_header("Location", target)
+        self.end_headers()
+
+    def send_playlist(self, path):
+        """Serve /playlist/<name>.pls or .m3u pointing at /tone/<name>.wav"""
+        name, extension = path[len('/playlist/'):].rsplit('.', 1)
+        stream_url = f"http://127.0.0.1:{self.server.server_address[1]}/tone/{name}.wav"
+
+        if extension == 'pls':
+            content_type = "audio/x-scpls"
+            body = f"[playlist]\nNumberOfEntries=1\nFile1={stream_url}\nTitle1={name}\nVersion=2\n"
+        else:
+            content_type = "audio/x-mpegurl"
+            body = f"#EXTM3U\n#EXTINF:-1,{name}\n{stream_url}\n"
+
+        data = body.encode()
+        self.send_response(200)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def send_favicon(self):
+        """Serve a small PNG station image"""
+        data = png_image()
+        self.send_response(200)
+        self.send_header("Content-Type", "image/png")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def send_tone(self, query):
+        """
+        Stream an endless sine tone paced at real time
+
+        Query parameters: freq (Hz), drop (close the connection after this
+        many seconds of streaming).
+        """
+        frequency = float(query.get('freq', [440])[0])
+        drop_after = float(query.get('drop', [0])[0])
+        chunk = tone_chunk(frequency, CHUNK_SECONDS)
+
+        # Simulate a broadcaster that is down
+        if self.server.refuse_streams:
+            self.send_error(503)
+            return
+
+        self.send_response(200)
+        self.send_header("Content-Type", "audio/x-wav")
+        self.end_headers()
+
+        try:
+            self.wfile.write(wav_header())
+            for _ in range(int(BURST_SECONDS / CHUNK_SECONDS)):
+                self.wfile.write(chunk)
+
+            started = time.monotonic()
+            while not self.server.stopping:
+                if drop_after and time.monotonic() - started >= drop_after:
+                    break
+                self.wfile.write(chunk)
+                time.sleep(CHUNK_SECONDS)
+        except (BrokenPipeError, ConnectionResetError):
+            # The listener went away
+            pass
+
+
+class StandinServer:
+    """
+    Runs a stand-in radio server on a local port in a background thread
+    """
+
+    def __init__(self, connect_delay=0.0, handler_class=StandinHandler):
+        """
+        Args:
+            connect_delay: Seconds to wait before answering each request
+            handler_class: Request handler to serve with
+        """
+        self.httpd = ThreadingHTTPServer(("127.0.0.1", 0), handler_class)
+        self.httpd.daemon_threads = True
+        self.httpd.connect_delay = connect_delay
+        self.httpd.stopping = False
+        self.httpd.refuse_streams = False
+        self.thread = None
+
+    @property
+    def port(self):
+        return self.httpd.server_address[1]
+
+    def url(self, path):
+        """Return the full URL of a path on this server"""
+        return f"http://127.0.0.1:{self.port}{path}"
+
+    def set_refuse_streams(self, refuse):
+        """Answer stream requests with 503 while refuse is True"""
+        self.httpd.refuse_streams = refuse
+
+    def start(self):
+        """Start serving in a background thread"""
+        self.thread = threading.Thread(target=self.httpd.serve_forever)
+        self.thread.daemon = True
+        self.thread.start()
+        return self
+
+    def stop(self):
+        """Stop serving and close the socket"""
+        self.httpd.stopping = True
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+
+class StandinFarm:
+    """
+    Several stand-in servers, each on its own port, so that code keyed by
+    host sees many distinct broadcasters
+    """
+
+    def __init__(self, count, connect_delays=(0.0,), handler_class=StandinHandler):
+        """
+        Args:
+            count: Number of servers
+            connect_delays: Connect delays cycled over the servers
+            handler_class: Request handler to serve with
+        """
+        self.servers = [
+            StandinServer(connect_delay=connect_delays[i % len(connect_delays)], handler_class=handler_class)
+            for i in range(count)
+        ]
+
+    def start(self):
+        """Start all servers"""
+        for server in self.servers:
+            server.start()
+        return self
+
+    def stop(self):
+        """Stop all servers"""
+        for server in self.servers:
+            server.stop()
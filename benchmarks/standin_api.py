@@ -0,0 +1,197 @@
+#!/usr/bin/env python3
+"""
+Stand-in radio-browser API for benchmarks
+
+Serves a generated catalog through the radio-browser endpoints the
+application uses: station search with paging and ordering, lookups by
+UUID, tags, stats and the full station list, with an injected delay per
+request and a count of the requests and bytes served. The full station
+list honours If-None-Match and If-Modified-Since.
+"""
+import email.utils
+import hashlib
+import json
+import math
+import time
+from collections import Counter
+from urllib.parse import urlparse, parse_qs
+
+from standin import StandinHandler, StandinServer
+
+# Orders of the search endpoint, as station sort keys
+ORDERS = {
+    'name': lambda station: (station.get('name') or '').lower(),
+    'votes': lambda station: station.get('votes') or 0,
+    'bitrate': lambda station: station.get('bitrate') or 0,
+    'clickcount': lambda station: station.get('clickcount') or 0,
+    'clicktrend': lambda station: station.get('clicktrend') or 0,
+}
+
+
+def _distance_km(lat1, lon1, lat2, lon2):
+    """Great-circle distance in km"""
+    lat1, lon1, lat2, lon2 = map(math.radians, (lat1, lon1, lat2, lon2))
+    a = (math.sin((lat2 - lat1) / 2) ** 2 +
+         math.cos(lat1) * math.cos(lat2) * math.sin((lon2 - lon1) / 2) ** 2)
+    return 2 * 6371.0 * math.asin(min(1.0, math.sqrt(a)))
+
+
+class StandinApiHandler(StandinHandler):
+    """Request handler answering radio-browser API requests"""
+
+    def do_GET(self):
+        server = self.server
+        server.requests[urlparse(self.path).path] += 1
+        if server.connect_delay:
+            time.sleep(server.connect_delay)
+
+        parsed = urlparse(self.path)
+        query = {key: values[0] for key, values in parse_qs(parsed.query).items()}
+
+        if parsed.path == '/json/stats':
+            self.send_json({'stations': len(server.stations)})
+        elif parsed.path == '/json/tags':
+            limit = int(query.get('limit', len(server.tag_counts)))
+            self.send_json([{'name': tag, 'stationcount': count}
+                            for tag, count in server.tag_counts.most_common(limit)])
+        elif parsed.path == '/json/stations/search':
+            self.send_json(self.search(query))
+        elif parsed.path == '/json/stations/byuuid':
+            uuids = set(query.get('uuids', '').split(','))
+            self.send_json([s for s in server.stations if s['stationuuid'] in uuids])
+        elif parsed.path.startswith('/json/stations/'):
+            self.send_catalog()
+        else:
+            self.send_error(404)
+
+    def search(self, query):
+        """Evaluate a /json/stations/search request"""
+        stations = self.server.stations
+        if 'order' in query:
+            stations = sorted(stations, key=ORDERS[query['order']],
+                              reverse=query.get('reverse') == 'true')
+
+        name = query.get('name', '').lower()
+        tags = [tag for tag in query.get('tagList', '').split(',') if tag]
+        if 'tag' in query:
+            tags.append(query['tag'])
+
+        def matches(station):
+            station_tags = station['tags'].split(',') if station['tags'] else []
+            if name and name not in station['name'].lower():
+                return False
+            if any(tag not in station_tags for tag in tags):
+                return False
+            for field in ('country', 'countrycode', 'language', 'codec'):
+                if field in query and query[field].lower() not in (station.get(field) or '').lower():
+                    return False
+            if 'bitrateMin' in query and station['bitrate'] < int(query['bitrateMin']):
+                return False
+            if 'bitrateMax' in query and station['bitrate'] > int(query['bitrateMax']):
+                return False
+            if query.get('hidebroken') == 'true' and not station['lastcheckok']:
+                return False
+            if 'geo_lat' in query:
+                if station['geo_lat'] is None or station['geo_long'] is None:
+                    return False
+                distance = _distance_km(float(query['geo_lat']), float(query['geo_long']),
+                                        station['geo_lat'], station['geo_long'])
+                if distance * 1000 > float(query.get('geo_distance', 0)):
+                    return False
+            return True
+
+        offset = int(query.get('offset', 0))
+        limit = int(query.get('limit', 100000))
+        result = []
+        skipped = 0
+        for station in stations:
+            if matches(station):
+                if skipped < offset:
+                    skipped += 1
+                    continue
+                result.append(station)
+                if len(result) >= limit:
+                    break
+        return result
+
+    def send_catalog(self):
+        """Send the full station list, or 304 if the client's copy is current"""
+        server = self.server
+        if server.catalog_body is None:
+            server.catalog_body = json.dumps(server.stations).encode()
+            server.etag = '"' + hashlib.sha1(server.catalog_body).hexdigest() + '"'
+
+        headers = {}
+        if server.send_validators:
+            headers = {'ETag': server.etag,
+                       'Last-Modified': email.utils.formatdate(server.modified, usegmt=True)}
+            if self.headers.get('If-None-Match') == server.etag:
+                self.send_not_modified(headers)
+                return
+            since = self.headers.get('If-Modified-Since')
+            if since and 'If-None-Match' not in self.headers:
+                try:
+                    if email.utils.parsedate_to_datetime(since).timestamp() >= int(server.modified):
+                        self.send_not_modified(headers)
+                        return
+                except (TypeError, ValueError):
+                    pass
+
+        self.send_json(None, data=server.catalog_body, headers=headers)
+
+    def send_not_modified(self, headers):
+        """Send a 304 Not Modified response"""
+        self.send_response(304)
+        for name, value in headers.items():
+            self.send_header(name, value)
+        self.end_headers()
+
+    def send_json(self, body, data=None, headers=None):
+        """Send a JSON response"""
+        if data is None:
+            data = json.dumps(body).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(data)
+        self.server.bytes_sent += len(data)
+
+
+class StandinApi(StandinServer):
+    """
+    Runs a stand-in radio-browser API on a local port in a background thread
+    """
+
+    def __init__(self, stations, delay=0.0, send_validators=True):
+        """
+        Args:
+            stations: Station dictionaries to serve
+            delay: Seconds to wait before answering each request
+            send_validators: Send ETag and Last-Modified with the station list
+        """
+        super().__init__(connect_delay=delay, handler_class=StandinApiHandler)
+        self.httpd.requests = Counter()
+        self.httpd.bytes_sent = 0
+        self.httpd.send_validators = send_validators
+        self.set_stations(stations)
+
+    def set_stations(self, stations):
+        """Replace the served catalog, as a mirror's nightly update would"""
+        self.httpd.stations = stations
+        self.httpd.catalog_body = None
+        self.httpd.modified = time.time()
+        self.httpd.tag_counts = Counter(
+            tag for station in stations for tag in (station['tags'].split(',') if station['tags'] else []))
+
+    @property
+    def requests(self):
+        """Number of requests served per path"""
+        return self.httpd.requests
+
+    @property
+    def bytes_sent(self):
+        """Response body bytes served"""
+        return self.httpd.bytes_sent
@@ -2,12 +2,19 @@
 """
 Framenux Radio - Internet Radio Player
 Main entry point
-"""
 
-# Use absolute import instead of relative import
-from src.ui.app import RadioApp
+Run with --daemon to start the headless player instead of the GTK application.
+"""
+import sys
 
 def main():
+    if len(sys.argv) > 1 and sys.argv[1] == "--daemon":
+        # The headless daemon must not load GTK
+        from src.daemon import main as daemon_main
+        return daemon_main(sys.argv[2:])
+    
+    # Use absolute import instead of relative import
+    from src.ui.app import RadioApp
     app = RadioApp()
     return app.run()
 
@@ -13,6 +13,7 @@ setup(
     entry_points={
         "console_scripts": [
             "framenux-radio=src.ui.app:main",
+            "framenux-radiod=src.daemon:main",
         ],
     },
     install_requires=[
@@ -20,6 +21,10 @@ setup(
         # "requests>=2.25.0",
         # "pygame>=2.0.0",
     ],
+    extras_require={
+        # Vectorized field queries on large catalogs
+        "fast": ["numpy"],
+    },
     classifiers=[
         "Development Status :: 4 - Beta",
         "Environment :: X11 Applications",
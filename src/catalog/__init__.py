@@ -0,0 +1,4 @@
+# catalog package initialization
+"""
+Station catalog data for Framenux Radio, independent of the user interface
+"""
\ No newline at end of file
@@ -0,0 +1,152 @@
+#!/usr/bin/env python3
+import re
+
+# Station field holding the stream URLs of collapsed duplicates
+ALTERNATES_FIELD = 'alternate_urls'
+
+# Ports implied by the URL scheme
+DEFAULT_PORTS = {'http': 80, 'https': 443}
+
+# Runs of characters that tell station names apart
+NAME_WORDS = re.compile(r'[^\W_]+')
+
+
+def collapse_duplicates(stations):
+    """
+    Collapse stations that are the same broadcast listed several times
+    
+    Stations are duplicates if their normalized stream URLs match, or if
+    both their normalized names and homepages match. Duplicates of
+    duplicates end up in one group. Each group keeps its most voted
+    station, which lists the other stream URLs of the group for failover.
+    Runs in linear time.
+    
+    Args:
+        stations: List of station dictionaries
+    
+    Returns:
+        tuple: (list of kept stations in catalog order,
+                dict of collapsed stationuuid -> kept station)
+    """
+    parents = list(range(len(stations)))
+    
+    def find(i):
+        # Path halving keeps the trees flat
+        while parents[i] != i:
+            parents[i] = parents[parents[i]]
+            i = parents[i]
+        return i
+    
+    # Link every station to the first one seen with the same key
+    first_seen = {}
+    linked = []
+    for i, station in enumerate(stations):
+        for key in duplicate_keys(station):
+            j = first_seen.setdefault(key, i)
+            if j != i:
+                linked.append(i)
+                linked.append(j)
+                root_i, root_j = find(i), find(j)
+                if root_i != root_j:
+                    parents[max(root_i, root_j)] = min(root_i, root_j)
+    
+    if not linked:
+        return stations, {}
+    
+    # Only stations with duplicates get a group, keyed by its root, which is
+    # also its first member
+    groups = {}
+    for i in sorted(set(linked)):
+        groups.setdefault(find(i), []).append(i)
+    
+    # Roots are the first member of their group, so the order is kept
+    kept = []
+    collapsed = {}
+    for i, station in enumerate(stations):
+        members = groups.get(i)
+        if members is None:
+            if parents[i] == i:
+                kept.append(station)
+            continue
+        
+        # The catalog comes sorted by votes, earlier entries win ties
+        best = max(members, key=lambda member: (_votes(stations[member]), -member))
+        representative = dict(stations[best])
+        seen_urls = {normalize_url(stream_url(representative))}
+        alternates = []
+        for member in members:
+            url = stream_url(stations[member])
+            if url and normalize_url(url) not in seen_urls:
+                seen_urls.add(normalize_url(url))
+                alternates.append(url)
+            if member != best:
+                collapsed[stations[member].get('stationuuid')] = representative
+        representative[ALTERNATES_FIELD] = alternates
+        kept.append(representative)
+    
+    return kept, collapsed
+
+
+def duplicate_keys(station):
+    """Get the keys under which a station may have duplicates"""
+    keys = []
+    url = normalize_url(stream_url(station))
+    if url:
+        keys.append(url)
+    
+    # A NUL never occurs in a URL, so the two kinds of keys cannot collide
+    name = normalize_name(station.get('name'))
+    homepage = normalize_url(station.get('homepage'))
+    if name and homepage:
+        keys.append(f"{name}\0{homepage}")
+    return keys
+
+
+def stream_url(station):
+    """Get the most direct stream URL of a station"""
+    return station.get('url_resolved') or station.get('url') or ''
+
+
+def normalize_url(url):
+    """
+    Reduce a URL to what identifies the resource
+    
+    Drops the scheme, user info, default ports, a leading www., letter
+    case of the host, fragments and the trailing '/' or ';' that Shoutcast
+    URLs carry. Plain string operations, urlsplit is several times slower
+    and this runs for every station at load time.
+    """
+    if not url:
+        return ''
+    scheme, separator, rest = url.strip().partition('://')
+    if not separator:
+        scheme, rest = '', scheme
+    host, _, path = rest.partition('#')[0].partition('/')
+    
+    if '@' in host:
+        host = host.rpartition('@')[2]
+    host = host.lower()
+    if host.startswith('www.'):
+        host = host[4:]
+    port = DEFAULT_PORTS.get(scheme.lower())
+    if port and host.endswith(f":{port}"):
+        host = host[:-len(str(port)) - 1]
+    
+    path, _, query = path.partition('?')
+    path = path.rstrip('/; ')
+    return f"{host}/{path}?{query}" if query else f"{host}/{path}"
+
+
+def normalize_name(name):
+    """Reduce a station name to its letters and digits, case-folded"""
+    if not name:
+        return ''
+    return ' '.join(NAME_WORDS.findall(name.casefold()))
+
+
+def _votes(station):
+    """Votes of a station as a number"""
+    try:
+        return int(station.get('votes') or 0)
+    except (TypeError, ValueError):
+        return 0
\ No newline at end of file
@@ -0,0 +1,198 @@
+#!/usr/bin/env python3
+import math
+import heapq
+from array import array
+
+# Mean earth radius in km
+EARTH_RADIUS_KM = 6371.0
+
+# Length of one degree of latitude in km
+KM_PER_DEGREE = math.pi * EARTH_RADIUS_KM / 180
+
+
+class GeoIndex:
+    """
+    Grid index over the station coordinates for nearest-N and radius queries
+    
+    The globe is divided into cells of a fixed number of degrees; each cell
+    holds the positions of its stations. Queries only look at the cells
+    that can contain a close enough station.
+    """
+    
+    def __init__(self, stations, cell_degrees=1.0):
+        """
+        Build the index
+        
+        Args:
+            stations: List of station dictionaries with geo_lat/geo_long
+            cell_degrees: Size of a grid cell in degrees, snapped to the
+                closest size that divides the 360 degrees of longitude
+        """
+        # A narrower last column would make longitudes wrap into the wrong column
+        self.columns = max(1, round(360 / cell_degrees))
+        self.cell_degrees = 360 / self.columns
+        if not math.isclose(self.cell_degrees, cell_degrees):
+            print(f"Geo cells of {cell_degrees} degrees do not divide 360, using {self.cell_degrees:.4g}")
+        self.cells = {}
+        self.latitudes = array('d')
+        self.longitudes = array('d')
+        self.positions = array('I')
+        
+        for position, station in enumerate(stations):
+            coordinates = station_coordinates(station)
+            if coordinates is None:
+                continue
+            lat, lon = coordinates
+            
+            entry = len(self.positions)
+            self.latitudes.append(lat)
+            self.longitudes.append(lon)
+            self.positions.append(position)
+            
+            cell = self.cell_of(lat, lon)
+            entries = self.cells.get(cell)
+            if entries is None:
+                entries = self.cells[cell] = array('I')
+            entries.append(entry)
+    
+    def __len__(self):
+        return len(self.positions)
+    
+    def cell_of(self, lat, lon):
+        """Get the grid cell of a coordinate"""
+        return (int(math.floor(lat / self.cell_degrees)),
+                int(math.floor(lon / self.cell_degrees)) % self.columns)
+    
+    def nearest(self, lat, lon, count, max_distance_km=None):
+        """
+        Find the stations closest to a location
+        
+        Args:
+            lat: Latitude in degrees
+            lon: Longitude in degrees
+            count: Maximum number of stations
+            max_distance_km: Optional distance limit
+        
+        Returns:
+            list: (distance in km, station position) tuples, closest first
+        """
+        if not self.positions or count <= 0:
+            return []
+        
+        # Visit cells closest first by the lower bound of their distance,
+        # spreading out to neighbouring cells
+        center = self.cell_of(lat, lon)
+        first_row, last_row = self.cell_of(-90.0, 0)[0], self.cell_of(90.0, 0)[0]
+        cells = [(0.0, center)]
+        seen = {center}
+        
+        # Max-heap of the best candidates so far, as (-distance, position)
+        best = []
+        while cells:
+            bound, (row, column) = heapq.heappop(cells)
+            if max_distance_km is not None and bound > max_distance_km:
+                break
+            if len(best) == count and bound > -best[0][0]:
+                break
+            
+            for entry in self.cells.get((row, column), ()):
+                distance = haversine_km(lat, lon, self.latitudes[entry], self.longitudes[entry])
+                if max_distance_km is not None and distance > max_distance_km:
+                    continue
+                item = (-distance, self.positions[entry])
+                if len(best) < count:
+                    heapq.heappush(best, item)
+                elif item > best[0]:
+                    heapq.heapreplace(best, item)
+            
+            for neighbour in ((row - 1, column), (row + 1, column),
+                              (row, (column - 1) % self.columns), (row, (column + 1) % self.columns)):
+                if neighbour not in seen and first_row <= neighbour[0] <= last_row:
+                    seen.add(neighbour)
+                    heapq.heappush(cells, (self._cell_distance_bound(lat, lon, *neighbour), neighbour))
+        
+        return sorted((-distance, position) for distance, position in best)
+    
+    def within(self, lat, lon, radius_km):
+        """
+        Find all stations within a radius of a location
+        
+        Args:
+            lat: Latitude in degrees
+            lon: Longitude in degrees
+            radius_km: Search radius in km
+        
+        Returns:
+            list: (distance in km, station position) tuples, closest first
+        """
+        radius_degrees = radius_km / KM_PER_DEGREE
+        first_row, _ = self.cell_of(max(-90.0, lat - radius_degrees), lon)
+        last_row, _ = self.cell_of(min(90.0, lat + radius_degrees), lon)
+        
+        # Longitude degrees shrink towards the poles: by the haversine formula
+        # sin(dlon / 2) <= sin(r / 2R) / (cos(lat1) * cos(lat2))
+        widest = min(90.0, abs(lat) + radius_degrees)
+        denominator = math.cos(math.radians(abs(lat))) * math.cos(math.radians(widest))
+        ratio = math.sin(radius_km / (2 * EARTH_RADIUS_KM)) / denominator if denominator > 0 else 2.0
+        if ratio >= 1:
+            columns = range(self.columns)
+        else:
+            lon_degrees = math.degrees(2 * math.asin(ratio))
+            first_column = int(math.floor((lon - lon_degrees) / self.cell_degrees))
+            last_column = int(math.floor((lon + lon_degrees) / self.cell_degrees))
+            columns = {column % self.columns for column in range(first_column, last_column + 1)}
+        
+        results = []
+        for row in range(first_row, last_row + 1):
+            for column in columns:
+                for entry in self.cells.get((row, column), ()):
+                    distance = haversine_km(lat, lon, self.latitudes[entry], self.longitudes[entry])
+                    if distance <= radius_km:
+                        results.append((distance, self.positions[entry]))
+        
+        results.sort()
+        return results
+    
+    def _cell_distance_bound(self, lat, lon, row, column):
+        """Lower bound of the distance from a location to any point of a cell"""
+        size = self.cell_degrees
+        low, high = max(-90.0, row * size), min(90.0, (row + 1) * size)
+        lat_gap = max(0.0, low - lat, lat - high)
+        
+        # Longitude gap to the cell, around the globe either way
+        west = column * size
+        offset = (lon - west) % 360
+        lon_gap = 0.0 if offset <= size else min(360 - offset, offset - size)
+        
+        # hav(d) = hav(dlat) + cos(lat1) * cos(lat2) * hav(dlon)
+        cos_row = max(0.0, min(math.cos(math.radians(low)), math.cos(math.radians(high))))
+        hav = (math.sin(math.radians(lat_gap) / 2) ** 2 +
+               math.cos(math.radians(lat)) * cos_row * math.sin(math.radians(min(180.0, lon_gap)) / 2) ** 2)
+        return 2 * EARTH_RADIUS_KM * math.asin(min(1.0, math.sqrt(hav)))
+
+
+def station_coordinates(station):
+    """
+    Get the coordinates of a station
+    
+    Returns:
+        tuple: (latitude, longitude), or None if the station has none
+    """
+    try:
+        lat = float(station.get('geo_lat'))
+        lon = float(station.get('geo_long'))
+    except (TypeError, ValueError):
+        return None
+    
+    # 0, 0 is what many entries use for "unknown"
+    if (lat == 0 and lon == 0) or not -90 <= lat <= 90 or not -180 <= lon <= 180:
+        return None
+    return lat, lon
+
+
+def haversine_km(lat1, lon1, lat2, lon2):
+    """Great-circle distance between two coordinates in km"""
+    lat1, lon1, lat2, lon2 = map(math.radians, (lat1, lon1, lat2, lon2))
+    a = (math.sin((lat2 - lat1) / 2) ** 2 +
+         math.cos(lat1) * math.cos(lat2) * math.sin((lon2 - lon1) / 2) ** 2)
+    return 2 * EARTH_RADIUS_KM * math.asin(min(1.0, math.sqrt(a)))
\ No newline at end of file
@@ -0,0 +1,307 @@
+#!/usr/bin/env python3
+import shlex
+from array import array
+from collections.abc import Sequence
+
+try:
+    import numpy
+except ImportError:
+    # NumPy is optional, queries then run as plain Python loops
+    numpy = None
+
+# Station fields with few distinct values, stored as integer codes
+CATEGORICAL_COLUMNS = ('country', 'countrycode', 'language', 'codec')
+
+# Station fields compared by range
+NUMERIC_COLUMNS = ('bitrate', 'votes', 'clickcount', 'clicktrend')
+
+# Sort orders offered for the station list, as station sort keys
+SORT_KEYS = {
+    'name': lambda station: (station.get('name') or '').strip().casefold(),
+    'bitrate': lambda station: -_to_int(station.get('bitrate')),
+    'votes': lambda station: -_to_int(station.get('votes')),
+    'clickcount': lambda station: -_to_int(station.get('clickcount')),
+    'clicktrend': lambda station: -_to_int(station.get('clicktrend')),
+}
+
+
+class StationColumns:
+    """
+    Columnar copy of the station fields that queries filter on
+    
+    Categorical fields are stored as integer codes into a list of distinct
+    values, numeric fields as integers. With NumPy the columns are arrays
+    that whole-catalog boolean masks are computed over.
+    """
+    
+    def __init__(self, stations):
+        """
+        Build the columns
+        
+        Args:
+            stations: List of station dictionaries
+        """
+        self.size = len(stations)
+        self.categories = {}
+        self.codes = {}
+        self.numbers = {}
+        
+        for column in CATEGORICAL_COLUMNS:
+            lookup = {}
+            codes = array('i')
+            for station in stations:
+                value = station.get(column) or ''
+                code = lookup.get(value)
+                if code is None:
+                    code = lookup[value] = len(lookup)
+                codes.append(code)
+            self.categories[column] = list(lookup)
+            self.codes[column] = numpy.frombuffer(codes, dtype=numpy.intc) if numpy else codes
+        
+        for column in NUMERIC_COLUMNS:
+            values = array('q', (_to_int(station.get(column)) for station in stations))
+            self.numbers[column] = numpy.frombuffer(values, dtype=numpy.int64) if numpy else values
+    
+    def matching_codes(self, column, values):
+        """
+        Get the codes of the categories matching any of the values
+        
+        A category matches if it equals a value or, for comma-separated
+        fields such as language, if one of its parts does.
+        
+        Args:
+            column: Categorical column name
+            values: Lowercase values to match
+        
+        Returns:
+            list: Matching codes
+        """
+        return [
+            code for code, category in enumerate(self.categories[column])
+            if category.lower() in values or
+               any(part.strip() in values for part in category.lower().split(','))
+        ]
+
+
+class StationQuery:
+    """
+    Combination of facets (field is one of some values) and numeric ranges,
+    all of which a station has to satisfy
+    """
+    
+    def __init__(self):
+        self.facets = {}
+        self.ranges = {}
+    
+    def add_facet(self, column, values):
+        """
+        Require a categorical field to have one of the values
+        
+        Args:
+            column: One of CATEGORICAL_COLUMNS
+            values: Accepted values, case-insensitive
+        """
+        self.facets.setdefault(column, set()).update(value.lower() for value in values)
+    
+    def add_range(self, column, low=None, high=None):
+        """
+        Require a numeric field to be within a range
+        
+        Args:
+            column: One of NUMERIC_COLUMNS
+            low: Optional inclusive lower bound
+            high: Optional inclusive upper bound
+        """
+        self.ranges[column] = (low, high)
+    
+    def __bool__(self):
+        return bool(self.facets or self.ranges)
+    
+    def positions(self, columns):
+        """
+        Evaluate the query
+        
+        Args:
+            columns: StationColumns of the catalog
+        
+        Returns:
+            Sorted positions of the matching stations, a NumPy array if NumPy
+            is available and a list otherwise
+        """
+        if numpy is not None:
+            mask = numpy.ones(columns.size, dtype=bool)
+            for column, values in self.facets.items():
+                # A lookup table per category is cheaper than numpy.isin
+                accepted = numpy.zeros(len(columns.categories[column]), dtype=bool)
+                accepted[columns.matching_codes(column, values)] = True
+                mask &= accepted.take(columns.codes[column])
+            for column, (low, high) in self.ranges.items():
+                if low is not None:
+                    mask &= columns.numbers[column] >= low
+                if high is not None:
+                    mask &= columns.numbers[column] <= high
+            return numpy.flatnonzero(mask)
+        
+        positions = range(columns.size)
+        for column, values in self.facets.items():
+            codes = set(columns.matching_codes(column, values))
+            column_codes = columns.codes[column]
+            positions = [i for i in positions if column_codes[i] in codes]
+        for column, (low, high) in self.ranges.items():
+            numbers = columns.numbers[column]
+            positions = [
+                i for i in positions
+                if (low is None or numbers[i] >= low) and (high is None or numbers[i] <= high)
+            ]
+        return list(positions)
+
+
+class StationSelection(Sequence):
+    """
+    Read-only list of the stations at some positions of the catalog
+    
+    Lets the station list page through query results without building a
+    list of every matching station first.
+    """
+    
+    def __init__(self, stations, positions):
+        """
+        Args:
+            stations: All stations of the catalog
+            positions: Positions of the selected stations
+        """
+        self.stations = stations
+        self.positions = positions
+    
+    def __len__(self):
+        return len(self.positions)
+    
+    def __getitem__(self, index):
+        stations = self.stations
+        if isinstance(index, slice):
+            return [stations[i] for i in _to_list(self.positions[index])]
+        return stations[self.positions[index]]
+    
+    def __iter__(self):
+        stations = self.stations
+        for i in _to_list(self.positions):
+            yield stations[i]
+
+
+def sort_permutation(stations, columns, key):
+    """
+    Compute the positions of all stations in a sort order
+    
+    Numeric orders are descending, name ascending; ties keep catalog order.
+    
+    Args:
+        stations: All stations of the catalog
+        columns: StationColumns of the catalog
+        key: One of SORT_KEYS
+    
+    Returns:
+        Permutation of positions, a NumPy array if NumPy is available and
+        an array('I') otherwise
+    """
+    if numpy is not None and key in columns.numbers:
+        return numpy.argsort(-columns.numbers[key], kind='stable')
+    
+    sort_key = SORT_KEYS[key]
+    order = sorted(range(len(stations)), key=lambda i: sort_key(stations[i]))
+    return numpy.array(order, dtype=numpy.intp) if numpy is not None else array('I', order)
+
+
+def parse_search(search_text):
+    """
+    Split a search into free text, tags and field terms
+    
+    Words starting with '#' are tags. Words like country:greece,
+    codec:mp3,aac or bitrate:>=128 (also >, <, <= and 128-320) are field
+    terms; quote values that contain spaces.
+    
+    Args:
+        search_text: Lowercase search text
+    
+    Returns:
+        tuple: (free text, list of tags, StationQuery)
+    """
+    try:
+        # Only double quotes group words, apostrophes are common in names
+        words = shlex.split(search_text.replace("'", "\\'")) if '"' in search_text else search_text.split()
+    except ValueError:
+        # An unbalanced quote while the user is still typing
+        words = search_text.split()
+    
+    text, tags, query = [], [], StationQuery()
+    for word in words:
+        field, separator, value = word.partition(':')
+        if word.startswith('#'):
+            if word[1:]:
+                tags.append(word[1:])
+        elif not separator or field not in CATEGORICAL_COLUMNS + NUMERIC_COLUMNS:
+            text.append(word)
+        elif field in CATEGORICAL_COLUMNS:
+            values = [v for v in value.split(',') if v]
+            if values:
+                query.add_facet(field, values)
+        else:
+            bounds = parse_range(value)
+            if bounds is not None:
+                query.add_range(field, *bounds)
+    
+    return ' '.join(text), tags, query
+
+
+def parse_range(value):
+    """
+    Parse a numeric range term
+    
+    Returns:
+        tuple: (low, high) with None for an open end, or None if invalid
+    """
+    try:
+        if value.startswith('>='):
+            return int(value[2:]), None
+        if value.startswith('<='):
+            return None, int(value[2:])
+        if value.startswith('>'):
+            return int(value[1:]) + 1, None
+        if value.startswith('<'):
+            return None, int(value[1:]) - 1
+        if '-' in value[1:]:
+            low, high = value.split('-', 1)
+            return int(low), int(high)
+        return int(value), int(value)
+    except ValueError:
+        return None
+
+
+def intersect_positions(positions, posting):
+    """
+    Intersect query positions with a sorted tag posting list
+    
+    Args:
+        positions: Sorted positions from StationQuery.positions
+        posting: Sorted array('I') of positions
+    
+    Returns:
+        Sorted positions present in both
+    """
+    if numpy is not None:
+        return numpy.intersect1d(positions, numpy.frombuffer(posting, dtype=numpy.uint32), assume_unique=True)
+    
+    posting_set = set(posting)
+    return [i for i in positions if i in posting_set]
+
+
+def _to_int(value):
+    """Convert a numeric station field, which may be missing or a string"""
+    try:
+        return int(value or 0)
+    except (TypeError, ValueError):
+        return 0
+
+
+def _to_list(positions):
+    """Turn positions into a list of Python ints for fast indexing"""
+    return positions.tolist() if hasattr(positions, 'tolist') else positions
\ No newline at end of file
@@ -0,0 +1,489 @@
+#!/usr/bin/env python3
+import json
+import time
+import uuid
+import threading
+import urllib.request
+from collections.abc import Sequence
+from urllib.parse import urlencode
+
+from src.utils import config, metrics
+from src.utils.executor import get_executor, PRIORITY_SEARCH
+from src.utils.http_cache import ResponseCache
+from src.utils.mirrors import MirrorSelector, MIRROR_ERRORS
+from src.catalog.query import SORT_KEYS, parse_search
+from src.catalog.stations import TAG_FILTER_PREFIX
+
+# API endpoints
+SEARCH_PATH = "/json/stations/search"
+BY_UUID_PATH = "/json/stations/byuuid"
+TAGS_PATH = "/json/tags"
+STATS_PATH = "/json/stats"
+
+# Order of the full listing, the same as the downloaded catalog
+DEFAULT_ORDER = {'order': 'votes', 'reverse': 'true'}
+
+# Field terms of the search box that the API can filter on
+FACET_PARAMETERS = {'country': 'country', 'countrycode': 'countrycode', 'language': 'language', 'codec': 'codec'}
+RANGE_PARAMETERS = {'bitrate': ('bitrateMin', 'bitrateMax')}
+
+
+class RemoteCatalog:
+    """
+    Station source that sends searches and filters to the radio-browser API
+    instead of holding the catalog
+    
+    Offers the methods of StationCatalog that the station list uses, so
+    either can back it. Results are fetched one page of PAGE_SIZE stations
+    at a time, cached on disk, and the page the user is likely to need
+    next is fetched in the background.
+    
+    Loading and reading pages wait on the network, so the station list
+    does both on the executor rather than on the main loop.
+    """
+    
+    # Tells the station list to load and fetch pages in the background
+    is_remote = True
+    
+    def __init__(self, mirrors=None, cache=None, page_size=None, timeout=None, executor=None):
+        """
+        Initialize the catalog
+        
+        Args:
+            mirrors: Optional MirrorSelector choosing the API server
+            cache: Optional ResponseCache for the API responses
+            page_size: Stations per request
+            timeout: Network timeout per request in seconds
+            executor: Optional TaskExecutor running the prefetches
+        """
+        self.mirrors = mirrors or MirrorSelector()
+        self.cache = cache or ResponseCache()
+        self.page_size = page_size or config.PAGE_SIZE
+        self.timeout = timeout if timeout is not None else config.REMOTE_TIMEOUT
+        
+        self.stations = RemoteSelection(self, DEFAULT_ORDER)
+        self.station_count = 0
+        self.tags = []
+        
+        # Background prefetching: request key -> Event set once it is cached
+        self.executor = executor or get_executor()
+        self.pending = {}
+        self.lock = threading.Lock()
+    
+    def load(self, stations_file=None):
+        """
+        Fetch what the station list needs up front: the catalog size, the
+        tag vocabulary and the first page of the full listing
+        
+        Args:
+            stations_file: Ignored, there is no local catalog
+        """
+        started = time.perf_counter()
+        stats = self.request(STATS_PATH)
+        self.station_count = int(stats.get('stations', 0)) if isinstance(stats, dict) else 0
+        self.tags = self.request(TAGS_PATH, {
+            'order': 'stationcount', 'reverse': 'true', 'hidebroken': 'true',
+            'limit': config.REMOTE_TAG_LIMIT,
+        })
+        self.stations = RemoteSelection(self, DEFAULT_ORDER)
+        self.prefetch(self.page_key(self.stations.params, 0))
+        metrics.CATALOG_LOAD_DURATION.observe(time.perf_counter() - started)
+        metrics.CATALOG_STATIONS.set(self.station_count)
+    
+    def request(self, path, params=None):
+        """
+        Get an API response, from the cache if it is fresh
+        
+        If every mirror fails, an expired cached response is returned
+        rather than nothing.
+        
+        Args:
+            path: API path
+            params: Optional query parameters
+        
+        Returns:
+            The parsed JSON response
+        
+        Raises:
+            OSError: If the API could not be reached and nothing is cached
+        """
+        key = self.request_key(path, params)
+        body = self.cache.get(key)
+        if body is not None:
+            return body
+        
+        # A prefetch of the same request is on its way
+        with self.lock:
+            event = self.pending.get(key)
+        if event is not None and event.wait(self.timeout):
+            body = self.cache.get(key)
+            if body is not None:
+                return body
+        
+        try:
+            return self._fetch(key)
+        except OSError:
+            body = self.cache.get(key, stale_ok=True)
+            if body is None:
+                raise
+            return body
+    
+    def _fetch(self, key):
+        """Fetch a request from the API, failing over between mirrors"""
+        tried = []
+        last_error = None
+        while True:
+            mirror = self.mirrors.choose(exclude=tried)
+            if mirror is None:
+                break
+            tried.append(mirror)
+            
+            request = urllib.request.Request(mirror + key, headers={'User-Agent': config.USER_AGENT})
+            try:
+                with urllib.request.urlopen(request, timeout=self.timeout) as response:
+                    body = json.load(response)
+            except MIRROR_ERRORS as e:
+                self.mirrors.forget(mirror)
+                last_error = e
+                continue
+            
+            if self.mirrors.current() != mirror:
+                self.mirrors.remember(mirror)
+            self.cache.put(key, body)
+            return body
+        
+        raise OSError("The station API could not be reached" + (f": {last_error}" if last_error else ""))
+    
+    @staticmethod
+    def request_key(path, params=None):
+        """Path and query of a request, with the parameters in a fixed order"""
+        return f"{path}?{urlencode(sorted(params.items()))}" if params else path
+    
+    def page_key(self, params, index):
+        """Request key of one page of a search"""
+        return self.request_key(SEARCH_PATH, dict(params, offset=index * self.page_size, limit=self.page_size))
+    
+    def page(self, params, index):
+        """
+        Get one page of a search
+        
+        Args:
+            params: Search parameters of the API
+            index: Page number, from 0
+        
+        Returns:
+            list: Up to page_size station dictionaries
+        """
+        return self.request(SEARCH_PATH, dict(params, offset=index * self.page_size, limit=self.page_size))
+    
+    def prefetch(self, key):
+        """
+        Fetch a request in the background unless it is cached or queued
+        
+        Args:
+            key: Request key from request_key or page_key
+        """
+        with self.lock:
+            if key in self.pending:
+                return
+            self.pending[key] = threading.Event()
+        
+        # Prefetches are what the user is about to see, the most urgent class
+        self.executor.submit(PRIORITY_SEARCH, self._prefetch, key)
+    
+    def _prefetch(self, key):
+        """Fetch a prefetched request on a worker thread"""
+        try:
+            if self.cache.get(key) is None:
+                self._fetch(key)
+        except OSError:
+            # Only a guess, the request itself reports failures if it comes
+            pass
+        finally:
+            with self.lock:
+                event = self.pending.pop(key, None)
+            if event:
+                event.set()
+    
+    def predict(self, search_text):
+        """
+        Guess the search the user is typing towards: the most used tag that
+        the last word is the start of
+        
+        Returns:
+            str: The completed search text, or None
+        """
+        head, _, word = search_text.rpartition(' ')
+        if len(word) < 2 or word.startswith('#') or ':' in word:
+            return None
+        
+        # The tags are ordered by station count
+        for tag in self.tags:
+            name = tag.get('name', '')
+            if name.startswith(word) and name != word:
+                return f"{head} {name}".strip()
+        return None
+    
+    def search(self, search_text):
+        """
+        Search for stations matching the given text
+        
+        Free text matches the station name. Words starting with '#' select
+        stations that have all of these tags; of the field terms the API
+        supports country, countrycode, language and codec with a single
+        value and bitrate ranges.
+        
+        Args:
+            search_text: Text to search for
+        
+        Returns:
+            Sequence: Matching stations, fetched page by page
+        """
+        if not search_text:
+            return self.stations
+        
+        search_text = search_text.lower()
+        selection = RemoteSelection(self, self._search_params(search_text))
+        
+        # The first page of the completed word is likely to be asked for next
+        predicted = self.predict(search_text)
+        if predicted is not None:
+            self.prefetch(self.page_key(self._search_params(predicted), 0))
+        return selection
+    
+    def _search_params(self, search_text):
+        """Translate a search into API parameters"""
+        text, tags, query = parse_search(search_text)
+        params = dict(DEFAULT_ORDER)
+        if text:
+            params['name'] = text
+        if tags:
+            params['tagList'] = ','.join(tags)
+        for column, values in query.facets.items():
+            # The API matches one value per field
+            params[FACET_PARAMETERS[column]] = sorted(values)[0]
+        for column, (low, high) in query.ranges.items():
+            if column in RANGE_PARAMETERS:
+                low_parameter, high_parameter = RANGE_PARAMETERS[column]
+                if low is not None:
+                    params[low_parameter] = low
+                if high is not None:
+                    params[high_parameter] = high
+        return params
+    
+    def filter(self, filter_type, favorites=(), health=None, location=None):
+        """
+        Filter stations by the specified type
+        
+        Args:
+            filter_type: Type of filter to apply (e.g., 'All', 'Favorites', etc.)
+            favorites: Favorite stations, for the 'Favorites' filter
+            health: Unused, the API's own checks back 'Reachable Only'
+            location: Optional (latitude, longitude), for the 'Nearby' filter
+        
+        Returns:
+            Sequence: Matching stations, or None if the filter is not supported
+        """
+        if filter_type == "All Stations":
+            return self.stations
+        elif filter_type == "Favorites":
+            # Favorites are stored with all their fields
+            return list(favorites)
+        elif filter_type == "Nearby" and location is not None:
+            return RemoteSelection(self, dict(DEFAULT_ORDER, geo_lat=location[0], geo_long=location[1],
+                                              geo_distance=int(config.NEARBY_RADIUS_KM * 1000)))
+        elif filter_type.startswith(TAG_FILTER_PREFIX):
+            return RemoteSelection(self, dict(DEFAULT_ORDER, tag=filter_type[len(TAG_FILTER_PREFIX):],
+                                              tagExact='true'))
+        elif filter_type == "Reachable Only":
+            return RemoteSelection(self, dict(DEFAULT_ORDER, hidebroken='true'))
+        # 'Fastest First' needs latency measurements of the whole catalog
+        return None
+    
+    def sort(self, stations, key):
+        """
+        Sort stations
+        
+        Args:
+            stations: A RemoteSelection or a list of stations
+            key: One of SORT_KEYS, or None to keep the order
+        
+        Returns:
+            Sequence: The stations in the sort order
+        """
+        if key is None:
+            return stations
+        if isinstance(stations, RemoteSelection):
+            return stations.ordered_by(key)
+        return sorted(stations, key=SORT_KEYS[key])
+    
+    def tag_counts(self, limit=None):
+        """
+        Get the most used tags
+        
+        Args:
+            limit: Optional maximum number of tags
+        
+        Returns:
+            list: (tag, station count) tuples, most used first
+        """
+        counts = [(tag.get('name'), tag.get('stationcount', 0)) for tag in self.tags]
+        return counts[:limit] if limit is not None else counts
+    
+    def get(self, station_uuid):
+        """
+        Look up a station by its UUID
+        
+        Args:
+            station_uuid: The radio-browser stationuuid
+        
+        Returns:
+            dict: The station, or None if there is no such station
+        """
+        # Searches are looked up too, only ask the API for real UUIDs
+        try:
+            uuid.UUID(station_uuid)
+        except (TypeError, ValueError):
+            return None
+        
+        try:
+            stations = self.request(BY_UUID_PATH, {'uuids': station_uuid})
+        except OSError as e:
+            print(f"Failed to look up station {station_uuid}: {e}")
+            return None
+        return stations[0] if stations else None
+    
+    def canonical_uuid(self, station_uuid):
+        """The server does not collapse duplicates, every UUID is its own station"""
+        return station_uuid
+    
+    def __len__(self):
+        return self.station_count
+
+
+class RemoteSelection(Sequence):
+    """
+    Read-only list of the stations matching an API search, fetched a page
+    at a time as it is read
+    
+    Until the last page has been fetched the length counts one page
+    beyond the stations fetched so far, so that paging asks for it.
+    """
+    
+    def __init__(self, catalog, params):
+        """
+        Args:
+            catalog: RemoteCatalog to fetch through
+            params: Search parameters of the API
+        """
+        self.catalog = catalog
+        self.params = params
+        self.pages = {}
+        self.last_page = None
+    
+    @property
+    def more_available(self):
+        """Whether pages beyond the fetched ones may exist"""
+        return self.last_page is None
+    
+    def ordered_by(self, key):
+        """Get the same search in another sort order"""
+        return RemoteSelection(self.catalog, dict(self.params, order=key,
+                                                  reverse='false' if key == 'name' else 'true'))
+    
+    def fetched(self, start, end):
+        """
+        Check whether stations can be read without waiting on the network
+        
+        Args:
+            start: Index of the first station
+            end: Index after the last station
+        
+        Returns:
+            bool: True if every page covering the range is fetched, or known
+                to be past the end
+        """
+        page_size = self.catalog.page_size
+        for index in range(start // page_size, max(start, end - 1) // page_size + 1):
+            if index not in self.pages and (self.last_page is None or index <= self.last_page):
+                return False
+        return True
+    
+    def fetch(self, start, end, token=None):
+        """
+        Fetch the pages covering a range of stations, on a worker thread
+        
+        Args:
+            start: Index of the first station
+            end: Index after the last station
+            token: Optional CancelToken, checked before each page
+        
+        Returns:
+            list: The stations of the range, fewer past the end
+        """
+        page_size = self.catalog.page_size
+        for index in range(start // page_size, max(start, end - 1) // page_size + 1):
+            if token is not None:
+                token.check()
+            if not self._page(index):
+                break
+        return self[start:end]
+    
+    def _page(self, index):
+        """Get a page, fetching it if needed"""
+        page = self.pages.get(index)
+        if page is None:
+            if self.last_page is not None and index > self.last_page:
+                return []
+            try:
+                page = self.catalog.page(self.params, index)
+            except OSError as e:
+                print(f"Failed to fetch stations: {e}")
+                page = []
+            self.pages[index] = page
+            
+            if len(page) < self.catalog.page_size:
+                self.last_page = index if page or index == 0 else index - 1
+            else:
+                # Scrolling on is the likely next step
+                self.catalog.prefetch(self.catalog.page_key(self.params, index + 1))
+        return page
+    
+    def _station(self, index):
+        """Get a station by index, or None past the end"""
+        page_size = self.catalog.page_size
+        page = self._page(index // page_size)
+        offset = index % page_size
+        return page[offset] if offset < len(page) else None
+    
+    def __len__(self):
+        # Never fetches, so the length is safe to ask for on the main loop
+        if self.last_page is not None:
+            return self.last_page * self.catalog.page_size + len(self.pages.get(self.last_page, ()))
+        return (max(self.pages, default=-1) + 2) * self.catalog.page_size
+    
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            stations = []
+            for i in range(*index.indices(len(self))):
+                station = self._station(i)
+                if station is None:
+                    break
+                stations.append(station)
+            return stations
+        
+        if index < 0:
+            index += len(self)
+        station = self._station(index) if index >= 0 else None
+        if station is None:
+            raise IndexError("station index out of range")
+        return station
+    
+    def __iter__(self):
+        index = 0
+        while True:
+            page = self._page(index)
+            yield from page
+            if len(page) < self.catalog.page_size:
+                return
+            index += 1
\ No newline at end of file
@@ -0,0 +1,579 @@
+#!/usr/bin/env python3
+import sys
+import json
+import time
+from array import array
+from bisect import bisect_left
+
+from src.utils import config, metrics
+from src.catalog.dedupe import ALTERNATES_FIELD, collapse_duplicates
+from src.catalog.geo import GeoIndex
+from src.utils.health import REACHABLE, LATENCY_MS
+from src.catalog.query import (StationColumns, StationSelection, SORT_KEYS, numpy,
+                               parse_search, intersect_positions, sort_permutation)
+
+# Fields that repeat across many stations and are worth interning
+INTERNED_FIELDS = ('country', 'countrycode', 'language', 'codec', 'state')
+
+# Prefix of search words that select a tag, e.g. "#jazz #80s"
+TAG_PREFIX = '#'
+
+# Prefix of filter types that select a tag, e.g. "tag:jazz"
+TAG_FILTER_PREFIX = 'tag:'
+
+# Above this length ratio intersections binary-search the longer list
+GALLOP_RATIO = 8
+
+# Stations freed at a time by release, small enough for other threads to run between
+RELEASE_BATCH = 1000
+
+
+class StationCatalog:
+    """
+    Holds the radio-browser station list and answers lookups and searches
+    without any GTK dependency
+    """
+    
+    def __init__(self, fields=None):
+        """
+        Initialize an empty catalog
+        
+        Args:
+            fields: Optional station fields to keep, all other fields are
+                dropped at load time to save memory
+        """
+        self.fields = fields
+        self.stations = []
+        self.by_uuid = {}
+        
+        # Number of duplicate stations collapsed at load time
+        self.duplicate_count = 0
+        
+        # Tag vocabulary: posting lists of sorted station positions per tag
+        self.tag_postings = {}
+        self.tag_names = []
+        
+        # Columns for field queries, built on first use
+        self._columns = None
+        
+        # Spatial index of the station coordinates
+        self.geo = GeoIndex([])
+        
+        # Station positions in each sort order, computed on first use
+        self._sort_orders = {}
+        self._sort_ranks = {}
+        
+        # Reachable stations by latency, as (health store, its change count, positions)
+        self._latency_order = None
+    
+    def load(self, stations_file=None, incremental=False):
+        """
+        Load stations from a JSON file
+        
+        Args:
+            stations_file: Optional path to the stations file
+            incremental: Parse one station at a time. Slower, but json.load
+                holds the GIL for the whole file, which would freeze the main
+                loop while a background thread loads a catalog.
+        """
+        if stations_file is None:
+            stations_file = config.STATIONS_JSON_PATH
+        
+        started = time.perf_counter()
+        with open(stations_file, 'r') as f:
+            stations = list(iter_json_array(f.read())) if incremental else json.load(f)
+        
+        self.set_stations(stations)
+        metrics.CATALOG_LOAD_DURATION.observe(time.perf_counter() - started)
+        metrics.CATALOG_STATIONS.set(len(self.stations))
+    
+    def set_stations(self, stations):
+        """
+        Replace the catalog contents and rebuild its indexes
+        
+        Args:
+            stations: List of station dictionaries
+        """
+        # Fold duplicates first, matching needs fields that slimming drops
+        collapsed = {}
+        if config.DEDUPLICATE_STATIONS:
+            stations, collapsed = collapse_duplicates(stations)
+            self.duplicate_count = len(collapsed)
+            if collapsed:
+                print(f"Collapsed {len(collapsed)} duplicate stations")
+        
+        if self.fields is not None:
+            fields = tuple(self.fields) + (ALTERNATES_FIELD,)
+            slimmed = {}
+            for station in stations:
+                slimmed[id(station)] = {field: station[field] for field in fields if field in station}
+            collapsed = {uuid: slimmed[id(station)] for uuid, station in collapsed.items()}
+            stations = [slimmed[id(station)] for station in stations]
+        
+        # Repeated values share a single string object
+        for station in stations:
+            for field in INTERNED_FIELDS:
+                value = station.get(field)
+                if isinstance(value, str):
+                    station[field] = sys.intern(value)
+        
+        self.stations = stations
+        self.by_uuid = {station.get('stationuuid'): station for station in stations}
+        
+        # Favorites saved under a collapsed UUID still find their station
+        for station_uuid, station in collapsed.items():
+            self.by_uuid.setdefault(station_uuid, station)
+        self._build_tag_index()
+        self.geo = GeoIndex(stations, config.GEO_CELL_DEGREES)
+        self._columns = None
+        self._sort_orders = {}
+        self._sort_ranks = {}
+        self._latency_order = None
+    
+    def _build_tag_index(self):
+        """Tokenize the tags of all stations into per-tag posting lists"""
+        postings = {}
+        for position, station in enumerate(self.stations):
+            for tag in split_tags(station.get('tags')):
+                posting = postings.get(tag)
+                if posting is None:
+                    posting = postings[sys.intern(tag)] = array('I')
+                # Stations are visited in order, so every list stays sorted
+                posting.append(position)
+        
+        self.tag_postings = postings
+        self.tag_names = sorted(postings)
+    
+    @property
+    def columns(self):
+        """Columnar copy of the fields that field queries filter on"""
+        if self._columns is None:
+            self._columns = StationColumns(self.stations)
+        return self._columns
+    
+    def sort_order(self, key):
+        """
+        Get the positions of all stations in a sort order
+        
+        Args:
+            key: One of SORT_KEYS
+        
+        Returns:
+            Permutation of station positions, computed once per catalog
+        """
+        order = self._sort_orders.get(key)
+        if order is None:
+            order = self._sort_orders[key] = sort_permutation(self.stations, self.columns, key)
+        return order
+    
+    def latency_order(self, health):
+        """
+        Get the positions of the stations not known to be dead, fastest first
+        
+        Stations with a measured latency come first, unchecked ones after
+        them in catalog order. Latencies live in the health store rather
+        than in the columns and change as probes finish, so the order is
+        kept until the store changes instead of once per catalog.
+        
+        Args:
+            health: HealthStore with the probe results
+        
+        Returns:
+            Permutation of station positions, like sort_order()
+        """
+        cached = self._latency_order
+        if cached is not None and cached[0] is health and cached[1] == health.changes:
+            return cached[2]
+        
+        changes = health.changes
+        records = health.records
+        if numpy is not None:
+            # Unchecked stations sort after every latency, dead ones are cut off last
+            latencies = numpy.full(len(self.stations), numpy.inf)
+            for i, station in enumerate(self.stations):
+                record = records.get(station.get('stationuuid'))
+                if record is None:
+                    continue
+                if not record[REACHABLE]:
+                    latencies[i] = numpy.nan
+                elif record[LATENCY_MS] is not None:
+                    latencies[i] = record[LATENCY_MS]
+            order = numpy.argsort(latencies, kind='stable')
+            order = order[:len(order) - int(numpy.isnan(latencies).sum())]
+        else:
+            alive = [i for i, s in enumerate(self.stations) if not health.is_dead(s.get('stationuuid'))]
+            latency = [health.latency(self.stations[i].get('stationuuid')) for i in alive]
+            ranked = sorted(range(len(alive)), key=lambda k: (latency[k] is None, latency[k] or 0))
+            order = array('I', (alive[k] for k in ranked))
+        
+        self._latency_order = (health, changes, order)
+        return order
+    
+    def sort(self, stations, key):
+        """
+        Sort stations of this catalog
+        
+        Args:
+            stations: All stations, a StationSelection or a list of stations
+            key: One of SORT_KEYS, or None to keep the order
+        
+        Returns:
+            Sequence: The stations in the sort order
+        """
+        if key is None:
+            return stations
+        
+        order = self.sort_order(key)
+        if stations is self.stations:
+            return StationSelection(self.stations, order)
+        
+        if isinstance(stations, StationSelection):
+            if numpy is not None:
+                # Gather the selected positions from the precomputed order
+                selected = numpy.zeros(len(self.stations), dtype=bool)
+                selected[numpy.asarray(stations.positions, dtype=numpy.intp)] = True
+                return StationSelection(self.stations, order[selected[order]])
+            
+            rank = self._sort_ranks.get(key)
+            if rank is None:
+                rank = self._sort_ranks[key] = array('I', bytes(4 * len(order)))
+                for index, position in enumerate(order):
+                    rank[position] = index
+            return StationSelection(self.stations, sorted(stations.positions, key=rank.__getitem__))
+        
+        # Lists not taken from the catalog are sorted the slow way
+        return sorted(stations, key=SORT_KEYS[key])
+    
+    def nearby(self, location, count=None, radius_km=None):
+        """
+        Get the stations closest to a location
+        
+        Args:
+            location: (latitude, longitude) tuple
+            count: Maximum number of stations
+            radius_km: Maximum distance in km
+        
+        Returns:
+            StationSelection: Stations closest first
+        """
+        lat, lon = location
+        count = count if count is not None else config.NEARBY_LIMIT
+        radius_km = radius_km if radius_km is not None else config.NEARBY_RADIUS_KM
+        return StationSelection(self.stations, [
+            position for _, position in self.geo.nearest(lat, lon, count, radius_km)])
+    
+    def tag_counts(self, limit=None):
+        """
+        Get the most used tags
+        
+        Args:
+            limit: Optional maximum number of tags
+        
+        Returns:
+            list: (tag, station count) tuples, most used first
+        """
+        counts = sorted(((tag, len(posting)) for tag, posting in self.tag_postings.items()),
+                        key=lambda item: (-item[1], item[0]))
+        return counts[:limit] if limit is not None else counts
+    
+    def tag_positions(self, tags):
+        """
+        Get the positions of stations that have all the given tags
+        
+        Args:
+            tags: Tag names
+        
+        Returns:
+            array: Sorted station positions
+        """
+        postings = sorted((self.tag_postings.get(tag.lower(), array('I')) for tag in tags), key=len)
+        if not postings:
+            return array('I', range(len(self.stations)))
+        
+        # Start from the rarest tag so intermediate results stay small
+        result = postings[0]
+        for posting in postings[1:]:
+            if not result:
+                break
+            result = intersect_sorted(result, posting)
+        return result
+    
+    def with_tags(self, tags):
+        """
+        Get the stations that have all the given tags
+        
+        Args:
+            tags: Tag names
+        
+        Returns:
+            StationSelection: Matching stations in catalog order
+        """
+        return StationSelection(self.stations, self.tag_positions(tags))
+    
+    def _tag_prefix_positions(self, prefix):
+        """Get the positions of stations with a tag starting with prefix"""
+        positions = set()
+        # Tags sharing a prefix are adjacent in the sorted vocabulary
+        index = bisect_left(self.tag_names, prefix)
+        while index < len(self.tag_names) and self.tag_names[index].startswith(prefix):
+            positions.update(self.tag_postings[self.tag_names[index]])
+            index += 1
+        return positions
+    
+    def get(self, station_uuid):
+        """
+        Look up a station by its UUID
+        
+        Args:
+            station_uuid: The radio-browser stationuuid
+        
+        Returns:
+            dict: The station, or None if it is not in the catalog
+        """
+        return self.by_uuid.get(station_uuid)
+    
+    def canonical_uuid(self, station_uuid):
+        """
+        Map the UUID of a collapsed duplicate to the station that was kept
+        
+        Args:
+            station_uuid: The radio-browser stationuuid
+        
+        Returns:
+            str: UUID of the station listed in the catalog, or station_uuid
+            itself if it is not a collapsed duplicate
+        """
+        station = self.by_uuid.get(station_uuid)
+        return station.get('stationuuid') if station is not None else station_uuid
+    
+    def search(self, search_text):
+        """
+        Search for stations matching the given text
+        
+        Text matches anywhere in the name, country or language, and at the
+        start of a tag. Words starting with '#' select stations that have
+        all of these tags, and field terms such as country:greece codec:mp3
+        bitrate:>=128 are evaluated over the catalog columns.
+        
+        Args:
+            search_text: Text to search for in name, country, language and tags
+        
+        Returns:
+            Sequence: Matching stations in catalog order
+        """
+        if not search_text:
+            return self.stations
+        
+        # Convert to lowercase for case-insensitive search
+        search_text = search_text.lower()
+        
+        # Split off tag words and field terms
+        positions = None
+        if TAG_PREFIX in search_text or ':' in search_text:
+            search_text, tags, query = parse_search(search_text)
+            if query:
+                positions = query.positions(self.columns)
+            if tags:
+                posting = self.tag_positions(tags)
+                positions = posting if positions is None else intersect_positions(positions, posting)
+        
+        stations = self.stations
+        if not search_text:
+            return StationSelection(stations, positions) if positions is not None else stations
+        
+        tagged = self._tag_prefix_positions(search_text)
+        if positions is None:
+            positions = range(len(stations))
+        elif hasattr(positions, 'tolist'):
+            positions = positions.tolist()
+        return StationSelection(stations, [
+            i for i in positions
+            if i in tagged or
+               search_text in stations[i].get('name', '').lower() or
+               search_text in stations[i].get('country', '').lower() or
+               search_text in stations[i].get('language', '').lower()
+        ])
+    
+    def filter(self, filter_type, favorites=(), health=None, location=None):
+        """
+        Filter stations by the specified type
+        
+        Args:
+            filter_type: Type of filter to apply (e.g., 'All', 'Favorites', etc.)
+            favorites: Favorite stations, for the 'Favorites' filter
+            health: Optional HealthStore, for the health based filters
+            location: Optional (latitude, longitude), for the 'Nearby' filter
+        
+        Returns:
+            Sequence: Matching stations, or None if the filter is not supported
+        """
+        if filter_type == "All Stations":
+            return self.stations
+        elif filter_type == "Favorites":
+            # Show all stations that are in favorites, also those saved under a collapsed duplicate
+            uuids = {self.canonical_uuid(fav.get('stationuuid')) for fav in favorites}
+            return StationSelection(self.stations, [
+                i for i, s in enumerate(self.stations) if s.get('stationuuid') in uuids])
+        elif filter_type == "Nearby" and location is not None:
+            # Stations around the configured location, closest first
+            return self.nearby(location)
+        elif filter_type.startswith(TAG_FILTER_PREFIX):
+            # Stations with the selected tag
+            return self.with_tags([filter_type[len(TAG_FILTER_PREFIX):]])
+        elif filter_type == "Reachable Only" and health is not None:
+            # Hide stations whose last health check failed
+            return StationSelection(self.stations, [
+                i for i, s in enumerate(self.stations) if not health.is_dead(s.get('stationuuid'))])
+        elif filter_type == "Fastest First" and health is not None:
+            # Reachable stations by measured latency, unchecked ones after them
+            return StationSelection(self.stations, self.latency_order(health))
+        # Additional filters can be implemented here
+        return None
+    
+    def release(self):
+        """
+        Drop the contents of a catalog that was replaced
+        
+        Freeing tens of thousands of stations at once holds the GIL for a
+        while; called from a background thread, this frees them in batches
+        so the main loop keeps running. The catalog is empty afterwards.
+        """
+        stations = self.stations
+        self.stations = []
+        self.by_uuid = {}
+        self.tag_postings = {}
+        self.tag_names = []
+        self.geo = GeoIndex([])
+        self._columns = None
+        self._sort_orders = {}
+        self._sort_ranks = {}
+        self._latency_order = None
+        
+        while stations:
+            del stations[-RELEASE_BATCH:]
+    
+    def __len__(self):
+        return len(self.stations)
+
+
+def is_favorite(station, favorites, catalog=None):
+    """
+    Check if a station is in favorites
+    
+    Args:
+        station: Station dictionary to check
+        favorites: Favorite station dictionaries
+        catalog: Optional catalog; a favorite saved under the UUID of a
+            duplicate it collapsed counts for the station it kept
+    
+    Returns:
+        bool: True if the station is a favorite, False otherwise
+    """
+    if not station:
+        return False
+    
+    station_uuid = station.get('stationuuid')
+    for fav in favorites:
+        fav_uuid = fav.get('stationuuid')
+        if catalog is not None:
+            fav_uuid = catalog.canonical_uuid(fav_uuid)
+        if fav_uuid == station_uuid:
+            return True
+    return False
+
+
+def iter_json_array(text):
+    """
+    Parse the elements of a JSON array one at a time
+    
+    Args:
+        text: JSON text of an array
+    
+    Yields:
+        The parsed elements
+    
+    Raises:
+        ValueError: If the text is not a JSON array
+    """
+    skip = json.decoder.WHITESPACE.match
+    decode = json.JSONDecoder().raw_decode
+    
+    index = skip(text, 0).end()
+    if text[index:index + 1] != '[':
+        raise ValueError("Expected a JSON array")
+    index = skip(text, index + 1).end()
+    if text[index:index + 1] == ']':
+        return
+    
+    while True:
+        element, index = decode(text, index)
+        yield element
+        
+        index = skip(text, index).end()
+        separator = text[index:index + 1]
+        if separator == ']':
+            return
+        if separator != ',':
+            raise ValueError(f"Expected ',' or ']' at offset {index}")
+        index = skip(text, index + 1).end()
+
+
+def split_tags(tags):
+    """
+    Tokenize a radio-browser tags field
+    
+    Args:
+        tags: Comma-separated tags
+    
+    Returns:
+        list: Distinct lowercase tags in their original order
+    """
+    if not tags:
+        return []
+    
+    result = []
+    for tag in tags.lower().split(','):
+        tag = tag.strip()
+        if tag and tag not in result:
+            result.append(tag)
+    return result
+
+
+def intersect_sorted(a, b):
+    """
+    Intersect two sorted arrays of station positions
+    
+    Args:
+        a: Sorted array, ideally the shorter one
+        b: Sorted array
+    
+    Returns:
+        array: Sorted positions present in both
+    """
+    if len(a) > len(b):
+        a, b = b, a
+    result = array('I')
+    
+    if len(b) > GALLOP_RATIO * len(a):
+        # Binary search the long list for each entry of the short one
+        low = 0
+        for value in a:
+            low = bisect_left(b, value, low)
+            if low == len(b):
+                break
+            if b[low] == value:
+                result.append(value)
+        return result
+    
+    # Merge lists of similar length
+    i = j = 0
+    while i < len(a) and j < len(b):
+        if a[i] < b[j]:
+            i += 1
+        elif a[i] > b[j]:
+            j += 1
+        else:
+            result.append(a[i])
+            i += 1
+            j += 1
+    return result
\ No newline at end of file
@@ -0,0 +1,431 @@
+#!/usr/bin/env python3
+"""
+Framenux Radio headless daemon
+
+Plays stations without a display. Only the station catalog and the player
+are loaded, and playback is controlled over a Unix-domain socket with one
+text command per line. Every command is answered with one JSON line.
+
+Commands:
+    play <stationuuid | search text>   Play a station by UUID or the best search match
+    search <text>                      List matching stations
+    stop | pause | resume              Control playback
+    record [stationuuid | search text] Record the playing station, or another one concurrently
+    unrecord [stationuuid]             Stop recording the playing station, or another one
+    recordings                         Report throughput and disk-write statistics of recordings
+    volume <0-100>                     Set the volume
+    rewind [seconds] | live            Move within the timeshift buffer (with --timeshift)
+    status                             Report the current station, player telemetry and background work
+"""
+import os
+import sys
+import json
+import time
+import signal
+import socket
+import argparse
+
+import gi
+gi.require_version('Gst', '1.0')
+from gi.repository import GLib
+
+from src.player import RadioPlayer
+from src.utils import config, metrics
+from src.utils.resolver import StreamResolver
+from src.utils.rebroadcast import StreamRebroadcaster
+from src.utils.recorder import RecordingManager
+from src.utils.refresh import CatalogRefresher
+from src.utils.watchdog import StallWatchdog
+from src.utils.executor import get_executor, PRIORITY_REFRESH
+from src.catalog.stations import StationCatalog
+from src.catalog.remote import RemoteCatalog
+
+# Station fields the daemon needs, the rest of the catalog is dropped at load time
+DAEMON_STATION_FIELDS = (
+    'stationuuid', 'name', 'url', 'country', 'language', 'tags', 'codec', 'bitrate',
+)
+
+# Maximum number of results returned by the search command
+SEARCH_RESULTS_LIMIT = 20
+
+
+class RadioDaemon:
+    """
+    Headless player controlled over a Unix-domain socket
+    """
+    
+    def __init__(self, stations_file=None, socket_path=None, rebroadcast_port=None, timeshift=False, watchdog=False,
+                 metrics_port=None, metrics_file=None):
+        """
+        Initialize the daemon
+        
+        Args:
+            stations_file: Optional path to the stations file
+            socket_path: Optional path of the control socket
+            rebroadcast_port: Optional port to share the playing stream on
+            timeshift: Play through a timeshift buffer so pause and rewind work
+            watchdog: Log stalls of the main loop with the stack that caused them
+            metrics_port: Optional local port serving metrics for monitoring
+            metrics_file: Optional file the metrics are written to
+        """
+        self.socket_path = socket_path or config.CONTROL_SOCKET_PATH
+        self.loop = GLib.MainLoop()
+        
+        # Background work shares one executor; its callbacks run on the main loop
+        self.executor = get_executor()
+        self.executor.attach(GLib.idle_add)
+        self.watchdog = StallWatchdog() if watchdog else None
+        
+        # Metrics for fleet monitoring, in the Prometheus text format
+        self.metrics_exporter = None
+        if metrics_port is not None or metrics_file:
+            self.metrics_exporter = metrics.MetricsExporter(port=metrics_port, file_path=metrics_file)
+            if self.watchdog:
+                metrics.REGISTRY.counter('framenux_main_loop_stalls_total', "Main-loop stalls over the threshold",
+                                         function=lambda: self.watchdog.stall_count)
+        
+        # Only the fields needed for playback and search are kept
+        if config.CATALOG_SOURCE == "remote":
+            self.catalog = RemoteCatalog()
+        else:
+            self.catalog = StationCatalog(fields=DAEMON_STATION_FIELDS)
+        self.catalog.load(stations_file)
+        
+        # Keep the default stations list fresh in the background
+        self.catalog_refresher = None
+        if config.CATALOG_AUTO_REFRESH and config.CATALOG_SOURCE != "remote" and stations_file is None:
+            self.catalog_refresher = CatalogRefresher(on_updated=self.on_catalog_refreshed)
+        
+        self.player = RadioPlayer(resolver=StreamResolver())
+        self.player.set_state_callback(self.on_player_state_changed)
+        self.player.set_timeshift(timeshift)
+        
+        # Share the playing stream with other rooms
+        self.rebroadcaster = None
+        if rebroadcast_port is not None:
+            self.rebroadcaster = StreamRebroadcaster(port=rebroadcast_port).start()
+            self.player.set_rebroadcaster(self.rebroadcaster)
+        
+        # Passthrough recordings, of the playing station and of others
+        self.recordings = RecordingManager(self.player, self.player.resolver)
+        
+        self.current_station = None
+        self.server = None
+        self.clients = {}
+    
+    def run(self):
+        """Serve the control socket until interrupted"""
+        self.start_server()
+        
+        GLib.unix_signal_add(GLib.PRIORITY_DEFAULT, signal.SIGINT, self.quit)
+        GLib.unix_signal_add(GLib.PRIORITY_DEFAULT, signal.SIGTERM, self.quit)
+        
+        print(f"Loaded {len(self.catalog)} stations, listening on {self.socket_path}")
+        if self.catalog_refresher:
+            self.catalog_refresher.start()
+        if self.watchdog:
+            self.watchdog.start(lambda ms, callback: GLib.timeout_add(ms, callback, priority=GLib.PRIORITY_HIGH))
+        if self.metrics_exporter:
+            self.metrics_exporter.start()
+            if self.metrics_exporter.httpd:
+                print(f"Serving metrics on http://{self.metrics_exporter.host}:{self.metrics_exporter.port}/metrics")
+        try:
+            self.loop.run()
+        finally:
+            if self.catalog_refresher:
+                self.catalog_refresher.stop()
+            self.recordings.stop_all()
+            self.player.stop()
+            self.stop_server()
+            if self.rebroadcaster:
+                self.rebroadcaster.stop()
+            self.executor.shutdown()
+            if self.watchdog:
+                self.watchdog.stop()
+            if self.metrics_exporter:
+                self.metrics_exporter.stop()
+        return 0
+    
+    def on_catalog_refreshed(self):
+        """Load a changed stations list off the main loop, then swap it in"""
+        def _load_catalog():
+            catalog = StationCatalog(fields=DAEMON_STATION_FIELDS)
+            catalog.load(incremental=True)
+            return catalog
+        
+        self.executor.submit(PRIORITY_REFRESH, _load_catalog, on_complete=self.apply_refreshed_catalog,
+                             on_error=lambda e: print(f"Failed to load the refreshed stations list: {e}"))
+    
+    def apply_refreshed_catalog(self, catalog):
+        """Answer commands from a refreshed catalog"""
+        previous, self.catalog = self.catalog, catalog
+        print(f"Stations list updated, {len(catalog)} stations")
+        
+        # Freeing the old catalog at once would stall the control socket
+        self.executor.submit(PRIORITY_REFRESH, previous.release)
+    
+    def quit(self):
+        """Leave the main loop"""
+        self.loop.quit()
+        return False
+    
+    def start_server(self):
+        """Create the control socket and watch it on the main loop"""
+        if os.path.exists(self.socket_path):
+            os.unlink(self.socket_path)
+        
+        self.server = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self.server.bind(self.socket_path)
+        os.chmod(self.socket_path, 0o600)
+        self.server.listen(5)
+        self.server.setblocking(False)
+        GLib.io_add_watch(self.server.fileno(), GLib.PRIORITY_DEFAULT, GLib.IO_IN, self._on_accept)
+    
+    def stop_server(self):
+        """Close the control socket and all client connections"""
+        for client in list(self.clients.values()):
+            client['socket'].close()
+        self.clients = {}
+        
+        if self.server:
+            self.server.close()
+            self.server = None
+        if os.path.exists(self.socket_path):
+            os.unlink(self.socket_path)
+    
+    def _on_accept(self, fd, condition):
+        """Accept a new control connection"""
+        try:
+            client, _ = self.server.accept()
+        except BlockingIOError:
+            return True
+        
+        client.setblocking(False)
+        self.clients[client.fileno()] = {'socket': client, 'buffer': b''}
+        GLib.io_add_watch(client.fileno(), GLib.PRIORITY_DEFAULT,
+                          GLib.IO_IN | GLib.IO_HUP | GLib.IO_ERR, self._on_client_data)
+        return True
+    
+    def _on_client_data(self, fd, condition):
+        """Read commands from a control connection and answer them"""
+        client = self.clients.get(fd)
+        if client is None:
+            return False
+        
+        try:
+            data = client['socket'].recv(4096)
+        except BlockingIOError:
+            return True
+        except OSError:
+            data = b''
+        
+        if not data:
+            client['socket'].close()
+            del self.clients[fd]
+            return False
+        
+        client['buffer'] += data
+        while b'\n' in client['buffer']:
+            line, client['buffer'] = client['buffer'].split(b'\n', 1)
+            response = self.handle_command(line.decode('utf-8', errors='replace'))
+            try:
+                client['socket'].sendall(json.dumps(response).encode() + b'\n')
+            except OSError:
+                pass
+        return True
+    
+    def handle_command(self, line):
+        """
+        Execute one control command
+        
+        Args:
+            line: Command line, e.g. "play <uuid>" or "volume 50"
+        
+        Returns:
+            dict: JSON-serializable response
+        """
+        command, _, argument = line.strip().partition(' ')
+        argument = argument.strip()
+        handler = getattr(self, f"cmd_{command.lower()}", None)
+        if not command or handler is None:
+            return {'ok': False, 'error': f"Unknown command: {command}"}
+        
+        try:
+            return handler(argument)
+        except Exception as e:
+            return {'ok': False, 'error': str(e)}
+    
+    def find_station(self, argument):
+        """
+        Find a station by UUID, or the first match of a search
+        
+        Raises:
+            ValueError: If no station matches
+        """
+        station = self.catalog.get(argument)
+        if station is None:
+            matches = self.catalog.search(argument) if argument else []
+            if not matches:
+                raise ValueError(f"No station matches: {argument}")
+            station = matches[0]
+        return station
+    
+    def cmd_play(self, argument):
+        """Play a station by UUID, or the first match of a search"""
+        station = self.find_station(argument)
+        
+        url = station.get('url')
+        if not url:
+            return {'ok': False, 'error': "This station does not have a valid URL"}
+        
+        self.current_station = station
+        self.player.play(url, station.get('name'), station.get('alternate_urls'))
+        return {'ok': True, 'station': self.describe(station)}
+    
+    def cmd_search(self, argument):
+        """List stations matching the search text"""
+        started = time.perf_counter()
+        matches = self.catalog.search(argument)
+        response = {
+            'ok': True,
+            'total': len(matches),
+            'stations': [self.describe(station) for station in matches[:SEARCH_RESULTS_LIMIT]],
+        }
+        metrics.SEARCH_DURATION.observe(time.perf_counter() - started)
+        return response
+    
+    def cmd_stop(self, argument):
+        """Stop playback"""
+        self.player.stop()
+        return {'ok': True}
+    
+    def cmd_pause(self, argument):
+        """Pause playback"""
+        self.player.pause()
+        return {'ok': True}
+    
+    def cmd_resume(self, argument):
+        """Resume playback"""
+        self.player.resume()
+        return {'ok': True}
+    
+    def cmd_rewind(self, argument):
+        """Jump back in the timeshift buffer"""
+        if not self.player.timeshift:
+            return {'ok': False, 'error': "Timeshift is not active"}
+        self.player.rewind(float(argument) if argument else config.TIMESHIFT_REWIND_SECONDS)
+        return {'ok': True}
+    
+    def cmd_live(self, argument):
+        """Jump to the live edge of the timeshift buffer"""
+        self.player.go_live()
+        return {'ok': True}
+    
+    def cmd_volume(self, argument):
+        """Set the volume in percent"""
+        volume = max(0, min(100, int(argument)))
+        self.player.set_volume(volume / 100.0)
+        return {'ok': True, 'volume': volume}
+    
+    def cmd_record(self, argument):
+        """Record the playing station, or another station on its own connection"""
+        if not argument:
+            self.recordings.start_current()
+            return {'ok': True, 'station': 'current'}
+        
+        station = self.find_station(argument)
+        self.recordings.start_station(station)
+        return {'ok': True, 'station': self.describe(station)}
+    
+    def cmd_unrecord(self, argument):
+        """Stop recording the playing station, or another station"""
+        if argument:
+            self.recordings.stop_station(argument)
+        else:
+            self.recordings.stop_current()
+        return {'ok': True}
+    
+    def cmd_recordings(self, argument):
+        """Report the statistics of every recording"""
+        return {'ok': True, 'recordings': self.recordings.get_stats()}
+    
+    def cmd_status(self, argument):
+        """Report the current station, player telemetry and background work"""
+        return {
+            'ok': True,
+            'station': self.describe(self.current_station) if self.current_station else None,
+            'volume': int(round(self.player.volume * 100)),
+            'player': self.player.get_stats(),
+            'recordings': self.recordings.get_stats(),
+            'executor': self.executor.metrics(),
+            'main_loop': self.watchdog.get_stats() if self.watchdog else None,
+        }
+    
+    def describe(self, station):
+        """Summarize a station for a response"""
+        return {
+            'stationuuid': station.get('stationuuid'),
+            'name': station.get('name'),
+            'country': station.get('country'),
+            'codec': station.get('codec'),
+            'bitrate': station.get('bitrate'),
+        }
+    
+    def on_player_state_changed(self, state, attempt):
+        """Log reconnects and failures, there is nobody to show them to"""
+        print(f"Player {state} (attempt {attempt})")
+
+
+def send_command(line, socket_path=None):
+    """
+    Send one command to a running daemon
+    
+    Args:
+        line: Command line to send
+        socket_path: Optional path of the control socket
+    
+    Returns:
+        dict: The daemon's response
+    """
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as client:
+        client.connect(socket_path or config.CONTROL_SOCKET_PATH)
+        client.sendall(line.encode() + b'\n')
+        
+        response = b''
+        while not response.endswith(b'\n'):
+            chunk = client.recv(4096)
+            if not chunk:
+                break
+            response += chunk
+    return json.loads(response)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Framenux Radio headless daemon")
+    parser.add_argument("--stations", help="Path to the stations JSON file")
+    parser.add_argument("--socket", help="Path of the control socket")
+    parser.add_argument("--rebroadcast", type=int, nargs="?", const=config.REBROADCAST_PORT,
+                        metavar="PORT", help="Share the playing stream on the local network")
+    parser.add_argument("--timeshift", action="store_true", default=config.TIMESHIFT_ENABLED,
+                        help="Keep a timeshift buffer so pause and rewind work on live radio")
+    parser.add_argument("--metrics-port", type=int, default=config.METRICS_PORT, metavar="PORT",
+                        help="Serve metrics for monitoring on http://127.0.0.1:PORT/metrics")
+    parser.add_argument("--metrics-file", default=config.METRICS_FILE_PATH, metavar="PATH",
+                        help="Write metrics for monitoring to this file every few seconds")
+    parser.add_argument("--watchdog", action="store_true", default=config.WATCHDOG_ENABLED,
+                        help=f"Log main-loop stalls with the stack that caused them to {config.WATCHDOG_LOG_PATH}")
+    parser.add_argument("command", nargs="*",
+                        help="Send this command to a running daemon instead of starting one")
+    args = parser.parse_args(argv)
+    
+    if args.command:
+        response = send_command(" ".join(args.command), args.socket)
+        print(json.dumps(response, indent=2))
+        return 0 if response.get('ok') else 1
+    
+    return RadioDaemon(args.stations, args.socket, args.rebroadcast, args.timeshift, args.watchdog,
+                       args.metrics_port, args.metrics_file).run()
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,74 +1,579 @@
 #!/usr/bin/env python3
+import time
 import gi
 gi.require_version('Gst', '1.0')
 from gi.repository import Gst, GLib
 
+from src.utils import config, metrics
+from src.utils.reconnect import ReconnectSupervisor
+from src.utils.timeshift import TimeshiftSession
+
+# Stream tags shown to the user, everything else in a TAG message is ignored
+METADATA_TAGS = (Gst.TAG_TITLE, Gst.TAG_ARTIST, Gst.TAG_ORGANIZATION, Gst.TAG_GENRE)
+
+# Caps of ICY streams, whose interleaved metadata is stripped by icydemux
+ICY_CAPS_NAME = "application/x-icy"
+
+
+def caps_to_content_type(caps):
+    """
+    Map the caps of an encoded stream to an HTTP content type
+    
+    Args:
+        caps: Gst.Caps of the encoded stream
+    
+    Returns:
+        str: MIME type, e.g. "audio/mpeg"
+    """
+    structure = caps.get_structure(0)
+    name = structure.get_name()
+    
+    if name == "audio/mpeg":
+        found, version = structure.get_int("mpegversion")
+        if found and version in (2, 4):
+            return "audio/aac"
+    return name
+
 class RadioPlayer:
     """
     Radio player implementation using GStreamer
     """
     
-    def __init__(self):
+    def __init__(self, resolver=None):
+        """
+        Args:
+            resolver: Optional StreamResolver providing cached direct stream URLs
+        """
         # Initialize GStreamer
         Gst.init(None)
         
-        # Create the playbin element for audio playback
-        self.player = Gst.ElementFactory.make("playbin", "player")
+        # Playback profile with buffer and watermark settings
+        self.profile_name = config.DEFAULT_PLAYBACK_PROFILE
         
-        # Create bus to get events from the pipeline
-        bus = self.player.get_bus()
-        bus.add_signal_watch()
-        bus.connect("message", self.on_message)
+        # Create the playbin element for audio playback
+        self.player = self._create_pipeline("player")
         
         # Set initial volume
-        self.player.set_property("volume", 0.7)
+        self.volume = 0.7
+        self.player.set_property("volume", self.volume)
         
         # Track the current state
         self.current_url = None
+        self.stream_url = None
         self.is_playing = False
         
-        # Stream metadata
+        # Other stream URLs of the same station, tried when the stream fails
+        self.alternate_urls = []
+        
+        # Resolver for playlist and redirect URLs
+        self.resolver = resolver
+        
+        # Standby pipeline that pre-rolls the next candidate station
+        self.preroll_enabled = config.STANDBY_PREROLL
+        self.standby = None
+        self.standby_url = None
+        self.standby_stream_url = None
+        
+        # Crossfade state while swapping pipelines
+        self._fade_source_id = None
+        self._fade_outgoing = None
+        self._pending_preroll_url = None
+        
+        # Buffering state, the level is a percentage of the high watermark
+        self.is_buffering = False
+        self.buffer_level = 0
+        self.buffering_callback = None
+        
+        # Reconnects after stream errors, with backoff and a retry budget
+        self.reconnect = ReconnectSupervisor()
+        self.has_played = False
+        self.state_callback = None
+        
+        # Telemetry sampled on a timer while playing
+        self.underruns = 0
+        self.input_bitrate = None
+        self.stream_info = {}
+        self.telemetry_callback = None
+        self._telemetry_source_id = None
+        self._bitrate_sample = None
+        self._bytes_in = {}
+        self._queues = {}
+        
+        # Consumers of the received, still encoded stream (LAN rebroadcast,
+        # recorders); the list is replaced, never modified, as streaming
+        # threads iterate it
+        self.stream_taps = []
+        self.rebroadcaster = None
+        self.station_name = None
+        self._tap_type = None
+        self._tap_pending = []
+        self._typefind_caps = {}
+        
+        # Timeshift mode plays from a local buffer that keeps ingesting while paused
+        self.timeshift_enabled = config.TIMESHIFT_ENABLED
+        self.timeshift = None
+        
+        # Time-to-first-audio measurement (seconds)
+        self._play_requested_at = None
+        self.last_time_to_first_audio = None
+        
+        # Stream metadata of the current station, delivered coalesced
         self.metadata = {}
         self.metadata_callback = None
+        self._standby_metadata = {}
+        self._metadata_source_id = None
+        self._delivered_metadata = None
+    
+    def _create_pipeline(self, name):
+        """
+        Create a playbin and route its bus messages through this player
         
-    def play(self, url):
-        """Play a radio station from the given URL"""
-        # If already playing something, stop first
-        if self.is_playing:
-            self.stop()
+        Args:
+            name: Element name for the new playbin
+        
+        Returns:
+            The new playbin element
+        """
+        pipeline = Gst.ElementFactory.make("playbin", name)
+        self._apply_profile(pipeline)
+        
+        # Configure the stream queues as playbin creates them
+        pipeline.connect("deep-element-added", self._on_deep_element_added)
+        pipeline.connect("source-setup", self._on_source_setup)
+        
+        # Create bus to get events from the pipeline
+        bus = pipeline.get_bus()
+        bus.add_signal_watch()
+        bus.connect("message", self._on_bus_message, pipeline)
+        
+        return pipeline
+        
+    def set_profile(self, name):
+        """
+        Select a playback profile, it applies from the next station played
+        
+        Args:
+            name: Key of config.PLAYBACK_PROFILES
+        """
+        if name not in config.PLAYBACK_PROFILES:
+            raise ValueError(f"Unknown playback profile: {name}")
+        
+        self.profile_name = name
+        for pipeline in (self.player, self.standby):
+            if pipeline is not None:
+                self._apply_profile(pipeline)
+    
+    def _apply_profile(self, pipeline):
+        """Set the buffer limits of the current profile on a playbin"""
+        profile = config.PLAYBACK_PROFILES[self.profile_name]
+        pipeline.set_property("buffer-size", profile['buffer_size'])
+        pipeline.set_property("buffer-duration", int(profile['buffer_duration'] * Gst.SECOND))
+    
+    def _on_deep_element_added(self, bin, sub_bin, element):
+        """Configure the elements playbin creates for a stream"""
+        factory = element.get_factory()
+        factory_name = factory.get_name() if factory else None
+        
+        if factory_name == "queue2":
+            # Set the buffering watermarks on the network queue
+            profile = config.PLAYBACK_PROFILES[self.profile_name]
+            element.set_property("low-watermark", profile['low_watermark'])
+            element.set_property("high-watermark", profile['high_watermark'])
+            self._queues[bin] = element
+        
+        elif factory_name == "icydemux":
+            # ICY streams are tapped after the metadata was removed
+            element.connect("pad-added", self._on_icydemux_pad_added, bin)
+        
+        elif factory_name == "typefind":
+            # The first detected type is the encoded stream format
+            self._typefind_caps.pop(bin, None)
+            element.connect("have-type", self._on_have_type, bin)
+        
+        elif self._is_audio_sink(element):
+            # The first buffer reaching the sink is the first audio played
+            pad = element.get_static_pad("sink")
+            if pad:
+                pad.add_probe(Gst.PadProbeType.BUFFER, self._on_sink_buffer, bin)
+    
+    @staticmethod
+    def _is_audio_sink(element):
+        """True for the element actually rendering audio, not a bin wrapping it"""
+        factory = element.get_factory()
+        if factory is None or isinstance(element, Gst.Bin):
+            return False
+        klass = factory.get_metadata(Gst.ELEMENT_METADATA_KLASS) or ""
+        return "Sink" in klass and "Audio" in klass
+    
+    def _on_icydemux_pad_added(self, element, pad, pipeline):
+        """Tap the audio leaving icydemux for the stream taps"""
+        pad.add_probe(Gst.PadProbeType.BUFFER, self._on_encoded_buffer, pipeline)
+    
+    def _on_have_type(self, typefind, probability, caps, pipeline):
+        """Remember the format of a stream whose source did not announce it"""
+        self._typefind_caps.setdefault(pipeline, caps)
+    
+    def _on_sink_buffer(self, pad, info, pipeline):
+        """
+        Take the time to first audio from the first buffer the audio sink
+        receives in PLAYING after play()
+        
+        The buffer a sink prerolls on arrives while the pipeline is still
+        PAUSED waiting for the network buffer to fill, and nothing is heard
+        until it goes to PLAYING, so that buffer does not count. Fresh plays
+        and swapped-in standby pipelines are timed the same way.
+        
+        Runs in a streaming thread, the result is recorded on the main loop.
+        """
+        requested = self._play_requested_at
+        if requested is None or pipeline is not self.player:
+            return Gst.PadProbeReturn.OK
+        
+        _, state, pending = pad.get_parent_element().get_state(0)
+        if state != Gst.State.PLAYING or pending not in (Gst.State.VOID_PENDING, Gst.State.PLAYING):
+            return Gst.PadProbeReturn.OK
         
-        # Set the URI to play
-        self.player.set_property("uri", url)
+        self._play_requested_at = None
+        GLib.idle_add(self._record_time_to_first_audio, time.monotonic() - requested)
+        return Gst.PadProbeReturn.OK
+    
+    def _record_time_to_first_audio(self, seconds):
+        """Record a time to first audio measured by the sink probe"""
+        # A station played meanwhile waits for audio of its own
+        if self._play_requested_at is not None:
+            return False
+        
+        self.last_time_to_first_audio = seconds
+        metrics.TIME_TO_FIRST_AUDIO.observe(seconds)
+        print(f"Time to first audio: {seconds * 1000:.0f} ms")
+        return False
+    
+    def play(self, url, station_name=None, alternate_urls=None):
+        """
+        Play a radio station from the given URL
+        
+        Args:
+            url: Stream URL of the station
+            station_name: Optional name announced to rebroadcast listeners and recorders
+            alternate_urls: Optional other URLs of the station, tried in turn
+                if the stream fails before it played
+        """
+        # Replaying the timeshifted station goes on from its buffer
+        if self.can_resume(url):
+            self.resume()
+            return
+        
+        self._remember_played(url)
+        self.station_name = station_name
+        self.alternate_urls = list(alternate_urls or [])
+        self._play_requested_at = time.monotonic()
+        self.last_time_to_first_audio = None
+        self.is_buffering = False
+        self.has_played = False
+        self.reconnect.reset()
+        self._start_telemetry()
+        metrics.PLAYS.inc()
+        self._reset_metadata()
+        
+        # The next station announces its own format to the stream taps
+        self._tap_type = None
+        self._tap_pending = []
+        
+        # Swap in the standby pipeline if it already pre-rolled this URL
+        if (self.preroll_enabled and not self.timeshift_enabled and
+                self.standby is not None and url == self.standby_url):
+            self._swap_in_standby(url)
+            return
+        
+        # Stop whatever is playing or paused first
+        self.stop()
+        
+        # Set the URI to play, preferring the already resolved stream URL
+        self.stream_url = self._stream_url_for(url)
+        if self.timeshift_enabled:
+            # Ingest on a connection of our own and play from the local buffer
+            self.timeshift = TimeshiftSession(url, self.resolver).start()
+            self.stream_url = self.timeshift.url()
+        self.player.set_property("uri", self.stream_url)
         self.current_url = url
         
         # Start playback
         self.player.set_state(Gst.State.PLAYING)
         self.is_playing = True
+    
+    def _remember_played(self, next_url=None):
+        """
+        Have the resolver cache the URL of a station that played, once it
+        no longer plays, so its own connection is never doubled
+        
+        Args:
+            next_url: URL about to be played, which is never resolved now
+        """
+        if self.resolver and self.has_played and self.current_url and self.current_url != next_url:
+            self.resolver.prewarm([self.current_url])
+    
+    def _stream_url_for(self, url):
+        """Return the cached direct stream URL for a station URL, or the URL itself"""
+        if self.resolver:
+            return self.resolver.lookup(url) or url
+        return url
+    
+    def _fall_back_to_original_url(self):
+        """
+        Retry the current station with its original URL after the resolved
+        stream URL failed
+        
+        Returns:
+            bool: True if playback was restarted with the original URL
+        """
+        if not self.resolver or not self.current_url or self.stream_url == self.current_url:
+            return False
+        
+        # The timeshift session resolves and reconnects on its own
+        if self.timeshift:
+            return False
+        
+        print(f"Resolved stream URL failed, retrying {self.current_url}")
+        self.resolver.invalidate(self.current_url)
+        self.stream_url = self.current_url
+        self.player.set_state(Gst.State.NULL)
+        self.player.set_property("uri", self.stream_url)
+        self.player.set_state(Gst.State.PLAYING)
+        return True
+    
+    def _fail_over_to_alternate(self):
+        """
+        Switch to the next alternate URL of the station after the current
+        one failed before it played
+        
+        Returns:
+            bool: True if playback was restarted with an alternate URL
+        """
+        # The timeshift session is bound to the URL it ingests
+        if not self.alternate_urls or self.timeshift:
+            return False
+        
+        url = self.alternate_urls.pop(0)
+        print(f"Stream failed, trying alternate URL {url}")
+        self.current_url = url
+        self.stream_url = self._stream_url_for(url)
+        self.player.set_state(Gst.State.NULL)
+        self.player.set_property("uri", self.stream_url)
+        self.player.set_state(Gst.State.PLAYING)
+        return True
+    
+    def preroll(self, url):
+        """
+        Pre-roll a station in the standby pipeline so that playing it is instant
+        
+        Args:
+            url: Stream URL of the station that is likely to be played next
+        """
+        if not self.preroll_enabled or self.timeshift_enabled or not url:
+            return
+        
+        # Nothing to do if it is already playing or already pre-rolled
+        if (url == self.current_url and self.is_playing) or url == self.standby_url:
+            return
+        
+        # The standby pipeline may still be fading out, pre-roll once it is done
+        if self._fade_source_id is not None:
+            self._pending_preroll_url = url
+            return
+        
+        if self.standby is None:
+            self.standby = self._create_pipeline("standby")
+        
+        # Connect, buffer and negotiate decoders without producing sound
+        self.standby_stream_url = self._stream_url_for(url)
+        self.standby.set_state(Gst.State.NULL)
+        self.standby.set_property("uri", self.standby_stream_url)
+        self.standby.set_property("volume", 0.0)
+        self.standby.set_state(Gst.State.PAUSED)
+        self.standby_url = url
+        self._standby_metadata = {}
+    
+    def cancel_preroll(self):
+        """Release the standby pipeline and its connection"""
+        self._pending_preroll_url = None
+        self._finish_crossfade()
+        if self.standby is not None:
+            self.standby.set_state(Gst.State.NULL)
+        self.standby_url = None
+    
+    def _swap_in_standby(self, url):
+        """
+        Make the pre-rolled standby pipeline the active one
+        
+        Args:
+            url: URL the standby pipeline has pre-rolled
+        """
+        self._finish_crossfade()
+        
+        outgoing = self.player
+        was_playing = self.is_playing
+        self.player, self.standby = self.standby, outgoing
+        self.stream_url = self.standby_stream_url
+        self.standby_url = None
+        self.current_url = url
+        
+        # Show the tags the standby pipeline already received
+        self.metadata, self._standby_metadata = self._standby_metadata, {}
+        if self.metadata:
+            self._schedule_metadata_delivery()
+        
+        if was_playing and config.CROSSFADE_MS > 0:
+            # Fade the new station in while the old one fades out
+            self.player.set_property("volume", 0.0)
+            self.player.set_state(Gst.State.PLAYING)
+            self._start_crossfade(outgoing)
+        else:
+            outgoing.set_state(Gst.State.NULL)
+            self.player.set_property("volume", self.volume)
+            self.player.set_state(Gst.State.PLAYING)
+        
+        self.is_playing = True
+    
+    def _start_crossfade(self, outgoing):
+        """
+        Ramp the active pipeline up and the outgoing pipeline down
+        
+        Args:
+            outgoing: Pipeline that was playing before the swap
+        """
+        steps = max(1, config.CROSSFADE_MS // config.CROSSFADE_STEP_MS)
+        progress = {'step': 0}
+        self._fade_outgoing = outgoing
+        
+        def _fade_step():
+            progress['step'] += 1
+            level = progress['step'] / steps
+            self.player.set_property("volume", self.volume * level)
+            outgoing.set_property("volume", self.volume * (1.0 - level))
+            
+            if progress['step'] >= steps:
+                self._fade_source_id = None
+                self._finish_crossfade()
+                
+                # Pre-roll whatever was requested during the fade
+                pending_url, self._pending_preroll_url = self._pending_preroll_url, None
+                if pending_url:
+                    self.preroll(pending_url)
+                return False
+            return True
+        
+        self._fade_source_id = GLib.timeout_add(config.CROSSFADE_STEP_MS, _fade_step)
+    
+    def _finish_crossfade(self):
+        """Complete any running crossfade immediately"""
+        if self._fade_source_id is not None:
+            GLib.source_remove(self._fade_source_id)
+            self._fade_source_id = None
+        
+        if self._fade_outgoing is not None:
+            self._fade_outgoing.set_state(Gst.State.NULL)
+            self._fade_outgoing = None
+            self.player.set_property("volume", self.volume)
         
     def pause(self):
         """Pause the current playback"""
+        self.reconnect.cancel()
+        self._finish_crossfade()
+        self.is_buffering = False
         if self.is_playing:
             self.player.set_state(Gst.State.PAUSED)
             self.is_playing = False
     
+    def can_resume(self, url):
+        """
+        Check whether a station is paused with its timeshift buffer kept
+        
+        Args:
+            url: Station URL about to be played
+        
+        Returns:
+            bool: True if resume() continues the station from where it was paused
+        """
+        return (not self.is_playing and self.timeshift is not None and
+                url == self.current_url and not self.timeshift.buffer.closed)
+    
     def resume(self):
         """Resume playback after pausing"""
         if not self.is_playing and self.current_url:
             self.player.set_state(Gst.State.PLAYING)
             self.is_playing = True
+            self._start_telemetry()
     
     def stop(self):
         """Stop the current playback"""
+        self._remember_played()
+        self.reconnect.reset()
+        self._finish_crossfade()
         self.player.set_state(Gst.State.NULL)
         self.is_playing = False
+        self.is_buffering = False
+        self.buffer_level = 0
+        
+        if self.timeshift:
+            self.timeshift.stop()
+            self.timeshift = None
+    
+    def set_timeshift(self, enabled):
+        """
+        Enable or disable timeshift mode, it applies from the next station played
+        
+        Args:
+            enabled: Whether to play through a local timeshift buffer
+        """
+        self.timeshift_enabled = enabled
+        if enabled:
+            self.cancel_preroll()
+    
+    def rewind(self, seconds):
+        """
+        Jump back in a timeshifted station
+        
+        Args:
+            seconds: How far to go back from what is currently heard
+        """
+        if not self.timeshift:
+            return
+        
+        # Audio already queued in the pipeline has not been heard yet
+        position = self.timeshift.served_offset
+        queue = self._queues.get(self.player)
+        if queue is not None:
+            position -= queue.get_property("current-level-bytes")
+        
+        self._restart_timeshift(self.timeshift.rewind_offset(seconds, position))
+    
+    def go_live(self):
+        """Jump to the live edge of a timeshifted station"""
+        if self.timeshift:
+            self._restart_timeshift(None)
+    
+    def _restart_timeshift(self, offset):
+        """Restart the pipeline on the timeshift buffer at an offset (None for live)"""
+        self.stream_url = self.timeshift.url(offset)
+        self.player.set_state(Gst.State.NULL)
+        self.player.set_property("uri", self.stream_url)
+        self.player.set_state(Gst.State.PLAYING)
+        
+        if not self.is_playing:
+            self.is_playing = True
+            self._start_telemetry()
     
     def set_volume(self, volume):
         """Set the playback volume (0.0 to 1.0)"""
-        self.player.set_property("volume", volume)
+        self.volume = volume
+        
+        # A running crossfade picks up the new volume on its next step
+        if self._fade_source_id is None:
+            self.player.set_property("volume", volume)
     
     def get_stream_info(self):
         """
-        Get information about the current stream such as bitrate, codec, etc.
+        Get information about the current stream such as codec, sample rate, etc.
         Returns a dictionary with the available information
         """
         info = {}
@@ -76,42 +581,352 @@ class RadioPlayer:
         if not self.is_playing:
             return info
         
-        try:
-            # Get the current audio sink pad
-            sink_pad = self.player.get_static_pad("sink")
-            if not sink_pad:
-                return info
+        # Decoded format negotiated on the pad that feeds the audio sink
+        pad = self.player.emit("get-audio-pad", 0)
+        caps = pad.get_current_caps() if pad else None
+        if caps and caps.get_size():
+            structure = caps.get_structure(0)
+            info['format'] = structure.get_string("format") or structure.get_name()
             
-            # Get the negotiated caps
-            caps = sink_pad.get_current_caps()
-            if not caps:
-                return info
+            found, channels = structure.get_int("channels")
+            if found:
+                info['channels'] = channels
             
-            # Extract information from the caps
-            for i in range(caps.get_size()):
-                structure = caps.get_structure(i)
-                if structure:
-                    # Get the codec/format
-                    info['format'] = structure.get_name()
-                    
-                    # Get audio channels
-                    channels = structure.get_value("channels")
-                    if channels:
-                        info['channels'] = channels
-                    
-                    # Get sample rate
-                    rate = structure.get_value("rate")
-                    if rate:
-                        info['sample_rate'] = f"{rate/1000:.1f} kHz"
-        except:
-            pass
+            found, rate = structure.get_int("rate")
+            if found:
+                info['sample_rate'] = f"{rate/1000:.1f} kHz"
+        
+        # Codec and announced bitrate from the demuxer and decoder tags
+        tags = self.player.emit("get-audio-tags", 0)
+        if tags:
+            found, codec = tags.get_string(Gst.TAG_AUDIO_CODEC)
+            if found:
+                info['codec'] = codec
+            
+            found, bitrate = tags.get_uint(Gst.TAG_BITRATE)
+            if not found:
+                found, bitrate = tags.get_uint(Gst.TAG_NOMINAL_BITRATE)
+            if found:
+                info['announced_bitrate'] = bitrate // 1000
         
         return info
     
+    def get_stats(self):
+        """
+        Get a snapshot of playback telemetry, suitable for logging
+        
+        Returns:
+            dict: Telemetry of the active pipeline
+        """
+        stats = {
+            'url': self.current_url,
+            'stream_url': self.stream_url,
+            'playing': self.is_playing,
+            'profile': self.profile_name,
+            'input_bitrate': self.input_bitrate,
+            'buffer_level': self.buffer_level,
+            'buffer_ms': None,
+            'time_to_first_audio_ms': None,
+            'reconnects': self.reconnect.total_reconnects,
+            'underruns': self.underruns,
+        }
+        
+        if self.rebroadcaster:
+            stats['rebroadcast'] = self.rebroadcaster.get_stats()
+        
+        if self.timeshift:
+            stats['timeshift'] = self.timeshift.get_stats()
+        
+        if self.last_time_to_first_audio is not None:
+            stats['time_to_first_audio_ms'] = int(self.last_time_to_first_audio * 1000)
+        
+        # Amount of audio waiting in the network queue
+        queue = self._queues.get(self.player)
+        if queue is not None:
+            stats['buffer_ms'] = queue.get_property("current-level-time") // Gst.MSECOND
+        
+        stats.update(self.stream_info)
+        return stats
+    
+    def set_telemetry_callback(self, callback):
+        """Set a callback function to receive periodic telemetry from get_stats()"""
+        self.telemetry_callback = callback
+    
+    def _start_telemetry(self):
+        """Start sampling telemetry while a station plays"""
+        self._bitrate_sample = None
+        self.input_bitrate = None
+        self.stream_info = {}
+        if self._telemetry_source_id is None:
+            self._telemetry_source_id = GLib.timeout_add(
+                config.TELEMETRY_INTERVAL_MS, self._sample_telemetry)
+    
+    def _sample_telemetry(self):
+        """Sample the input bitrate and stream format, then report them"""
+        if not self.is_playing:
+            self._telemetry_source_id = None
+            return False
+        
+        # Input bitrate from the bytes counted on the network source
+        now = time.monotonic()
+        received = self._bytes_in.get(self.player, 0)
+        previous = self._bitrate_sample
+        if previous and received >= previous[1] and now > previous[0]:
+            self.input_bitrate = int((received - previous[1]) * 8 / (now - previous[0]) / 1000)
+        self._bitrate_sample = (now, received)
+        
+        self.stream_info = self.get_stream_info()
+        
+        if self.telemetry_callback:
+            self.telemetry_callback(self.get_stats())
+        return True
+    
+    def _on_source_setup(self, pipeline, source):
+        """Count the bytes received by a newly created network source"""
+        self._bytes_in[pipeline] = 0
+        pad = source.get_static_pad("src")
+        if pad:
+            pad.add_probe(Gst.PadProbeType.BUFFER, self._on_source_buffer, pipeline)
+    
+    def _on_source_buffer(self, pad, info, pipeline):
+        """Add the size of a received buffer to the byte counter"""
+        buffer = info.get_buffer()
+        if buffer:
+            self._bytes_in[pipeline] = self._bytes_in.get(pipeline, 0) + buffer.get_size()
+            
+            # ICY streams are tapped behind icydemux instead
+            if self.stream_taps:
+                caps = pad.get_current_caps()
+                if not caps or caps.get_structure(0).get_name() != ICY_CAPS_NAME:
+                    self._feed_stream_taps(caps, buffer, pipeline)
+        return Gst.PadProbeReturn.OK
+    
+    def _on_encoded_buffer(self, pad, info, pipeline):
+        """Pass encoded audio from icydemux to the stream taps"""
+        buffer = info.get_buffer()
+        if buffer and self.stream_taps:
+            self._feed_stream_taps(pad.get_current_caps(), buffer, pipeline)
+        return Gst.PadProbeReturn.OK
+    
+    def add_stream_tap(self, tap):
+        """
+        Hand the received, still encoded stream to a consumer
+        
+        Args:
+            tap: Object with set_source(content_type, station_name) and
+                feed(data) methods, called from streaming threads
+        """
+        if self._tap_type is not None:
+            tap.set_source(self._tap_type, self.station_name)
+        self.stream_taps = self.stream_taps + [tap]
+    
+    def remove_stream_tap(self, tap):
+        """Stop handing the stream to a consumer added with add_stream_tap()"""
+        self.stream_taps = [other for other in self.stream_taps if other is not tap]
+    
+    def set_rebroadcaster(self, rebroadcaster):
+        """
+        Share the received stream with other players on the network
+        
+        Args:
+            rebroadcaster: StreamRebroadcaster to feed, or None to stop sharing
+        """
+        if self.rebroadcaster is not None:
+            self.remove_stream_tap(self.rebroadcaster)
+        self.rebroadcaster = rebroadcaster
+        if rebroadcaster is not None:
+            self.add_stream_tap(rebroadcaster)
+    
+    def _feed_stream_taps(self, caps, buffer, pipeline):
+        """
+        Feed an encoded buffer of the active pipeline to the stream taps
+        
+        Runs in a streaming thread. Data that arrives before the stream format
+        is known is held back and sent once the format is detected.
+        
+        Args:
+            caps: Caps of the pad the buffer was seen on, may be None
+            buffer: The encoded Gst.Buffer
+            pipeline: Pipeline the buffer belongs to
+        """
+        taps = self.stream_taps
+        if not taps or pipeline is not self.player:
+            return
+        
+        data = buffer.extract_dup(0, buffer.get_size())
+        
+        if self._tap_type is None:
+            caps = caps or self._typefind_caps.get(pipeline)
+            if caps is None:
+                # Bounded like the backlog new listeners get
+                if sum(len(chunk) for chunk in self._tap_pending) < config.REBROADCAST_BACKLOG:
+                    self._tap_pending.append(data)
+                return
+            
+            self._tap_type = caps_to_content_type(caps)
+            for tap in taps:
+                tap.set_source(self._tap_type, self.station_name)
+                for chunk in self._tap_pending:
+                    tap.feed(chunk)
+            self._tap_pending = []
+        
+        for tap in taps:
+            tap.feed(data)
+    
     def set_metadata_callback(self, callback):
         """Set a callback function to receive metadata updates"""
         self.metadata_callback = callback
     
+    def _extract_metadata(self, tags):
+        """
+        Pick the tags shown to the user from a tag list
+        
+        Args:
+            tags: Gst.TagList from a TAG message
+        
+        Returns:
+            dict: Non-empty values of METADATA_TAGS, and the bitrate in kbps
+        """
+        metadata = {}
+        for tag in METADATA_TAGS:
+            found, value = tags.get_string(tag)
+            if found and value and value.strip():
+                metadata[tag] = value.strip()
+        
+        # The nominal bitrate does not change with every VBR frame
+        found, bitrate = tags.get_uint(Gst.TAG_NOMINAL_BITRATE)
+        if not found:
+            found, bitrate = tags.get_uint(Gst.TAG_BITRATE)
+        if found and bitrate:
+            metadata['bitrate'] = bitrate // 1000
+        return metadata
+    
+    def _reset_metadata(self):
+        """Forget the metadata of the previous station"""
+        if self._metadata_source_id is not None:
+            GLib.source_remove(self._metadata_source_id)
+            self._metadata_source_id = None
+        self.metadata = {}
+        self._delivered_metadata = None
+    
+    def _schedule_metadata_delivery(self):
+        """Deliver metadata once per coalescing interval, however many tags arrive"""
+        if self._metadata_source_id is None:
+            self._metadata_source_id = GLib.timeout_add(
+                config.METADATA_COALESCE_MS, self._deliver_metadata)
+    
+    def _deliver_metadata(self):
+        """Notify the callback if any of the delivered fields actually changed"""
+        self._metadata_source_id = None
+        
+        if self.metadata != self._delivered_metadata:
+            self._delivered_metadata = dict(self.metadata)
+            if self.metadata_callback:
+                self.metadata_callback(dict(self.metadata))
+        return False
+    
+    def set_buffering_callback(self, callback):
+        """Set a callback function to receive the buffer fill level (0-100)"""
+        self.buffering_callback = callback
+    
+    def _on_buffering(self, percent):
+        """
+        Pause while the stream queue refills and resume once it is full enough
+        
+        The queue reports less than 100% once it drained below the low
+        watermark and 100% when it is back above the high watermark.
+        
+        Args:
+            percent: Buffer fill level reported by the pipeline
+        """
+        self.buffer_level = percent
+        
+        if percent < 100 and self.is_playing and not self.is_buffering:
+            self.is_buffering = True
+            if self.has_played:
+                self.underruns += 1
+                metrics.BUFFERING_UNDERRUN.inc()
+            else:
+                metrics.BUFFERING_STARTUP.inc()
+            self.player.set_state(Gst.State.PAUSED)
+        elif percent >= 100 and self.is_buffering:
+            self.is_buffering = False
+            if self.is_playing:
+                self.player.set_state(Gst.State.PLAYING)
+        
+        if self.buffering_callback:
+            self.buffering_callback(percent)
+    
+    def set_state_callback(self, callback):
+        """
+        Set a callback function to receive playback state changes
+        
+        The callback is called with the state ('playing', 'reconnecting' or
+        'failed') and the number of the current reconnect attempt.
+        """
+        self.state_callback = callback
+    
+    def _notify_state(self, state):
+        """Report a playback state change to the callback"""
+        if self.state_callback:
+            self.state_callback(state, self.reconnect.attempts)
+    
+    def _on_stream_failure(self):
+        """Schedule a reconnect after the stream failed or ended"""
+        # Several elements may report the same failure
+        if not self.is_playing or self.reconnect.is_pending:
+            return
+        
+        self.player.set_state(Gst.State.NULL)
+        
+        # A resolved URL that never played may be stale, try the original one
+        if not self.has_played and self._fall_back_to_original_url():
+            return
+        
+        # A station listed several times may still play from another URL
+        if not self.has_played and self._fail_over_to_alternate():
+            return
+        
+        delay = self.reconnect.next_delay()
+        if delay is None:
+            print("Giving up reconnecting to the stream")
+            self.stop()
+            self._notify_state('failed')
+            return
+        
+        print(f"Reconnecting in {delay:.1f} s (attempt {self.reconnect.attempts})")
+        metrics.RECONNECTS.inc()
+        self._notify_state('reconnecting')
+        self.reconnect.schedule(delay, self._reconnect)
+    
+    def _reconnect(self):
+        """Restart the current stream, reusing the resolved URL"""
+        if not self.is_playing or not self.stream_url:
+            return
+        
+        self.player.set_state(Gst.State.NULL)
+        self.player.set_property("uri", self.stream_url)
+        self.player.set_state(Gst.State.PLAYING)
+    
+    def _on_bus_message(self, bus, message, pipeline):
+        """Dispatch bus messages depending on which pipeline sent them"""
+        if pipeline is self.player:
+            self.on_message(bus, message)
+        elif pipeline is self.standby:
+            self._on_standby_message(message)
+    
+    def _on_standby_message(self, message):
+        """Handle messages from the standby pipeline"""
+        if message.type == Gst.MessageType.ERROR:
+            # Drop the pre-rolled station, it will be played the normal way
+            err, debug = message.parse_error()
+            print(f"Pre-roll failed: {err.message}")
+            self.cancel_preroll()
+        
+        elif message.type == Gst.MessageType.TAG:
+            # Keep the tags so they can be shown as soon as it is swapped in
+            self._standby_metadata.update(self._extract_metadata(message.parse_tag()))
+    
     def on_message(self, bus, message):
         """Handle messages from the GStreamer bus"""
         t = message.type
@@ -119,30 +934,35 @@ class RadioPlayer:
         if t == Gst.MessageType.ERROR:
             err, debug = message.parse_error()
             print(f"Error: {err.message}")
-            self.stop()
+            self._on_stream_failure()
         
         elif t == Gst.MessageType.EOS:
             # End of stream, this shouldn't happen for radio stations
-            # but just in case, restart the stream
-            self.player.set_state(Gst.State.NULL)
-            self.player.set_state(Gst.State.PLAYING)
+            # but just in case, reconnect to the stream
+            self._on_stream_failure()
         
         elif t == Gst.MessageType.STATE_CHANGED:
             # Track state changes for debugging
             if message.src == self.player:
                 old_state, new_state, pending_state = message.parse_state_changed()
                 print(f"Pipeline state changed from {old_state.value_nick} to {new_state.value_nick}")
+                
+                # Reaching PLAYING means the stream (re)connected
+                if new_state == Gst.State.PLAYING:
+                    self.has_played = True
+                    if self.reconnect.connected_at is None:
+                        self.reconnect.mark_connected()
+                        if self.reconnect.attempts:
+                            self._notify_state('playing')
+        
+        elif t == Gst.MessageType.BUFFERING:
+            self._on_buffering(message.parse_buffering())
         
         elif t == Gst.MessageType.TAG:
             # Extract metadata from the stream
-            tags = message.parse_tag()
-            
-            # Process the tags
-            tags_dict = {}
-            tags.foreach(lambda tag, val: tags_dict.update({tag: val}))
+            tags_dict = self._extract_metadata(message.parse_tag())
             
-            # Update metadata and notify callback
+            # Update metadata and notify callback once the burst is over
             if tags_dict:
                 self.metadata.update(tags_dict)
-                if self.metadata_callback:
-                    self.metadata_callback(self.metadata)
\ No newline at end of file
+                self._schedule_metadata_delivery()
\ No newline at end of file
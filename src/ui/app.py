@@ -5,10 +5,19 @@ from gi.repository import Gtk, Gdk, GLib
 
 # Convert relative imports to absolute imports
 from src.player import RadioPlayer
-from src.utils import config
+from src.utils import config, metrics
 from src.utils.downloader import StationDownloader
+from src.utils.executor import get_executor, PRIORITY_REFRESH
+from src.utils.resolver import StreamResolver
+from src.utils.rebroadcast import StreamRebroadcaster
+from src.utils.recorder import RecordingManager
+from src.utils.health import HealthStore, HealthProber
+from src.utils.refresh import CatalogRefresher
+from src.utils.watchdog import StallWatchdog
 from src.ui.now_playing import NowPlayingView
 from src.ui.stations import StationsList
+from src.catalog.stations import StationCatalog, TAG_FILTER_PREFIX
+from src.catalog.remote import RemoteCatalog
 
 # Add main function for entry point
 def main():
@@ -23,10 +32,52 @@ class RadioApp(Gtk.Application):
     def __init__(self):
         super().__init__(application_id="com.framenux.radio")
         self.connect("activate", self.on_activate)
+        self.connect("shutdown", self.on_shutdown)
+        
+        # Background work shares one executor; its callbacks run on the main loop
+        self.executor = get_executor()
+        self.executor.attach(GLib.idle_add)
+        
+        # Opt-in report of what blocks the main loop
+        self.watchdog = None
+        if config.WATCHDOG_ENABLED:
+            self.watchdog = StallWatchdog()
+            self.watchdog.start(lambda ms, callback: GLib.timeout_add(ms, callback, priority=GLib.PRIORITY_HIGH))
+        
+        # Metrics for fleet monitoring, if a port or file is configured
+        self.metrics_exporter = None
+        if config.METRICS_PORT is not None or config.METRICS_FILE_PATH:
+            if self.watchdog:
+                metrics.REGISTRY.counter('framenux_main_loop_stalls_total', "Main-loop stalls over the threshold",
+                                         function=lambda: self.watchdog.stall_count)
+            self.metrics_exporter = metrics.MetricsExporter().start()
+        
+        # Resolve playlist and redirect URLs of likely stations in the background
+        self.resolver = StreamResolver()
+        self.resolver.prewarm_recent()
         
         # Initialize the radio player
-        self.player = RadioPlayer()
+        self.player = RadioPlayer(resolver=self.resolver)
         self.player.set_metadata_callback(self.on_metadata_update)
+        self.player.set_buffering_callback(self.on_buffering_update)
+        self.player.set_state_callback(self.on_player_state_changed)
+        self.player.set_telemetry_callback(self.on_telemetry_update)
+        
+        # Share the playing stream with other rooms if enabled
+        self.rebroadcaster = None
+        if config.REBROADCAST_ENABLED:
+            self.rebroadcaster = StreamRebroadcaster().start()
+            self.player.set_rebroadcaster(self.rebroadcaster)
+        
+        # Passthrough recordings of the playing station
+        self.recordings = RecordingManager(self.player, self.resolver)
+        
+        # Reachability and latency of stations, probed in the background
+        self.health = HealthStore()
+        self.health_prober = HealthProber(self.health)
+        
+        # Conditional background refreshes of the downloaded stations list
+        self.catalog_refresher = CatalogRefresher(on_updated=self.on_catalog_refreshed)
         
         # Current state
         self.current_station = None
@@ -89,24 +140,48 @@ class RadioApp(Gtk.Application):
         
         # Search entry
         self.search_entry = Gtk.SearchEntry()
-        self.search_entry.set_placeholder_text("Search stations...")
+        self.search_entry.set_placeholder_text("Search stations or #tags...")
         self.search_entry.connect("search-changed", self.on_search_changed)
         search_box.pack_start(self.search_entry, True, True, 0)
         
-        # Filter dropdown
-        filter_combo = Gtk.ComboBoxText()
-        filter_combo.append_text("All Stations")
-        filter_combo.append_text("By Country")
-        filter_combo.append_text("By Language")
-        filter_combo.append_text("Favorites")
-        filter_combo.set_active(0)
-        filter_combo.connect("changed", self.on_filter_changed)
-        search_box.pack_start(filter_combo, False, False, 0)
+        # Filter dropdown, the most used tags are added once stations are loaded
+        self.filter_combo = Gtk.ComboBoxText()
+        self.filter_combo.append_text("All Stations")
+        self.filter_combo.append_text("By Country")
+        self.filter_combo.append_text("By Language")
+        self.filter_combo.append_text("Favorites")
+        self.filter_combo.append_text("Reachable Only")
+        self.filter_combo.append_text("Fastest First")
+        if config.NEARBY_LOCATION is not None:
+            self.filter_combo.append_text("Nearby")
+        self.fixed_filter_count = len(self.filter_combo.get_model())
+        self.filter_combo.set_active(0)
+        self.filter_combo.connect("changed", self.on_filter_changed)
+        search_box.pack_start(self.filter_combo, False, False, 0)
+        
+        # Sort order dropdown, the catalog comes sorted by votes
+        sort_combo = Gtk.ComboBoxText()
+        sort_combo.append("", "Top Voted")
+        sort_combo.append("name", "Name")
+        sort_combo.append("bitrate", "Bitrate")
+        sort_combo.append("clickcount", "Most Played")
+        sort_combo.append("clicktrend", "Trending")
+        sort_combo.set_active_id("")
+        sort_combo.connect("changed", self.on_sort_changed)
+        search_box.pack_start(sort_combo, False, False, 0)
         
         left_box.pack_start(search_box, False, False, 0)
         
         # Initialize the stations list manager
-        self.stations_manager = StationsList(on_station_activated=self.on_station_activated)
+        self.stations_manager = StationsList(
+            on_station_activated=self.on_station_activated,
+            on_station_hovered=self.on_station_hovered,
+            on_favorites_changed=self.on_favorites_changed,
+            catalog=RemoteCatalog() if config.CATALOG_SOURCE == "remote" else None,
+            on_rows_shown=self.on_rows_shown
+        )
+        self.stations_manager.set_health_store(self.health)
+        self.on_favorites_changed(self.stations_manager.favorites)
         
         # Add status label to left box
         left_box.pack_start(self.stations_manager.status_label, False, False, 0)
@@ -176,6 +251,24 @@ class RadioApp(Gtk.Application):
         stop_button.connect("clicked", self.on_stop_clicked)
         buttons_box.pack_start(stop_button, False, False, 0)
         
+        # Rewind and back-to-live buttons, only useful while timeshifting
+        rewind_button = Gtk.Button()
+        rewind_icon = Gtk.Image.new_from_icon_name("media-seek-backward-symbolic", Gtk.IconSize.BUTTON)
+        rewind_button.add(rewind_icon)
+        rewind_button.set_tooltip_text(f"Rewind {config.TIMESHIFT_REWIND_SECONDS} Seconds")
+        rewind_button.connect("clicked", self.on_rewind_clicked)
+        buttons_box.pack_start(rewind_button, False, False, 0)
+        
+        live_button = Gtk.Button()
+        live_icon = Gtk.Image.new_from_icon_name("media-seek-forward-symbolic", Gtk.IconSize.BUTTON)
+        live_button.add(live_icon)
+        live_button.set_tooltip_text("Back to Live")
+        live_button.connect("clicked", self.on_live_clicked)
+        buttons_box.pack_start(live_button, False, False, 0)
+        
+        for button in (rewind_button, live_button):
+            button.set_no_show_all(not self.player.timeshift_enabled)
+        
         # Favorite button
         self.favorite_button = Gtk.ToggleButton()
         favorite_icon = Gtk.Image.new_from_icon_name("non-starred-symbolic", Gtk.IconSize.BUTTON)
@@ -183,6 +276,14 @@ class RadioApp(Gtk.Application):
         self.favorite_handler_id = self.favorite_button.connect("toggled", self.on_favorite_toggled)
         buttons_box.pack_start(self.favorite_button, False, False, 0)
         
+        # Record button
+        self.record_button = Gtk.ToggleButton()
+        record_icon = Gtk.Image.new_from_icon_name("media-record-symbolic", Gtk.IconSize.BUTTON)
+        self.record_button.add(record_icon)
+        self.record_button.set_tooltip_text("Record Station")
+        self.record_button.connect("toggled", self.on_record_toggled)
+        buttons_box.pack_start(self.record_button, False, False, 0)
+        
         controls_box.pack_start(buttons_box, False, False, 0)
         
         # Volume control
@@ -201,6 +302,16 @@ class RadioApp(Gtk.Application):
         
         controls_box.pack_start(volume_box, False, False, 0)
         
+        # Playback profile (buffering vs. latency trade-off)
+        profile_combo = Gtk.ComboBoxText()
+        for name, profile in config.PLAYBACK_PROFILES.items():
+            profile_combo.append(name, profile['label'])
+        profile_combo.set_active_id(self.player.profile_name)
+        profile_combo.set_tooltip_text("Playback Profile")
+        profile_combo.set_halign(Gtk.Align.CENTER)
+        profile_combo.connect("changed", self.on_profile_changed)
+        controls_box.pack_start(profile_combo, False, False, 0)
+        
         # Add controls to the right box
         right_box.pack_start(controls_box, False, False, 0)
         
@@ -249,10 +360,66 @@ class RadioApp(Gtk.Application):
     def check_stations_file(self):
         """Check if the stations file exists and load it"""
         import os
-        if os.path.exists(config.STATIONS_JSON_PATH):
-            return self.stations_manager.load_stations()
+        # The remote source needs no stations file
+        if config.CATALOG_SOURCE == "remote" or os.path.exists(config.STATIONS_JSON_PATH):
+            return self.stations_manager.load_stations(on_loaded=self.on_stations_loaded)
         return False
     
+    def on_stations_loaded(self):
+        """Offer the tag filters and start the background work of a loaded catalog"""
+        self.populate_tag_filters()
+        self.start_health_checks()
+        self.start_catalog_refresh()
+    
+    def populate_tag_filters(self):
+        """Offer the most used tags of the catalog in the filter dropdown"""
+        # Drop the tags of a previous catalog
+        while len(self.filter_combo.get_model()) > self.fixed_filter_count:
+            self.filter_combo.remove(self.fixed_filter_count)
+        
+        for tag, count in self.stations_manager.catalog.tag_counts(config.TAG_FILTER_LIMIT):
+            self.filter_combo.append(f"{TAG_FILTER_PREFIX}{tag}", f"Tag: {tag} ({count})")
+    
+    def start_catalog_refresh(self):
+        """Refresh the downloaded stations list in the background whenever it is stale"""
+        if config.CATALOG_AUTO_REFRESH and config.CATALOG_SOURCE != "remote":
+            self.catalog_refresher.start()
+    
+    def on_catalog_refreshed(self):
+        """
+        Load a changed stations list in the background, then show it
+        
+        Parsing and indexing happen on the executor so the window stays
+        responsive; only the finished catalog is handed to the main loop.
+        """
+        def _load_catalog():
+            catalog = StationCatalog()
+            catalog.load(incremental=True)
+            return catalog
+        
+        self.executor.submit(PRIORITY_REFRESH, _load_catalog, on_complete=self.apply_refreshed_catalog,
+                             on_error=lambda e: print(f"Failed to load the refreshed stations list: {e}"))
+    
+    def apply_refreshed_catalog(self, catalog):
+        """Show a refreshed catalog without losing the user's place"""
+        previous = self.stations_manager.catalog
+        self.stations_manager.replace_catalog(catalog)
+        print(f"Stations list updated, {len(catalog)} stations")
+        
+        # Freeing the old catalog at once would stall the window
+        self.executor.submit(PRIORITY_REFRESH, previous.release)
+    
+    def start_health_checks(self):
+        """Probe the favorites in the background, the listed stations follow as they are shown"""
+        # Every probe connects to a broadcaster, so never the whole catalog
+        if config.HEALTH_CHECKS_ENABLED:
+            self.health_prober.start(self.stations_manager.favorites)
+    
+    def on_rows_shown(self, stations):
+        """Probe the stations just added to the list"""
+        if config.HEALTH_CHECKS_ENABLED:
+            self.health_prober.start(stations)
+    
     def show_download_dialog(self):
         """Show dialog to confirm downloading the station list"""
         dialog = Gtk.MessageDialog(
@@ -282,7 +449,8 @@ class RadioApp(Gtk.Application):
         # Create downloader with callbacks
         downloader = StationDownloader(
             on_complete=self.on_download_complete,
-            on_error=self.on_download_error
+            on_error=self.on_download_error,
+            refresher=self.catalog_refresher
         )
         
         # Start the download
@@ -315,10 +483,24 @@ class RadioApp(Gtk.Application):
             self.progress_dialog.destroy()
             delattr(self, 'progress_dialog')
     
-    def on_download_complete(self):
-        """Handle successful download"""
+    def on_download_complete(self, changed=True):
+        """
+        Handle successful download
+        
+        Args:
+            changed: Whether the downloaded stations list differs from the current one
+        """
         self.close_progress_dialog()
-        self.stations_manager.load_stations()
+        
+        # An update of a loaded catalog is applied without losing the user's place
+        if len(self.stations_manager.catalog):
+            if changed:
+                self.on_catalog_refreshed()
+            else:
+                print("The stations list is up to date")
+            return
+        
+        self.stations_manager.load_stations(on_loaded=self.on_stations_loaded)
     
     def on_download_error(self, error_message):
         """Handle download error"""
@@ -363,8 +545,14 @@ class RadioApp(Gtk.Application):
     
     def on_filter_changed(self, combo):
         """Handle filter dropdown changes"""
-        filter_text = combo.get_active_text()
-        self.stations_manager.filter_stations(filter_text)
+        # Tag entries carry the filter in their ID, the others in their text
+        filter_text = combo.get_active_id() or combo.get_active_text()
+        if filter_text:
+            self.stations_manager.filter_stations(filter_text)
+    
+    def on_sort_changed(self, combo):
+        """Handle sort dropdown changes"""
+        self.stations_manager.set_sort_order(combo.get_active_id() or None)
     
     def on_station_activated(self, station):
         """Handle station selection"""
@@ -389,6 +577,49 @@ class RadioApp(Gtk.Application):
         # Start playing
         self.play_station()
     
+    def on_station_hovered(self, station):
+        """Pre-roll a station the user is likely to play next"""
+        if station is not self.current_station:
+            self.player.preroll(station.get('url'))
+    
+    def on_favorites_changed(self, favorites):
+        """Resolve the stream URLs of favorites ahead of time"""
+        self.resolver.prewarm([station.get('url') for station in favorites])
+    
+    def next_favorite(self):
+        """
+        Get the favorite that follows the current station
+        
+        Returns:
+            dict: The next favorite, or None if there is none other than
+            the current station
+        """
+        favorites = self.stations_manager.favorites
+        if not favorites or not self.current_station:
+            return None
+        
+        current_uuid = self.current_station.get('stationuuid')
+        uuids = [fav.get('stationuuid') for fav in favorites]
+        
+        # Start from the first favorite when the current station is not one
+        index = uuids.index(current_uuid) + 1 if current_uuid in uuids else 0
+        next_station = favorites[index % len(favorites)]
+        
+        if (next_station.get('stationuuid') == current_uuid or
+                next_station.get('url') == self.current_station.get('url')):
+            return None
+        return next_station
+    
+    def preroll_next_favorite(self):
+        """Resolve and pre-roll the favorite that follows the current station"""
+        next_station = self.next_favorite()
+        if next_station is None:
+            return
+        
+        # Never the playing station itself, which would open a second connection to it
+        self.resolver.prewarm([next_station.get('url')])
+        self.player.preroll(next_station.get('url'))
+    
     def on_play_clicked(self, button):
         """Handle play/pause button click"""
         if not self.current_station:
@@ -396,6 +627,9 @@ class RadioApp(Gtk.Application):
             
         if self.is_playing:
             self.pause_station()
+        elif self.player.can_resume(self.current_station.get('url')):
+            # Go on from the timeshift buffer instead of jumping back to live
+            self.resume_station()
         else:
             self.play_station()
     
@@ -403,6 +637,14 @@ class RadioApp(Gtk.Application):
         """Handle stop button click"""
         self.stop_station()
     
+    def on_rewind_clicked(self, button):
+        """Jump back in the timeshift buffer"""
+        self.player.rewind(config.TIMESHIFT_REWIND_SECONDS)
+    
+    def on_live_clicked(self, button):
+        """Jump to the live edge of the timeshift buffer"""
+        self.player.go_live()
+    
     def on_favorite_toggled(self, button):
         """Handle favorite button toggle"""
         if not self.current_station:
@@ -417,6 +659,26 @@ class RadioApp(Gtk.Application):
         else:
             self.stations_manager.remove_favorite(self.current_station)
     
+    def on_record_toggled(self, button):
+        """Start or stop recording the playing station to disk"""
+        if button.get_active():
+            self.recordings.start_current()
+        else:
+            self.recordings.stop_current()
+            button.set_tooltip_text("Record Station")
+    
+    def on_shutdown(self, app):
+        """Flush and close recordings and keep health results before exiting"""
+        self.recordings.stop_all()
+        self.health_prober.cancel()
+        self.health.save()
+        self.catalog_refresher.stop()
+        self.executor.shutdown()
+        if self.watchdog:
+            self.watchdog.stop()
+        if self.metrics_exporter:
+            self.metrics_exporter.stop()
+    
     def on_volume_changed(self, scale):
         """Handle volume change"""
         volume = scale.get_value() / 100.0
@@ -425,15 +687,42 @@ class RadioApp(Gtk.Application):
         except Exception as e:
             self.show_error_dialog(f"Failed to change volume: {str(e)}")
     
+    def on_profile_changed(self, combo):
+        """Handle playback profile changes, restarting the station to apply it"""
+        self.player.set_profile(combo.get_active_id())
+        if self.is_playing:
+            self.play_station()
+    
+    def on_buffering_update(self, percent):
+        """Handle buffer fill level updates from the player"""
+        self.now_playing_view.update_buffering(percent)
+    
+    def on_player_state_changed(self, state, attempt):
+        """Keep the UI in sync with reconnects and failures of the stream"""
+        if state == 'reconnecting':
+            self.now_playing_view.set_status(f"Reconnecting (attempt {attempt})...")
+        elif state == 'playing':
+            self.now_playing_view.set_status("Playing...")
+        elif state == 'failed':
+            self.stop_station()
+            self.now_playing_view.set_status("Station unavailable")
+    
     def on_metadata_update(self, metadata):
         """Handle metadata updates from the stream"""
         # Update the now playing information
         self.now_playing_view.update_now_playing(metadata)
-        
-        # Also check for stream format information
-        stream_info = self.player.get_stream_info()
-        if stream_info:
-            self.now_playing_view.update_stream_info(stream_info)
+    
+    def on_telemetry_update(self, stats):
+        """Handle periodic stream telemetry from the player"""
+        self.now_playing_view.update_stream_info(stats)
+        
+        # Show the progress of a running recording
+        recorder = self.recordings.current_recorder
+        if recorder is not None:
+            recording = recorder.get_stats()
+            self.record_button.set_tooltip_text(
+                f"Recording {recording['bytes_written'] // 1024} KB "
+                f"({recording['throughput_kbps']} kbps) to {recording['file']}")
     
     def play_station(self):
         """Play the current station"""
@@ -446,9 +735,13 @@ class RadioApp(Gtk.Application):
             return
         
         try:
-            self.player.play(url)
+            self.player.play(url, self.current_station.get('name'),
+                             self.current_station.get('alternate_urls'))
             self.is_playing = True
             
+            # Warm up the next favorite while this one plays
+            self.preroll_next_favorite()
+            
             # Update UI
             self.now_playing_view.update_station(self.current_station, is_playing=True)
             play_icon = Gtk.Image.new_from_icon_name("media-playback-pause-symbolic", Gtk.IconSize.BUTTON)
@@ -458,6 +751,21 @@ class RadioApp(Gtk.Application):
         except Exception as e:
             self.show_error_dialog(f"Failed to play station: {str(e)}")
     
+    def resume_station(self):
+        """Resume the paused station from where it was paused"""
+        try:
+            self.player.resume()
+            self.is_playing = True
+            
+            # Update UI
+            self.now_playing_view.update_station(self.current_station, is_playing=True)
+            play_icon = Gtk.Image.new_from_icon_name("media-playback-pause-symbolic", Gtk.IconSize.BUTTON)
+            self.play_button.get_children()[0].destroy()
+            self.play_button.add(play_icon)
+            self.play_button.show_all()
+        except Exception as e:
+            self.show_error_dialog(f"Failed to resume playback: {str(e)}")
+    
     def pause_station(self):
         """Pause the current station"""
         try:
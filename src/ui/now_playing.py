@@ -2,10 +2,10 @@
 import os
 import gi
 gi.require_version("Gtk", "3.0")
-from gi.repository import Gtk, GdkPixbuf, Pango
+from gi.repository import Gtk, GdkPixbuf, Pango, GLib
 
 # Update relative imports to absolute imports
-from src.utils import config 
+from src.utils import config, metrics
 from src.utils.downloader import StationDownloader
 
 class NowPlayingView(Gtk.Box):
@@ -77,9 +77,19 @@ class NowPlayingView(Gtk.Box):
         self.now_playing_label.set_margin_top(10)
         self.pack_start(self.now_playing_label, False, False, 0)
         
+        # Buffer fill level, only visible while the stream is buffering
+        self.buffer_bar = Gtk.ProgressBar()
+        self.buffer_bar.set_show_text(True)
+        self.buffer_bar.set_no_show_all(True)
+        self.buffer_bar.set_margin_top(5)
+        self.pack_start(self.buffer_bar, False, False, 0)
+        
         # Create a downloader for station images
         self.downloader = StationDownloader()
         
+        # Download of the shown station's image, cancelled when another is shown
+        self.image_task = None
+        
         # Current station data
         self.current_station = None
         
@@ -146,6 +156,11 @@ class NowPlayingView(Gtk.Box):
     
     def load_station_image(self, station):
         """Load and display the station image"""
+        # The image of a station no longer shown is not wanted
+        if self.image_task is not None:
+            self.image_task.cancel()
+            self.image_task = None
+        
         # Check if station has a favicon
         if not station or not station.get('favicon'):
             self.set_default_image()
@@ -160,10 +175,13 @@ class NowPlayingView(Gtk.Box):
         # Check if we've already downloaded this image
         image_path = os.path.join(config.STATION_IMAGES_DIR, f"{station_uuid}.png")
         if os.path.exists(image_path):
+            metrics.IMAGE_CACHE_HITS.inc()
             self.set_station_image(image_path)
         else:
             # Download the image
-            self.downloader.download_station_image(station, self.set_station_image)
+            metrics.IMAGE_CACHE_MISSES.inc()
+            self.image_task = self.downloader.download_station_image(station, self.set_station_image,
+                                                                     foreground=True)
     
     def set_station_image(self, image_path):
         """
@@ -188,6 +206,15 @@ class NowPlayingView(Gtk.Box):
             print(f"Error loading station image: {e}")
             self.set_default_image()
     
+    def set_status(self, text):
+        """
+        Show a playback status in place of the current track
+        
+        Args:
+            text: Status text, e.g. "Reconnecting..."
+        """
+        self.now_playing_label.set_markup(f"<i>{GLib.markup_escape_text(text)}</i>")
+    
     def update_now_playing(self, metadata):
         """
         Update the currently playing track information from stream metadata
@@ -203,33 +230,47 @@ class NowPlayingView(Gtk.Box):
         artist = metadata.get('artist', '')
         
         if title and artist:
-            self.now_playing_label.set_markup(f"<i>Now Playing: {artist} - {title}</i>")
+            self.set_status(f"Now Playing: {artist} - {title}")
         elif title:
-            self.now_playing_label.set_markup(f"<i>Now Playing: {title}</i>")
+            self.set_status(f"Now Playing: {title}")
         
     def update_stream_info(self, stream_info):
         """
         Update the codec and format information from stream info
         
         Args:
-            stream_info: Dictionary of stream information
+            stream_info: Dictionary of stream information (see RadioPlayer.get_stats)
         """
         if not stream_info or not self.current_station:
             return
         
-        # Update codec info with live stream information if available
-        codec = self.current_station.get('codec', 'Unknown')
-        bitrate = self.current_station.get('bitrate', 'Unknown')
-        
-        # Add any additional stream info
-        format_info = stream_info.get('format', '')
+        # Prefer live stream information over the catalog entry
+        codec = stream_info.get('codec') or self.current_station.get('codec', 'Unknown')
+        bitrate = stream_info.get('input_bitrate') or self.current_station.get('bitrate', 'Unknown')
         sample_rate = stream_info.get('sample_rate', '')
         
-        info_text = f"<i>Format: {codec}"
+        info_text = f"<i>Format: {GLib.markup_escape_text(str(codec))}"
         if bitrate and bitrate != 'Unknown':
             info_text += f" • Bitrate: {bitrate} kbps"
         if sample_rate:
             info_text += f" • {sample_rate}"
         info_text += "</i>"
         
-        self.codec_label.set_markup(info_text)
\ No newline at end of file
+        # Telemetry arrives every second, skip relayouts when nothing changed
+        if info_text != self.codec_label.get_label():
+            self.codec_label.set_markup(info_text)
+    
+    def update_buffering(self, percent):
+        """
+        Show the buffer fill level while the stream is buffering
+        
+        Args:
+            percent: Buffer fill level (0-100)
+        """
+        if percent >= 100:
+            self.buffer_bar.hide()
+            return
+        
+        self.buffer_bar.set_fraction(percent / 100.0)
+        self.buffer_bar.set_text(f"Buffering {percent}%")
+        self.buffer_bar.show()
\ No newline at end of file
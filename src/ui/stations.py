@@ -1,31 +1,60 @@
 #!/usr/bin/env python3
 import json
 import os
+import time
 import gi
 gi.require_version("Gtk", "3.0")
 from gi.repository import Gtk, GLib, Gdk
 
 # Update relative import to absolute import
-from src.utils import config
+from src.utils import config, metrics
+from src.utils.executor import get_executor, CancelToken, PRIORITY_SEARCH
+from src.catalog.stations import StationCatalog, is_favorite
 
 class StationsList:
     """
     Manages the stations list and favorites
     """
     
-    def __init__(self, on_station_activated=None):
+    def __init__(self, on_station_activated=None, on_station_hovered=None, on_favorites_changed=None,
+                 catalog=None, on_rows_shown=None):
         # Callback when a station is activated
         self.on_station_activated = on_station_activated
         
-        # Stations data
+        # Callback when a station is hovered or selected (likely to be played next)
+        self.on_station_hovered = on_station_hovered
+        self._hovered_row = None
+        self._hover_timeout_id = None
+        
+        # Callback when the favorites list changes
+        self.on_favorites_changed = on_favorites_changed
+        
+        # Callback when stations are added to the list, e.g. to probe their health
+        self.on_rows_shown = on_rows_shown
+        
+        # Stations data, from the downloaded catalog unless another source is given
+        self.catalog = catalog if catalog is not None else StationCatalog()
         self.stations = []
         self.filtered_stations = []
         self.favorites = []
         
+        # Sort order of the list, None keeps the order of the catalog
+        self.sort_key = None
+        self.unsorted_stations = []
+        
+        # Search or filter the list shows, as ('search', text) or ('filter', type)
+        self.view = None
+        
+        # Health check results of stations, if available
+        self.health = None
+        
         # Lazy loading parameters
         self.current_page = 0
         self.is_loading_more = False
         
+        # Cancels the fetch of rows a newer search, filter or sort replaced
+        self.rows_token = None
+        
         # Create the UI elements
         self.create_stations_view()
         self.create_favorites_view()
@@ -43,6 +72,7 @@ class StationsList:
         self.stations_list = Gtk.ListBox()
         self.stations_list.set_selection_mode(Gtk.SelectionMode.SINGLE)
         self.stations_list.connect("row-activated", self._on_station_activated)
+        self.connect_hover_signals(self.stations_list)
         self.scrolled_window.add(self.stations_list)
         
         # Add lazy loading functionality
@@ -64,38 +94,77 @@ class StationsList:
         self.favorites_list = Gtk.ListBox()
         self.favorites_list.set_selection_mode(Gtk.SelectionMode.SINGLE)
         self.favorites_list.connect("row-activated", self._on_favorite_activated)
+        self.connect_hover_signals(self.favorites_list)
         self.favorites_scrolled.add(self.favorites_list)
     
-    def load_stations(self, stations_file=None):
+    def connect_hover_signals(self, listbox):
+        """
+        Report hovered and selected rows so their station can be pre-rolled
+        
+        Args:
+            listbox: The Gtk.ListBox to watch
+        """
+        listbox.add_events(Gdk.EventMask.POINTER_MOTION_MASK)
+        listbox.connect("motion-notify-event", self._on_pointer_motion)
+        listbox.connect("row-selected", self._on_row_selected)
+    
+    def load_stations(self, stations_file=None, on_loaded=None):
         """
         Load stations from a JSON file
         
+        A remote catalog is loaded in the background instead, as its
+        requests may take as long as the network timeout.
+        
         Args:
             stations_file: Optional path to the stations file
+            on_loaded: Optional callback run once the stations are shown
+        
+        Returns:
+            bool: False if loading the stations failed
         """
-        if stations_file is None:
-            stations_file = config.STATIONS_JSON_PATH
-            
+        if getattr(self.catalog, 'is_remote', False):
+            self.status_label.set_text("Loading stations...")
+            get_executor().submit(PRIORITY_SEARCH, self.catalog.load, stations_file,
+                                  on_complete=lambda _: self._on_stations_loaded(on_loaded),
+                                  on_error=self._on_load_failed)
+            return True
+        
         try:
-            with open(stations_file, 'r') as f:
-                self.stations = json.load(f)
-            
-            # Reset filtered stations and pagination
-            self.filtered_stations = self.stations
-            self.current_page = 0
-            
-            # Populate the initial page
-            self.populate_stations_list(self.filtered_stations[:config.PAGE_SIZE])
-            self.update_status_label()
-            
-            # Mark favorites in the stations list
-            self.update_favorites_in_list()
-            
+            self.catalog.load(stations_file)
+            self._on_stations_loaded(on_loaded)
             return True
         except Exception as e:
             print(f"Failed to load stations: {str(e)}")
             return False
     
+    def _on_stations_loaded(self, on_loaded=None):
+        """Show the first page of a loaded catalog"""
+        self.stations = self.catalog.stations
+        
+        # A search made while a remote catalog loaded stays on screen
+        if self.view is not None and getattr(self.catalog, 'is_remote', False):
+            if on_loaded:
+                on_loaded()
+            return
+        
+        # Reset filtered stations and pagination
+        self.view = None
+        self.show_stations(self.stations)
+        self.current_page = 0
+        
+        # Populate the initial page, then mark favorites in the stations list
+        def _shown():
+            self.update_favorites_in_list()
+            if on_loaded:
+                on_loaded()
+        
+        self.show_first_page(_shown)
+    
+    def _on_load_failed(self, error):
+        """Report a catalog that could not be loaded in the background"""
+        print(f"Failed to load stations: {error}")
+        self.status_label.set_text("Could not reach the station directory.")
+    
     def load_favorites(self):
         """Load favorites from the saved JSON file"""
         try:
@@ -109,6 +178,9 @@ class StationsList:
     
     def save_favorites(self):
         """Save favorites to a JSON file"""
+        if self.on_favorites_changed:
+            self.on_favorites_changed(self.favorites)
+        
         try:
             with open(config.FAVORITES_PATH, 'w') as f:
                 json.dump(self.favorites, f)
@@ -135,6 +207,8 @@ class StationsList:
         if stations_to_show:
             for station in stations_to_show:
                 self.add_station_row(station)
+            if self.on_rows_shown:
+                self.on_rows_shown(stations_to_show)
         
         self.stations_list.show_all()
     
@@ -147,6 +221,8 @@ class StationsList:
         """
         for station in stations_to_append:
             self.add_station_row(station)
+        if self.on_rows_shown:
+            self.on_rows_shown(stations_to_append)
         self.stations_list.show_all()
     
     def add_station_row(self, station):
@@ -178,6 +254,15 @@ class StationsList:
         
         # Station info with width constraint
         info_text = f"{station.get('country', 'Unknown')} • {station.get('language', 'Unknown')} • {station.get('codec', 'Unknown')}"
+        
+        # Show the result of the last health check
+        if self.health is not None:
+            latency = self.health.latency(station.get('stationuuid'))
+            if self.health.is_dead(station.get('stationuuid')):
+                info_text += " • Offline"
+            elif latency is not None:
+                info_text += f" • {latency} ms"
+        
         info_label = Gtk.Label(label=info_text)
         info_label.set_halign(Gtk.Align.START)
         info_label.set_ellipsize(3)  # PANGO_ELLIPSIZE_END
@@ -188,7 +273,7 @@ class StationsList:
         hbox.pack_start(vbox, True, True, 0)
         
         # Add a star icon if the station is in favorites
-        if any(fav.get('stationuuid') == station.get('stationuuid') for fav in self.favorites):
+        if self.is_favorite(station):
             star = Gtk.Image.new_from_icon_name("starred-symbolic", Gtk.IconSize.BUTTON)
             hbox.pack_end(star, False, False, 0)
         
@@ -250,25 +335,14 @@ class StationsList:
         Args:
             search_text: Text to search for
         """
-        if not search_text:
-            # If search field is empty, show all stations
-            self.filtered_stations = self.stations
-        else:
-            # Convert to lowercase for case-insensitive search
-            search_text = search_text.lower()
-            
-            # Filter stations based on search text
-            self.filtered_stations = [
-                station for station in self.stations 
-                if search_text in station.get('name', '').lower() or 
-                   search_text in station.get('country', '').lower() or
-                   search_text in station.get('language', '').lower() or
-                   search_text in station.get('tags', '').lower()
-            ]
+        started = time.perf_counter()
+        
+        # An empty search shows all stations
+        self.view = ('search', search_text)
+        self.show_stations(self.catalog.search(search_text))
         
         # Show the first page of filtered stations
-        self.populate_stations_list(self.filtered_stations[:config.PAGE_SIZE])
-        self.update_status_label()
+        self.show_first_page(lambda: metrics.SEARCH_DURATION.observe(time.perf_counter() - started))
     
     def filter_stations(self, filter_type):
         """
@@ -277,17 +351,127 @@ class StationsList:
         Args:
             filter_type: Type of filter to apply (e.g., 'All', 'Favorites', etc.)
         """
-        if filter_type == "All Stations":
-            self.filtered_stations = self.stations
-        elif filter_type == "Favorites":
-            # Show all stations that are in favorites
-            self.filtered_stations = [s for s in self.stations if any(
-                f.get('stationuuid') == s.get('stationuuid') for f in self.favorites)]
-        # Additional filters can be implemented here
+        started = time.perf_counter()
+        filtered = self.catalog.filter(filter_type, self.favorites, self.health, config.NEARBY_LOCATION)
+        if filtered is not None:
+            self.view = ('filter', filter_type)
+            self.show_stations(filtered)
         
         # Show the first page of filtered stations
-        self.populate_stations_list(self.filtered_stations[:config.PAGE_SIZE])
-        self.update_status_label()
+        self.show_first_page(lambda: metrics.FILTER_DURATION.observe(time.perf_counter() - started))
+    
+    def replace_catalog(self, catalog):
+        """
+        Switch to a refreshed catalog, keeping the search or filter, the sort
+        order and the scroll position of the list
+        
+        Args:
+            catalog: Loaded catalog of the same kind as the current one
+        """
+        adjustment = self.scrolled_window.get_vadjustment()
+        position = adjustment.get_value()
+        pages = self.current_page
+        
+        self.catalog = catalog
+        self.stations = catalog.stations
+        
+        # Run the shown search or filter again on the new catalog
+        stations = None
+        if self.view is not None:
+            kind, argument = self.view
+            if kind == 'search':
+                stations = catalog.search(argument)
+            else:
+                stations = catalog.filter(argument, self.favorites, self.health, config.NEARBY_LOCATION)
+        self.show_stations(stations if stations is not None else self.stations)
+        
+        # As many pages as were loaded, then back to where the user was
+        def _restore(stations):
+            self.populate_stations_list(stations)
+            self.current_page = pages
+            self.update_favorites_in_list()
+            self.update_status_label()
+            GLib.idle_add(adjustment.set_value, position, priority=GLib.PRIORITY_LOW)
+        
+        self.request_rows(0, (pages + 1) * config.PAGE_SIZE, _restore)
+    
+    def show_stations(self, stations):
+        """
+        Make stations the result shown in the list, in the current sort order
+        
+        Args:
+            stations: Sequence of stations from the catalog
+        """
+        self.unsorted_stations = stations
+        self.filtered_stations = self.catalog.sort(stations, self.sort_key)
+        
+        # A page still being fetched belongs to the previous result
+        self.is_loading_more = False
+    
+    def request_rows(self, start, end, show):
+        """
+        Get a range of the shown stations and pass it to a function
+        
+        Stations of a remote source that are not fetched yet are fetched on
+        the executor and passed on from the main loop once they arrive. A
+        newer request drops the ones still in flight, so a superseded
+        search never overwrites the list.
+        
+        Args:
+            start: Index of the first station
+            end: Index after the last station
+            show: Function called with the list of stations
+        """
+        if self.rows_token is not None:
+            self.rows_token.cancel()
+            self.rows_token = None
+        
+        stations = self.filtered_stations
+        if not hasattr(stations, 'fetch') or stations.fetched(start, end):
+            show(stations[start:end])
+            return
+        
+        self.rows_token = CancelToken()
+        self.status_label.set_text("Loading stations...")
+        get_executor().submit(PRIORITY_SEARCH, stations.fetch, start, end, self.rows_token,
+                              token=self.rows_token, on_complete=show)
+    
+    def show_first_page(self, on_shown=None):
+        """
+        Show the first page of the shown stations
+        
+        Args:
+            on_shown: Optional callback run once the rows are in the list
+        """
+        def _show(stations):
+            self.populate_stations_list(stations)
+            self.update_status_label()
+            if on_shown:
+                on_shown()
+        
+        self.request_rows(0, config.PAGE_SIZE, _show)
+    
+    def set_sort_order(self, sort_key):
+        """
+        Change the sort order of the list
+        
+        Args:
+            sort_key: One of the catalog sort keys, or None for catalog order
+        """
+        self.sort_key = sort_key
+        self.show_stations(self.unsorted_stations)
+        
+        # Show the first page in the new order
+        self.show_first_page()
+    
+    def set_health_store(self, store):
+        """
+        Use station health check results for filtering and display
+        
+        Args:
+            store: HealthStore with the results
+        """
+        self.health = store
     
     def is_favorite(self, station):
         """
@@ -299,13 +483,7 @@ class StationsList:
         Returns:
             bool: True if the station is a favorite, False otherwise
         """
-        if not station:
-            return False
-            
-        return any(
-            fav.get('stationuuid') == station.get('stationuuid') 
-            for fav in self.favorites
-        )
+        return is_favorite(station, self.favorites, self.catalog)
     
     def add_favorite(self, station):
         """
@@ -335,10 +513,10 @@ class StationsList:
         """
         if not station:
             return
-            
-        # Filter out the station to remove
-        self.favorites = [fav for fav in self.favorites 
-                         if fav.get('stationuuid') != station.get('stationuuid')]
+        
+        # Filter out the station to remove, also if it was saved under a collapsed duplicate
+        self.favorites = [fav for fav in self.favorites
+                         if not is_favorite(station, [fav], self.catalog)]
         self.save_favorites()
         self.populate_favorites_list()
         
@@ -373,10 +551,7 @@ class StationsList:
                 station = row.station_data
                 
                 # Check if this station is in favorites
-                is_favorite = any(
-                    fav.get('stationuuid') == station.get('stationuuid') 
-                    for fav in self.favorites
-                )
+                is_favorite = self.is_favorite(station)
                 
                 # Get the hbox containing station info
                 hbox = row.get_child()
@@ -403,7 +578,10 @@ class StationsList:
         total = len(self.filtered_stations)
         displayed = min((self.current_page + 1) * config.PAGE_SIZE, total)
         
-        if total == len(self.stations):
+        if getattr(self.filtered_stations, 'more_available', False):
+            # Results fetched page by page, the total is not known yet
+            self.status_label.set_text(f"Showing {displayed} stations. Scroll down to load more.")
+        elif total == len(self.stations):
             # No filtering applied
             self.status_label.set_text(f"Showing {displayed} of {total} stations. Scroll down to load more.")
         else:
@@ -431,12 +609,15 @@ class StationsList:
             self.is_loading_more = False
             return
         
-        # Get the next batch of stations
-        next_batch = self.filtered_stations[start_index:end_index]
-        
+        # Get the next batch of stations, from the network for a remote source
+        self.request_rows(start_index, end_index, self._append_next_page)
+    
+    def _append_next_page(self, next_batch):
+        """Add a page fetched by _load_more_stations to the list"""
         # If there are no more stations, stop
         if not next_batch:
             self.is_loading_more = False
+            self.update_status_label()
             return
         
         # Add the next batch to the list
@@ -448,6 +629,37 @@ class StationsList:
         
         self.is_loading_more = False
     
+    def _on_pointer_motion(self, listbox, event):
+        """Track the row under the pointer and report it after a short dwell"""
+        row = listbox.get_row_at_y(int(event.y))
+        if row is self._hovered_row:
+            return False
+        
+        self._hovered_row = row
+        if self._hover_timeout_id is not None:
+            GLib.source_remove(self._hover_timeout_id)
+            self._hover_timeout_id = None
+        
+        if row is not None:
+            self._hover_timeout_id = GLib.timeout_add(
+                config.PREROLL_HOVER_DELAY_MS, self._on_hover_timeout)
+        return False
+    
+    def _on_hover_timeout(self):
+        """Report the station under the pointer once the pointer settled"""
+        self._hover_timeout_id = None
+        self._report_hovered_row(self._hovered_row)
+        return False
+    
+    def _on_row_selected(self, listbox, row):
+        """Report a station selected with the keyboard"""
+        self._report_hovered_row(row)
+    
+    def _report_hovered_row(self, row):
+        """Pass the station of a hovered or selected row to the callback"""
+        if row is not None and hasattr(row, 'station_data') and self.on_station_hovered:
+            self.on_station_hovered(row.station_data)
+    
     def _on_station_activated(self, listbox, row):
         """Handle station selection in the main list"""
         if hasattr(row, 'station_data') and self.on_station_activated:
@@ -8,7 +8,19 @@ os.makedirs(APP_DIR, exist_ok=True)
 
 # Paths to data files
 STATIONS_JSON_PATH = os.path.join(APP_DIR, "stations.json")
+CATALOG_META_PATH = os.path.join(APP_DIR, "stations_meta.json")
 FAVORITES_PATH = os.path.join(APP_DIR, "favorites.json")
+RESOLVED_URLS_PATH = os.path.join(APP_DIR, "resolved_urls.json")
+HEALTH_PATH = os.path.join(APP_DIR, "station_health.json")
+MIRROR_PATH = os.path.join(APP_DIR, "mirror.json")
+REMOTE_CACHE_DIR = os.path.join(APP_DIR, "api_cache")
+WATCHDOG_LOG_PATH = os.path.join(APP_DIR, "stalls.log")
+
+# Control socket of the headless daemon
+CONTROL_SOCKET_PATH = os.path.join(APP_DIR, "control.sock")
+
+# Recordings directory
+RECORDINGS_DIR = os.path.join(APP_DIR, "recordings")
 
 # Station images directory
 STATION_IMAGES_DIR = os.path.join(APP_DIR, "station_images")
@@ -20,6 +32,146 @@ DEFAULT_STATION_IMAGE = os.path.join(Path(__file__).parent.parent.parent, "asset
 # UI Constants
 STATION_IMAGE_SIZE = 180  # Size of the station logo image
 PAGE_SIZE = 50  # Number of stations to load at once
+TAG_FILTER_LIMIT = 30  # Most used tags offered in the filter dropdown
+
+# Collapse stations listed several times into one when loading the catalog
+DEDUPLICATE_STATIONS = True
+
+# Nearby stations
+NEARBY_LOCATION = None  # (latitude, longitude) of the listener, enables the Nearby filter
+NEARBY_RADIUS_KM = 250  # Farthest station listed as nearby
+NEARBY_LIMIT = 500  # Most stations listed as nearby
+GEO_CELL_DEGREES = 1.0  # Cell size of the spatial index
+
+# API URLs: the catalog is downloaded from the fastest responding mirror
+STATIONS_API_MIRRORS = [
+    "http://162.55.180.156",
+    "https://de1.api.radio-browser.info",
+    "https://fi1.api.radio-browser.info",
+    "https://at1.api.radio-browser.info",
+]
+STATIONS_API_PATH = "/json/stations/topvote"
+USER_AGENT = "FramenuxRadio/1.0"
+
+# Catalog refresh settings
+CATALOG_AUTO_REFRESH = True  # Refresh the stations list in the background
+CATALOG_MAX_AGE = 24 * 60 * 60  # Seconds after which the stations list is refreshed
+CATALOG_REFRESH_CHECK_INTERVAL = 30 * 60  # Seconds between checks of its age
+
+# Where the station list comes from: "local" downloads the whole catalog
+# and searches it in memory, "remote" sends every search and filter to the
+# API page by page, for machines that should not hold the catalog
+CATALOG_SOURCE = "local"
+
+# Remote catalog settings
+REMOTE_TIMEOUT = 5  # Network timeout per API request in seconds
+REMOTE_CACHE_TTL = 60 * 60  # Seconds a cached API response stays fresh
+REMOTE_CACHE_MAX_BYTES = 20 * 1024 * 1024  # Size of the response cache on disk
+REMOTE_TAG_LIMIT = 200  # Most used tags fetched for the filters and search prediction
+
+# Mirror selection settings
+MIRROR_PROBE_PATH = "/json/stats"  # Small response used to race the mirrors
+MIRROR_PROBE_TIMEOUT = 3  # Seconds a mirror has to answer the probe
+MIRROR_READ_TIMEOUT = 15  # Seconds a download may stall before failing over
+MIRROR_TTL = 24 * 60 * 60  # Seconds the chosen mirror is remembered
+
+# Playback settings
+STANDBY_PREROLL = True  # Pre-roll the next candidate station in a standby pipeline
+PREROLL_HOVER_DELAY_MS = 400  # How long a row must be hovered before it is pre-rolled
+CROSSFADE_MS = 300  # Crossfade length when swapping in the standby pipeline (0 disables)
+CROSSFADE_STEP_MS = 30  # Interval between crossfade volume steps
+TELEMETRY_INTERVAL_MS = 1000  # How often stream telemetry is sampled while playing
+METADATA_COALESCE_MS = 50  # Stream tags arriving within this window are delivered once
+
+# Stream URL resolver settings
+RESOLVER_TTL = 6 * 60 * 60  # Seconds a resolved stream URL stays valid
+RESOLVER_TIMEOUT = 10  # Network timeout per request in seconds
+RESOLVER_MAX_DEPTH = 3  # Maximum nesting of playlists
+RESOLVER_MAX_ENTRIES = 500  # Resolved URLs kept on disk
+
+# Playback profiles: queue sizes and the buffering watermarks (fractions of
+# the queue) below which playback pauses and above which it resumes
+PLAYBACK_PROFILES = {
+    "low-latency": {
+        "label": "Low latency",
+        "buffer_size": 64 * 1024,  # Bytes
+        "buffer_duration": 0.5,  # Seconds
+        "low_watermark": 0.01,
+        "high_watermark": 0.5,
+    },
+    "balanced": {
+        "label": "Balanced",
+        "buffer_size": 256 * 1024,
+        "buffer_duration": 2.0,
+        "low_watermark": 0.1,
+        "high_watermark": 0.99,
+    },
+    "resilient": {
+        "label": "Resilient",
+        "buffer_size": 2 * 1024 * 1024,
+        "buffer_duration": 10.0,
+        "low_watermark": 0.3,
+        "high_watermark": 0.99,
+    },
+}
+DEFAULT_PLAYBACK_PROFILE = "balanced"
+
+# Reconnect settings for dropped streams
+RECONNECT_BASE_DELAY = 1.0  # Seconds before the first retry
+RECONNECT_MAX_DELAY = 30.0  # Upper bound for a single retry delay
+RECONNECT_MAX_ATTEMPTS = 8  # Retries before giving up
+RECONNECT_STABLE_SECONDS = 30.0  # Playback time after which the retry budget is refilled
+
+# LAN rebroadcast of the playing stream
+REBROADCAST_ENABLED = False  # Serve the playing stream to other players on the network
+REBROADCAST_HOST = "0.0.0.0"
+REBROADCAST_PORT = 8765  # Listeners connect to http://<host>:<port>/stream
+REBROADCAST_CLIENT_BUFFER = 256 * 1024  # Bytes a listener may fall behind before it is dropped
+REBROADCAST_BACKLOG = 64 * 1024  # Recent bytes sent to new listeners
+REBROADCAST_SOCKET_BUFFER = 64 * 1024  # Kernel send buffer per listener
+REBROADCAST_MAX_LISTENERS = 32
+
+# Passthrough recording of stations
+RECORDING_SEGMENT_SECONDS = 60 * 60  # Start a new file every hour (0 disables)
+RECORDING_SEGMENT_BYTES = 0  # Start a new file after this many bytes (0 disables)
+RECORDING_QUEUE_CHUNKS = 1024  # Chunks waiting for the disk before data is dropped
+RECORDING_READ_SIZE = 16 * 1024  # Bytes read at once from a recorded station
+RECORDING_FEED_WAIT = 0.5  # Seconds a recorded station waits for queue room between checks for stop
+
+# Timeshift (pause and rewind of live radio)
+TIMESHIFT_ENABLED = False  # Play through a local timeshift buffer
+TIMESHIFT_MEMORY_BYTES = 4 * 1024 * 1024  # In-memory part of the buffer (~4 min at 128 kbps)
+TIMESHIFT_DISK_BYTES = 64 * 1024 * 1024  # Spill ring file on disk (~1 h at 128 kbps, 0 disables)
+TIMESHIFT_READ_SIZE = 16 * 1024  # Bytes served to the player at once
+TIMESHIFT_DEFAULT_BYTE_RATE = 16000  # Assumed until the stream rate is measured (128 kbps)
+TIMESHIFT_REWIND_SECONDS = 10  # Step of the rewind button
+
+# Background station health checks
+HEALTH_CHECKS_ENABLED = False  # Probe favorites and listed stations in the background
+HEALTH_CONCURRENCY = 8  # Probes in flight
+HEALTH_PER_HOST = 2  # Probes in flight against one host
+HEALTH_HOST_INTERVAL = 0.5  # Seconds between probe starts against one host
+HEALTH_TIMEOUT = 8  # Seconds until a probe counts as failed
+HEALTH_MAX_AGE = 24 * 60 * 60  # Probe a station again after a day
+HEALTH_SAVE_EVERY = 500  # Save results after this many probes
+
+# Background task executor shared by downloads, catalog loads, images and searches
+EXECUTOR_WORKERS = 4  # Worker threads
+EXECUTOR_RESERVED_WORKERS = 1  # Workers kept free for interactive searches
+EXECUTOR_CLASS_LIMITS = {'images': 2, 'refresh': 1, 'health': 1}  # Running tasks per priority class
+EXECUTOR_FRAME_BUDGET = 0.008  # Seconds of completion callbacks run per main-loop iteration
+EXECUTOR_LATENCY_SAMPLES = 500  # Recent tasks per class the latency metrics cover
+
+# Main-loop stall watchdog, for finding what makes the window hitch
+WATCHDOG_ENABLED = False  # Measure main-loop latency and log stalls with their stacks
+WATCHDOG_INTERVAL = 0.05  # Seconds between ticks of the high-priority timer, the bound on stall overcounting
+WATCHDOG_THRESHOLD = 0.2  # Seconds without a serviced tick that count as a stall
+WATCHDOG_HISTORY = 500  # Recent ticks and stalls the rolling statistics cover
+WATCHDOG_TOP_HANDLERS = 5  # Slowest handlers listed in the log
+WATCHDOG_LOG_MAX_BYTES = 1024 * 1024  # Size at which the log is rotated
 
-# API URLs
-STATIONS_API_URL = "http://162.55.180.156/json/stations/topvote"
\ No newline at end of file
+# Metrics export for fleet monitoring, in the Prometheus text format
+METRICS_PORT = None  # Serve http://<host>:<port>/metrics (None disables, 0 picks a free port)
+METRICS_HOST = "127.0.0.1"
+METRICS_FILE_PATH = None  # Also write the metrics to this file, e.g. for node_exporter's textfile collector
+METRICS_FILE_INTERVAL = 15  # Seconds between writes of the metrics file
\ No newline at end of file
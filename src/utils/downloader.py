@@ -1,96 +1,88 @@
 #!/usr/bin/env python3
 import os
-import json
-import threading
 import urllib.request
-import tempfile
-import shutil
-from gi.repository import GLib
 
 from ..utils import config
+from ..utils.executor import get_executor, PRIORITY_IMAGES, PRIORITY_REFRESH
+from ..utils.refresh import CatalogRefresher
 
 class StationDownloader:
     """Handles downloading the stations list and station images"""
     
-    def __init__(self, on_complete=None, on_error=None, on_progress=None):
+    def __init__(self, on_complete=None, on_error=None, on_progress=None, refresher=None, executor=None):
         """
         Initialize the downloader
         
         Args:
-            on_complete: Callback when download completes
+            on_complete: Callback when download completes, passed whether
+                the stations list changed
             on_error: Callback when an error occurs
             on_progress: Callback for progress updates
+            refresher: Optional CatalogRefresher doing the download
+            executor: Optional TaskExecutor running the downloads
         """
         self.on_complete = on_complete
         self.on_error = on_error
         self.on_progress = on_progress
+        self.refresher = refresher
+        self.executor = executor or get_executor()
         
     def start_download(self):
-        """Start downloading the stations list in a background thread"""
-        thread = threading.Thread(target=self._download_thread)
-        thread.daemon = True
-        thread.start()
+        """
+        Start downloading the stations list in the background
+        
+        Returns:
+            Task: The download task
+        """
+        if self.refresher is None:
+            self.refresher = CatalogRefresher()
+        
+        # The stations file is only replaced by a complete, valid and
+        # changed download; on_complete is passed whether it changed
+        return self.executor.submit(
+            PRIORITY_REFRESH, self.refresher.refresh,
+            on_complete=self.on_complete, on_error=self._on_download_error)
     
-    def _download_thread(self):
-        """Background thread for downloading the stations list"""
-        try:
-            # Use a temporary file to avoid corrupting the stations file if download fails
-            with tempfile.NamedTemporaryFile(delete=False) as temp_file:
-                urllib.request.urlretrieve(config.STATIONS_API_URL, temp_file.name)
-                
-                # Verify the file is valid JSON
-                with open(temp_file.name, 'r') as f:
-                    json.load(f)
-                
-                # Move the temp file to the final destination
-                shutil.copy(temp_file.name, config.STATIONS_JSON_PATH)
-                
-            # Download successful, call the complete callback
-            if self.on_complete:
-                GLib.idle_add(self.on_complete)
-                
-        except Exception as e:
-            # Download failed, call the error callback
-            if self.on_error:
-                GLib.idle_add(lambda: self.on_error(str(e)))
+    def _on_download_error(self, error):
+        """Report a failed stations list download"""
+        if self.on_error:
+            self.on_error(str(error))
     
-    def download_station_image(self, station, callback=None):
+    def download_station_image(self, station, callback=None, token=None, foreground=False):
         """
         Download the favicon/image for a specific station
         
         Args:
             station: Station data dictionary
-            callback: Function to call when download completes
+            callback: Function to call when download completes, passed the
+                image path or None if the download failed
+            token: Optional CancelToken, e.g. cancelled once the station is
+                no longer shown
+            foreground: Whether the image is shown as soon as it arrives,
+                ahead of the queued list images
+        
+        Returns:
+            Task: The download task, or None if the station has no image
         """
-        def _download_image_thread():
-            try:
-                # Get the station UUID as a unique identifier
-                station_uuid = station.get('stationuuid', '')
-                if not station_uuid:
-                    return
-                
-                # Check if we have a favicon URL
-                favicon_url = station.get('favicon')
-                if not favicon_url:
-                    return
-                
-                # Create the path for the image file
-                image_path = os.path.join(config.STATION_IMAGES_DIR, f"{station_uuid}.png")
-                
-                # Download the image if it doesn't already exist
-                if not os.path.exists(image_path):
-                    urllib.request.urlretrieve(favicon_url, image_path)
-                
-                # Call the callback with the image path
-                if callback:
-                    GLib.idle_add(lambda: callback(image_path))
-                    
-            except Exception as e:
-                print(f"Failed to download station image: {e}")
-                if callback:
-                    GLib.idle_add(lambda: callback(None))
+        # Get the station UUID as a unique identifier
+        station_uuid = station.get('stationuuid', '')
+        favicon_url = station.get('favicon')
+        if not station_uuid or not favicon_url:
+            return None
+        
+        # Create the path for the image file
+        image_path = os.path.join(config.STATION_IMAGES_DIR, f"{station_uuid}.png")
+        
+        def _download_image():
+            # Download the image if it doesn't already exist
+            if not os.path.exists(image_path):
+                urllib.request.urlretrieve(favicon_url, image_path)
+            return image_path
+        
+        def _on_error(e):
+            print(f"Failed to download station image: {e}")
+            if callback:
+                callback(None)
         
-        # Start the download in a background thread
-        thread = threading.Thread(target=_download_image_thread)
-        thread.daemon = True
-        thread.start()
\ No newline at end of file
+        return self.executor.submit(PRIORITY_IMAGES, _download_image, token=token,
+                                    on_complete=callback, on_error=_on_error, foreground=foreground)
\ No newline at end of file
@@ -0,0 +1,410 @@
+#!/usr/bin/env python3
+import time
+import threading
+from collections import deque
+
+from ..utils import config
+
+# Priority classes of background work, most urgent first
+PRIORITY_SEARCH = 0
+PRIORITY_IMAGES = 1
+PRIORITY_REFRESH = 2
+PRIORITY_HEALTH = 3
+PRIORITY_NAMES = ('search', 'images', 'refresh', 'health')
+
+
+class TaskCancelled(Exception):
+    """Raised by CancelToken.check inside a task that was cancelled"""
+
+
+class CancelToken:
+    """
+    Cancels the tasks it is passed to
+    
+    Queued tasks are dropped and their results, if they already ran, are
+    not delivered. Running tasks stop early only if they call check now
+    and then. One token can be shared by a group of tasks.
+    """
+    
+    def __init__(self):
+        self.event = threading.Event()
+    
+    def cancel(self):
+        """Cancel every task holding this token"""
+        self.event.set()
+    
+    @property
+    def cancelled(self):
+        return self.event.is_set()
+    
+    def check(self):
+        """
+        Raises:
+            TaskCancelled: If the token was cancelled
+        """
+        if self.event.is_set():
+            raise TaskCancelled()
+
+
+class Task:
+    """A function submitted to the TaskExecutor, with its callbacks"""
+    
+    def __init__(self, priority, function, args, token=None, on_complete=None, on_error=None, foreground=False):
+        self.priority = priority
+        self.function = function
+        self.args = args
+        self.token = token or CancelToken()
+        self.on_complete = on_complete
+        self.on_error = on_error
+        self.foreground = foreground
+        
+        # Monotonic timestamps of the task's progress
+        self.submitted = time.monotonic()
+        self.started = None
+        self.finished = None
+    
+    def cancel(self):
+        """Cancel the task, and every other task sharing its token"""
+        self.token.cancel()
+    
+    @property
+    def cancelled(self):
+        return self.token.cancelled
+    
+    @property
+    def done(self):
+        """Whether the task finished, or was cancelled before it started"""
+        return self.finished is not None or (self.started is None and self.token.cancelled)
+
+
+class TaskExecutor:
+    """
+    Runs the background work of the application on a bounded pool of
+    threads, most urgent priority class first
+    
+    Each class can be limited to a number of running tasks, and some
+    workers are kept free for interactive searches, so a long catalog
+    refresh or health check never holds up the work the user waits for.
+    Callbacks are handed to the main loop, where the completions that
+    arrived meanwhile run together in one idle callback, up to a time
+    budget per main-loop iteration.
+    
+    The pool is for tasks that finish; loops that run for the lifetime of
+    the application, such as the health prober or the refresh scheduler,
+    have threads of their own so they never hold a worker.
+    """
+    
+    def __init__(self, workers=None, reserved_workers=None, class_limits=None, frame_budget=None, schedule=None,
+                 on_error=None):
+        """
+        Initialize the executor
+        
+        Args:
+            workers: Maximum number of worker threads
+            reserved_workers: Workers only tasks of the most urgent class may use
+            class_limits: Maximum running tasks per class name
+            frame_budget: Seconds of callbacks run per main-loop iteration
+            schedule: Function scheduling a callback on the main loop, like
+                GLib.idle_add. Without one, callbacks wait for attach().
+            on_error: Callback(task, exception) run on the main loop for
+                failed tasks without an on_error of their own; they are
+                printed by default
+        """
+        self.workers = workers or config.EXECUTOR_WORKERS
+        self.reserved_workers = reserved_workers if reserved_workers is not None else config.EXECUTOR_RESERVED_WORKERS
+        limits = class_limits if class_limits is not None else config.EXECUTOR_CLASS_LIMITS
+        self.class_limits = [limits.get(name, self.workers) for name in PRIORITY_NAMES]
+        self.frame_budget = frame_budget if frame_budget is not None else config.EXECUTOR_FRAME_BUDGET
+        self.schedule = schedule
+        self.on_error = on_error or self.report_failure
+        
+        # Queued tasks per class, and the running tasks per class
+        self.condition = threading.Condition()
+        self.queues = [deque() for _ in PRIORITY_NAMES]
+        self.running = [0] * len(PRIORITY_NAMES)
+        self.threads = []
+        self.idle_workers = 0
+        self.stopping = False
+        
+        # Callbacks waiting for the main loop: (callback, args, token)
+        self.completions = deque()
+        self.completions_lock = threading.Lock()
+        self.dispatch_scheduled = False
+        
+        # Counters and recent latencies per class, for metrics
+        self.counts = [{'submitted': 0, 'completed': 0, 'failed': 0, 'cancelled': 0} for _ in PRIORITY_NAMES]
+        self.waits = [deque(maxlen=config.EXECUTOR_LATENCY_SAMPLES) for _ in PRIORITY_NAMES]
+        self.run_times = [deque(maxlen=config.EXECUTOR_LATENCY_SAMPLES) for _ in PRIORITY_NAMES]
+        self.batches = 0
+        self.dispatched = 0
+        self.largest_batch = 0
+        self.longest_batch = 0.0
+    
+    def attach(self, schedule):
+        """
+        Deliver callbacks on a main loop from now on
+        
+        Callbacks of tasks that finished before are delivered now.
+        
+        Args:
+            schedule: Function scheduling a callback on the main loop, like
+                GLib.idle_add
+        """
+        with self.completions_lock:
+            self.schedule = schedule
+            if not self.completions or self.dispatch_scheduled:
+                return
+            self.dispatch_scheduled = True
+        schedule(self._dispatch)
+    
+    def submit(self, priority, function, *args, token=None, on_complete=None, on_error=None, foreground=False):
+        """
+        Run a function in the background
+        
+        Args:
+            priority: One of the PRIORITY_ classes
+            function: Function to run on a worker thread
+            *args: Arguments of the function
+            token: Optional CancelToken, e.g. shared by a group of tasks
+            on_complete: Optional callback(result) run on the main loop
+            on_error: Optional callback(exception) run on the main loop,
+                the executor's on_error handles the failure if there is none
+            foreground: Whether the user is waiting for this very task, like
+                the image of the playing station: it goes ahead of its class
+                and starts on the next free worker, whatever the class limit
+        
+        Returns:
+            Task: The submitted task, which can be cancelled
+        """
+        task = Task(priority, function, args, token, on_complete, on_error, foreground)
+        
+        with self.condition:
+            if self.stopping:
+                task.cancel()
+                return task
+            
+            if foreground:
+                self.queues[priority].appendleft(task)
+            else:
+                self.queues[priority].append(task)
+            self.counts[priority]['submitted'] += 1
+            
+            # Wake an idle worker, or start one while below the limit
+            if self.idle_workers:
+                self.idle_workers -= 1
+                self.condition.notify()
+            elif len(self.threads) < self.workers:
+                thread = threading.Thread(target=self._worker_thread)
+                thread.daemon = True
+                self.threads.append(thread)
+                thread.start()
+        return task
+    
+    def shutdown(self):
+        """Drop the queued tasks and let the workers exit once idle"""
+        with self.condition:
+            self.stopping = True
+            for tasks in self.queues:
+                for task in tasks:
+                    task.cancel()
+            self.idle_workers = 0
+            self.condition.notify_all()
+    
+    def _next_task(self):
+        """Take the most urgent task that may start now, with the condition held"""
+        now = time.monotonic()
+        background = sum(self.running[PRIORITY_SEARCH + 1:])
+        
+        for priority, tasks in enumerate(self.queues):
+            # Cancelled tasks are dropped when they come up
+            while tasks and tasks[0].cancelled:
+                tasks.popleft().finished = now
+                self.counts[priority]['cancelled'] += 1
+            
+            if not tasks:
+                continue
+            if tasks[0].foreground:
+                # Foreground tasks only wait for a free worker
+                self.running[priority] += 1
+                return tasks.popleft()
+            if self.running[priority] >= self.class_limits[priority]:
+                continue
+            if priority != PRIORITY_SEARCH and background >= self.workers - self.reserved_workers:
+                continue
+            
+            self.running[priority] += 1
+            return tasks.popleft()
+        return None
+    
+    def _worker_thread(self):
+        """Worker thread running queued tasks"""
+        while True:
+            with self.condition:
+                task = self._next_task()
+                while task is None:
+                    if self.stopping:
+                        self.threads.remove(threading.current_thread())
+                        return
+                    self.idle_workers += 1
+                    self.condition.wait()
+                    task = self._next_task()
+            
+            self._run(task)
+            
+            with self.condition:
+                self.running[task.priority] -= 1
+    
+    def _run(self, task):
+        """Run one task and deliver its outcome"""
+        task.started = time.monotonic()
+        callback = None
+        try:
+            result = task.function(*task.args)
+        except TaskCancelled:
+            outcome = 'cancelled'
+        except Exception as e:
+            outcome = 'failed'
+            if task.on_error:
+                callback, args = task.on_error, (e,)
+            else:
+                callback, args = self.on_error, (task, e)
+        else:
+            outcome = 'completed'
+            if task.on_complete:
+                callback, args = task.on_complete, (result,)
+        task.finished = time.monotonic()
+        
+        with self.condition:
+            self.counts[task.priority][outcome] += 1
+            self.waits[task.priority].append(task.started - task.submitted)
+            self.run_times[task.priority].append(task.finished - task.started)
+        
+        if callback is not None and not task.cancelled:
+            self._deliver(callback, args, task.token)
+    
+    def _deliver(self, callback, args, token):
+        """
+        Queue a callback for the main loop, scheduling a dispatch if none is
+        pending; before attach() the callbacks wait, workers never run them
+        """
+        with self.completions_lock:
+            self.completions.append((callback, args, token))
+            if self.dispatch_scheduled or self.schedule is None:
+                return
+            self.dispatch_scheduled = True
+        self.schedule(self._dispatch)
+    
+    def _dispatch(self):
+        """
+        Run the queued callbacks on the main loop, up to the frame budget
+        
+        Returns:
+            bool: True if callbacks remain, so the main loop calls again
+        """
+        started = time.monotonic()
+        count = 0
+        more = False
+        
+        while True:
+            with self.completions_lock:
+                if not self.completions:
+                    self.dispatch_scheduled = False
+                    break
+                if count and time.monotonic() - started >= self.frame_budget:
+                    more = True
+                    break
+                callback, args, token = self.completions.popleft()
+            
+            # Results of tasks cancelled meanwhile are no longer wanted
+            if not token.cancelled:
+                self._call(callback, args)
+                count += 1
+        
+        elapsed = time.monotonic() - started
+        with self.condition:
+            self.batches += 1
+            self.dispatched += count
+            self.largest_batch = max(self.largest_batch, count)
+            self.longest_batch = max(self.longest_batch, elapsed)
+        return more
+    
+    @staticmethod
+    def report_failure(task, error):
+        """Default handler of tasks that failed without an on_error of their own"""
+        print(f"Background {PRIORITY_NAMES[task.priority]} task failed: {error}")
+    
+    @staticmethod
+    def _call(callback, args):
+        """Run a callback, reporting rather than raising its errors"""
+        try:
+            callback(*args)
+        except Exception as e:
+            print(f"Background task callback failed: {e}")
+    
+    def metrics(self):
+        """
+        Report queue depths, counters and latencies
+        
+        Returns:
+            dict: Executor-wide figures and a dictionary per priority class
+                with wait and run times in ms over the recent tasks
+        """
+        with self.condition:
+            classes = {}
+            for priority, name in enumerate(PRIORITY_NAMES):
+                classes[name] = dict(
+                    self.counts[priority],
+                    queued=sum(1 for task in self.queues[priority] if not task.cancelled),
+                    running=self.running[priority],
+                    wait_ms_p50=percentile_ms(self.waits[priority], 0.5),
+                    wait_ms_p95=percentile_ms(self.waits[priority], 0.95),
+                    run_ms_p50=percentile_ms(self.run_times[priority], 0.5),
+                    run_ms_p95=percentile_ms(self.run_times[priority], 0.95),
+                )
+            
+            return {
+                'workers': len(self.threads),
+                'idle_workers': self.idle_workers,
+                'completions_pending': len(self.completions),
+                'dispatch_batches': self.batches,
+                'dispatched': self.dispatched,
+                'largest_batch': self.largest_batch,
+                'longest_batch_ms': round(self.longest_batch * 1000, 1),
+                'classes': classes,
+            }
+
+
+def percentile_ms(samples, fraction):
+    """
+    Percentile of durations
+    
+    Args:
+        samples: Durations in seconds
+        fraction: Percentile as a fraction, 1.0 for the maximum
+    
+    Returns:
+        float: The percentile in ms, or None without samples
+    """
+    if not samples:
+        return None
+    ordered = sorted(samples)
+    return round(ordered[min(len(ordered) - 1, int(fraction * len(ordered)))] * 1000, 1)
+
+
+# Executor shared by the whole application
+_shared = None
+_shared_lock = threading.Lock()
+
+
+def get_executor():
+    """
+    Get the executor shared by all background work, creating it on first use
+    
+    Returns:
+        TaskExecutor: The shared executor
+    """
+    global _shared
+    with _shared_lock:
+        if _shared is None:
+            _shared = TaskExecutor()
+        return _shared
\ No newline at end of file
@@ -0,0 +1,367 @@
+#!/usr/bin/env python3
+import os
+import ssl
+import json
+import time
+import asyncio
+import threading
+from collections import deque
+from urllib.parse import urljoin, urlparse
+
+from ..utils import config
+from ..utils.executor import CancelToken
+from ..utils.resolver import PLAYLIST_CONTENT_TYPES, PLAYLIST_EXTENSIONS, MAX_PLAYLIST_BYTES, parse_pls, parse_m3u
+
+# Codec names as radio-browser spells them, by content type
+CONTENT_TYPE_CODECS = {
+    'audio/mpeg': 'MP3',
+    'audio/aac': 'AAC',
+    'audio/aacp': 'AAC+',
+    'application/ogg': 'OGG',
+    'audio/ogg': 'OGG',
+    'audio/flac': 'FLAC',
+    'audio/x-wav': 'WAV',
+}
+
+# Positions of the fields in a stored health record
+REACHABLE, LATENCY_MS, CODEC, BITRATE, CHECKED_AT = range(5)
+
+
+class HealthStore:
+    """
+    Compact store of station health results keyed by stationuuid
+    
+    Each record is a list [reachable, latency_ms, codec, bitrate, checked_at]
+    to keep the file small for tens of thousands of stations.
+    """
+    
+    def __init__(self, path=None):
+        """
+        Args:
+            path: JSON file the results are kept in
+        """
+        self.path = path or config.HEALTH_PATH
+        self.records = {}
+        self.lock = threading.Lock()
+        
+        # Bumped on every change, so orders derived from the results know when to rebuild
+        self.changes = 0
+        self.load()
+    
+    def load(self):
+        """Load stored results from disk"""
+        try:
+            if os.path.exists(self.path):
+                with open(self.path, 'r') as f:
+                    self.records = json.load(f)
+                self.changes += 1
+        except Exception as e:
+            print(f"Failed to load station health: {e}")
+            self.records = {}
+    
+    def save(self):
+        """Write the results to disk"""
+        with self.lock:
+            snapshot = dict(self.records)
+        try:
+            with open(self.path, 'w') as f:
+                json.dump(snapshot, f, separators=(',', ':'))
+        except Exception as e:
+            print(f"Failed to save station health: {e}")
+    
+    def record(self, station_uuid, reachable, latency_ms=None, codec=None, bitrate=None):
+        """Store the result of one probe"""
+        with self.lock:
+            self.records[station_uuid] = [int(reachable), latency_ms, codec, bitrate, int(time.time())]
+            self.changes += 1
+    
+    def get(self, station_uuid):
+        """
+        Get the last probe result of a station
+        
+        Returns:
+            dict: Result with reachable, latency_ms, codec, bitrate and
+            checked_at, or None if the station was never probed
+        """
+        record = self.records.get(station_uuid)
+        if record is None:
+            return None
+        return {
+            'reachable': bool(record[REACHABLE]),
+            'latency_ms': record[LATENCY_MS],
+            'codec': record[CODEC],
+            'bitrate': record[BITRATE],
+            'checked_at': record[CHECKED_AT],
+        }
+    
+    def is_dead(self, station_uuid):
+        """True if the last probe of the station failed"""
+        record = self.records.get(station_uuid)
+        return record is not None and not record[REACHABLE]
+    
+    def latency(self, station_uuid):
+        """Measured latency in ms, or None if unknown or unreachable"""
+        record = self.records.get(station_uuid)
+        return record[LATENCY_MS] if record is not None and record[REACHABLE] else None
+    
+    def is_stale(self, station_uuid, max_age=None):
+        """True if the station was never probed or the result is too old"""
+        max_age = max_age if max_age is not None else config.HEALTH_MAX_AGE
+        record = self.records.get(station_uuid)
+        return record is None or time.time() - record[CHECKED_AT] > max_age
+
+
+class HealthProber:
+    """
+    Probes station URLs with bounded asyncio concurrency and per-host rate
+    limits, recording reachability, latency, codec and bitrate
+    
+    Meant for the stations the user sees, such as favorites and the rows
+    of the list, not the whole catalog: every probe opens a connection to
+    a third-party broadcaster.
+    
+    Runs its own event loop on a thread of its own rather than on the
+    executor, as a run may last for hours; results go to a HealthStore and
+    to an optional callback called from that thread.
+    """
+    
+    def __init__(self, store, concurrency=None, per_host=None, host_interval=None, timeout=None, on_result=None):
+        """
+        Args:
+            store: HealthStore receiving the results
+            concurrency: Maximum probes in flight
+            per_host: Maximum probes in flight against one host
+            host_interval: Minimum seconds between probe starts against one host
+            timeout: Seconds until a probe counts as failed
+            on_result: Optional callback(station_uuid, result_dict)
+        """
+        self.store = store
+        self.concurrency = concurrency or config.HEALTH_CONCURRENCY
+        self.per_host = per_host or config.HEALTH_PER_HOST
+        self.host_interval = host_interval if host_interval is not None else config.HEALTH_HOST_INTERVAL
+        self.timeout = timeout or config.HEALTH_TIMEOUT
+        self.on_result = on_result
+        
+        self.thread = None
+        self.token = CancelToken()
+        self.probed = 0
+        
+        # Stations passed to start() not yet taken by a run, as (stations, max_age)
+        self.lock = threading.Lock()
+        self.pending = deque()
+        self.running = False
+    
+    def start(self, stations, max_age=None):
+        """
+        Probe stations in the background, skipping those with fresh results
+        
+        Stations passed while a run is in progress are probed by that run,
+        after the ones it already has.
+        
+        Args:
+            stations: Station dictionaries, probed in the given order
+            max_age: Seconds after which a result is probed again
+        """
+        with self.lock:
+            self.pending.append((list(stations), max_age))
+            if self.running:
+                return
+            self.running = True
+            self.token = CancelToken()
+        self.thread = threading.Thread(target=self._run)
+        self.thread.daemon = True
+        self.thread.start()
+    
+    def cancel(self):
+        """Stop after the probes in flight"""
+        with self.lock:
+            self.pending.clear()
+        self.token.cancel()
+    
+    def _run(self):
+        """Background thread probing the pending stations"""
+        try:
+            asyncio.run(self.probe_all(()))
+        except Exception as e:
+            print(f"Station health checks failed: {e}")
+            with self.lock:
+                self.running = False
+    
+    def _stations(self, stations):
+        """
+        Yield the stations to probe: the given ones, then those passed to
+        start() meanwhile, skipping fresh results
+        """
+        batch, max_age = stations, None
+        while True:
+            for station in batch:
+                if self.token.cancelled:
+                    break
+                if station.get('url') and self.store.is_stale(station.get('stationuuid'), max_age):
+                    yield station
+            
+            # Ending the run and taking new stations must not interleave with start()
+            with self.lock:
+                if not self.pending or self.token.cancelled:
+                    self.running = False
+                    return
+                batch, max_age = self.pending.popleft()
+    
+    async def probe_all(self, stations):
+        """
+        Probe stations with a fixed number of worker coroutines
+        
+        The workers take stations from a short queue that is filled as they
+        free up, so a long list never turns into a coroutine per station.
+        
+        Args:
+            stations: Station dictionaries to probe
+        """
+        queue = asyncio.Queue(maxsize=self.concurrency)
+        hosts = {}
+        
+        async def _worker():
+            while True:
+                station = await queue.get()
+                if station is None:
+                    return
+                if not self.token.cancelled:
+                    await self._probe_station(station, hosts)
+        
+        workers = [asyncio.create_task(_worker()) for _ in range(self.concurrency)]
+        for station in self._stations(stations):
+            await queue.put(station)
+        for _ in workers:
+            await queue.put(None)
+        await asyncio.gather(*workers)
+        self.store.save()
+    
+    async def _probe_station(self, station, hosts):
+        """
+        Probe one station within the per-host limits and record the result
+        
+        Args:
+            station: Station dictionary
+            hosts: Per-host limits of the run, by host
+        """
+        url = station.get('url')
+        host = hosts.setdefault(urlparse(url).netloc, {
+            'limit': asyncio.Semaphore(self.per_host), 'next_start': 0.0})
+        
+        async with host['limit']:
+            # Space out probes against the same host
+            now = time.monotonic()
+            wait = host['next_start'] - now
+            host['next_start'] = max(now, host['next_start']) + self.host_interval
+            if wait > 0:
+                await asyncio.sleep(wait)
+            
+            result = await self.probe(url)
+        
+        self.store.record(station.get('stationuuid'), **result)
+        self.probed += 1
+        if self.on_result:
+            self.on_result(station.get('stationuuid'), result)
+        if self.probed % config.HEALTH_SAVE_EVERY == 0:
+            self.store.save()
+    
+    async def probe(self, url):
+        """
+        Probe one station URL
+        
+        Returns:
+            dict: reachable, latency_ms, codec and bitrate
+        """
+        started = time.monotonic()
+        try:
+            codec, bitrate = await asyncio.wait_for(self._follow(url), self.timeout)
+        except (OSError, asyncio.TimeoutError, ValueError, ssl.SSLError):
+            return {'reachable': False}
+        
+        return {
+            'reachable': True,
+            'latency_ms': int((time.monotonic() - started) * 1000),
+            'codec': codec,
+            'bitrate': bitrate,
+        }
+    
+    async def _follow(self, url):
+        """
+        Follow redirects and playlists until a stream answers
+        
+        Returns:
+            tuple: (codec, bitrate in kbps), either may be None
+        """
+        for _ in range(config.RESOLVER_MAX_DEPTH + 1):
+            target, codec, bitrate = await self._request(url)
+            if target is None:
+                return codec, bitrate
+            url = target
+        raise ValueError("Too many redirects")
+    
+    async def _request(self, url):
+        """
+        Request a URL until the first audio bytes arrive
+        
+        Returns:
+            tuple: (URL to follow or None, codec, bitrate in kbps)
+        """
+        parsed = urlparse(url)
+        if parsed.scheme not in ('http', 'https'):
+            raise ValueError(f"Unsupported scheme: {parsed.scheme}")
+        secure = parsed.scheme == 'https'
+        port = parsed.port or (443 if secure else 80)
+        path = parsed.path or '/'
+        if parsed.query:
+            path += '?' + parsed.query
+        
+        reader, writer = await asyncio.open_connection(
+            parsed.hostname, port, ssl=ssl.create_default_context() if secure else None)
+        try:
+            writer.write(
+                f"GET {path} HTTP/1.0\r\nHost: {parsed.netloc}\r\n"
+                f"User-Agent: {config.USER_AGENT}\r\nIcy-MetaData: 0\r\n\r\n".encode())
+            await writer.drain()
+            
+            status_line = await reader.readline()
+            parts = status_line.decode('latin-1').split()
+            if len(parts) < 2 or not parts[1].isdigit():
+                raise ValueError("Invalid response")
+            status = int(parts[1])
+            
+            headers = {}
+            while True:
+                line = await reader.readline()
+                if line in (b'\r\n', b'\n', b''):
+                    break
+                name, _, value = line.decode('latin-1').partition(':')
+                headers[name.strip().lower()] = value.strip()
+            
+            if status in (301, 302, 303, 307, 308) and 'location' in headers:
+                return urljoin(url, headers['location']), None, None
+            if status != 200:
+                raise ValueError(f"HTTP {status}")
+            
+            content_type = headers.get('content-type', '').split(';')[0].strip().lower()
+            extension = os.path.splitext(parsed.path)[1].lower()
+            playlist_type = PLAYLIST_CONTENT_TYPES.get(content_type) or PLAYLIST_EXTENSIONS.get(extension)
+            
+            if playlist_type:
+                body = (await reader.read(MAX_PLAYLIST_BYTES)).decode('utf-8', errors='replace')
+                entries = parse_pls(body) if playlist_type == 'pls' else parse_m3u(body)
+                if '#EXT-X-' in body:
+                    # HLS: the playlist itself answering is good enough
+                    return None, 'HLS', None
+                if not entries:
+                    raise ValueError("Empty playlist")
+                return urljoin(url, entries[0]), None, None
+            
+            # The station is only alive if audio actually flows
+            if not await reader.read(1):
+                raise ValueError("No audio data")
+            
+            bitrate = headers.get('icy-br', '').split(',')[0]
+            return (None, CONTENT_TYPE_CODECS.get(content_type),
+                    int(bitrate) if bitrate.isdigit() else None)
+        finally:
+            writer.close()
\ No newline at end of file
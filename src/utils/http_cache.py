@@ -0,0 +1,135 @@
+#!/usr/bin/env python3
+import os
+import json
+import time
+import hashlib
+import threading
+
+from ..utils import config
+
+
+class ResponseCache:
+    """
+    Disk cache of parsed API responses with a TTL, one file per response,
+    evicting the least recently used responses beyond a size limit
+    """
+    
+    def __init__(self, directory=None, ttl=None, max_bytes=None):
+        """
+        Initialize the cache
+        
+        Args:
+            directory: Where the responses are stored
+            ttl: Seconds a response stays fresh
+            max_bytes: Total size of the stored responses to stay under
+        """
+        self.directory = directory or config.REMOTE_CACHE_DIR
+        self.ttl = ttl if ttl is not None else config.REMOTE_CACHE_TTL
+        self.max_bytes = max_bytes if max_bytes is not None else config.REMOTE_CACHE_MAX_BYTES
+        
+        # file name -> [last used, size in bytes]
+        self.entries = {}
+        self.total_bytes = 0
+        self.lock = threading.Lock()
+        
+        self.scan()
+    
+    def scan(self):
+        """Pick up the responses stored by earlier runs"""
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+            with os.scandir(self.directory) as it:
+                for entry in it:
+                    if entry.name.endswith('.json'):
+                        stat = entry.stat()
+                        self.entries[entry.name] = [stat.st_mtime, stat.st_size]
+                        self.total_bytes += stat.st_size
+        except OSError as e:
+            print(f"Failed to read the response cache: {e}")
+    
+    def get(self, key, stale_ok=False):
+        """
+        Get a cached response
+        
+        Args:
+            key: Request the response belongs to
+            stale_ok: Also return a response older than the TTL, e.g. while offline
+        
+        Returns:
+            The parsed response, or None if it is not cached or expired
+        """
+        name = self._file_name(key)
+        with self.lock:
+            if name not in self.entries:
+                return None
+        
+        try:
+            with open(os.path.join(self.directory, name), 'r') as f:
+                entry = json.load(f)
+        except (OSError, ValueError):
+            return None
+        
+        # A hash collision, however unlikely, must not return another response
+        if entry.get('key') != key:
+            return None
+        if not stale_ok and entry.get('stored', 0) + self.ttl < time.time():
+            return None
+        
+        with self.lock:
+            if name in self.entries:
+                self.entries[name][0] = time.time()
+        return entry.get('body')
+    
+    def put(self, key, body):
+        """
+        Store a response, evicting old ones if the cache grew too large
+        
+        Args:
+            key: Request the response belongs to
+            body: Parsed response, anything JSON serializable
+        """
+        name = self._file_name(key)
+        path = os.path.join(self.directory, name)
+        data = json.dumps({'key': key, 'stored': time.time(), 'body': body})
+        
+        try:
+            # Readers never see a half written response
+            temp_path = f"{path}.{threading.get_ident()}.tmp"
+            with open(temp_path, 'w') as f:
+                f.write(data)
+            os.replace(temp_path, path)
+        except OSError as e:
+            print(f"Failed to cache a response: {e}")
+            return
+        
+        with self.lock:
+            previous = self.entries.get(name)
+            if previous:
+                self.total_bytes -= previous[1]
+            self.entries[name] = [time.time(), len(data)]
+            self.total_bytes += len(data)
+            evicted = self._evict()
+        
+        for name in evicted:
+            try:
+                os.remove(os.path.join(self.directory, name))
+            except OSError:
+                pass
+    
+    def _evict(self):
+        """Drop the least recently used entries beyond the size limit, lock held"""
+        if self.total_bytes <= self.max_bytes:
+            return []
+        
+        evicted = []
+        for name, (_, size) in sorted(self.entries.items(), key=lambda item: item[1][0]):
+            if self.total_bytes <= self.max_bytes:
+                break
+            del self.entries[name]
+            self.total_bytes -= size
+            evicted.append(name)
+        return evicted
+    
+    def _file_name(self, key):
+        """File name of the response to a request"""
+        return hashlib.sha1(key.encode()).hexdigest() + '.json'
\ No newline at end of file
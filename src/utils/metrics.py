@@ -0,0 +1,348 @@
+#!/usr/bin/env python3
+import os
+import math
+import resource
+import threading
+from bisect import bisect_left
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from ..utils import config
+from ..utils.executor import get_executor, percentile_ms, PRIORITY_NAMES
+
+# Content type of the Prometheus text exposition format
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# Histogram buckets in seconds
+TIME_TO_FIRST_AUDIO_BUCKETS = (0.25, 0.5, 1, 1.5, 2, 3, 5, 8, 13, 20)
+SEARCH_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5)
+CATALOG_LOAD_BUCKETS = (0.1, 0.25, 0.5, 1, 2, 4, 8, 15, 30)
+
+# Size of a memory page, for the resident set size
+PAGE_SIZE = os.sysconf('SC_PAGE_SIZE')
+
+
+class Counter:
+    """A count that only goes up"""
+    
+    type_name = 'counter'
+    
+    def __init__(self, name, help_text, labels=None, function=None):
+        """
+        Args:
+            name: Metric name
+            help_text: Description of the metric
+            labels: Optional dictionary of label names and values
+            function: Optional function returning the value when exported
+        """
+        self.name = name
+        self.help_text = help_text
+        self.labels = labels or {}
+        self.function = function
+        self.value = 0
+        self.lock = threading.Lock()
+    
+    def inc(self, amount=1):
+        """Add to the count"""
+        with self.lock:
+            self.value += amount
+    
+    def samples(self):
+        """Yield (name, labels, value) of the exported samples"""
+        yield self.name, self.labels, self.function() if self.function else self.value
+
+
+class Gauge(Counter):
+    """A value that goes up and down"""
+    
+    type_name = 'gauge'
+    
+    def set(self, value):
+        """Set the value"""
+        self.value = value
+
+
+class Histogram:
+    """Counts of observations in cumulative buckets, with their sum"""
+    
+    type_name = 'histogram'
+    
+    def __init__(self, name, help_text, buckets, labels=None):
+        """
+        Args:
+            name: Metric name
+            help_text: Description of the metric
+            buckets: Ascending upper bounds of the buckets
+            labels: Optional dictionary of label names and values
+        """
+        self.name = name
+        self.help_text = help_text
+        self.labels = labels or {}
+        self.buckets = tuple(buckets)
+        
+        # Observations per bucket, the last one above every bound
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.sum = 0.0
+        self.lock = threading.Lock()
+    
+    def observe(self, value):
+        """Record one observation"""
+        index = bisect_left(self.buckets, value)
+        with self.lock:
+            self.counts[index] += 1
+            self.sum += value
+    
+    def samples(self):
+        """Yield (name, labels, value) of the exported samples"""
+        with self.lock:
+            counts = list(self.counts)
+            total = self.sum
+        
+        cumulative = 0
+        for bound, count in zip(self.buckets + (math.inf,), counts):
+            cumulative += count
+            yield f"{self.name}_bucket", dict(self.labels, le=bound), cumulative
+        yield f"{self.name}_sum", self.labels, total
+        yield f"{self.name}_count", self.labels, cumulative
+
+
+class MetricsRegistry:
+    """The metrics of the process, rendered in the Prometheus text format"""
+    
+    def __init__(self):
+        self.metrics = []
+        self.lock = threading.Lock()
+    
+    def register(self, metric):
+        """Add a metric and return it"""
+        with self.lock:
+            self.metrics.append(metric)
+        return metric
+    
+    def counter(self, name, help_text, labels=None, function=None):
+        return self.register(Counter(name, help_text, labels, function))
+    
+    def gauge(self, name, help_text, labels=None, function=None):
+        return self.register(Gauge(name, help_text, labels, function))
+    
+    def histogram(self, name, help_text, buckets, labels=None):
+        return self.register(Histogram(name, help_text, buckets, labels))
+    
+    def render(self):
+        """
+        Render every metric
+        
+        Returns:
+            str: The metrics in the Prometheus text exposition format
+        """
+        # Samples of one name go together, under one HELP and TYPE
+        families = {}
+        with self.lock:
+            for metric in self.metrics:
+                families.setdefault(metric.name, []).append(metric)
+        
+        lines = []
+        for name, metrics in families.items():
+            lines.append(f"# HELP {name} {metrics[0].help_text}")
+            lines.append(f"# TYPE {name} {metrics[0].type_name}")
+            for metric in metrics:
+                try:
+                    for sample_name, labels, value in metric.samples():
+                        if value is not None:
+                            lines.append(f"{sample_name}{_format_labels(labels)} {_format_value(value)}")
+                except Exception as e:
+                    print(f"Failed to collect metric {name}: {e}")
+        return "\n".join(lines) + "\n"
+
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    """Answers scrapes of the metrics endpoint"""
+    
+    def log_message(self, format, *args):
+        # Scraped every few seconds, don't spam the console
+        pass
+    
+    def do_GET(self):
+        if self.path.split('?')[0] not in ('/metrics', '/'):
+            self.send_error(404)
+            return
+        
+        body = self.server.registry.render().encode()
+        self.send_response(200)
+        self.send_header("Content-Type", CONTENT_TYPE)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+class MetricsExporter:
+    """
+    Exports a registry for monitoring: served over HTTP on a local port,
+    written to a file every few seconds (e.g. for node_exporter's textfile
+    collector), or both
+    """
+    
+    def __init__(self, registry=None, port=None, host=None, file_path=None, file_interval=None):
+        """
+        Initialize the exporter
+        
+        Args:
+            registry: MetricsRegistry to export, the process registry by default
+            port: TCP port serving /metrics, None to not serve (0 picks a free port)
+            host: Address to bind to
+            file_path: File the metrics are written to, None to not write one
+            file_interval: Seconds between writes of the file
+        """
+        self.registry = registry or REGISTRY
+        self.port = port if port is not None else config.METRICS_PORT
+        self.host = host or config.METRICS_HOST
+        self.file_path = file_path or config.METRICS_FILE_PATH
+        self.file_interval = file_interval or config.METRICS_FILE_INTERVAL
+        
+        self.httpd = None
+        self.stopping = threading.Event()
+        self.writer = None
+    
+    def start(self):
+        """Start serving and writing in background threads"""
+        if self.port is not None:
+            self.httpd = ThreadingHTTPServer((self.host, self.port), _MetricsHandler)
+            self.httpd.daemon_threads = True
+            self.httpd.registry = self.registry
+            self.port = self.httpd.server_address[1]
+            
+            thread = threading.Thread(target=self.httpd.serve_forever)
+            thread.daemon = True
+            thread.start()
+        
+        if self.file_path:
+            self.stopping.clear()
+            self.writer = threading.Thread(target=self._writer_thread)
+            self.writer.daemon = True
+            self.writer.start()
+        return self
+    
+    def stop(self):
+        """Stop serving, and write the file a last time"""
+        if self.httpd:
+            self.httpd.shutdown()
+            self.httpd.server_close()
+            self.httpd = None
+        
+        if self.writer:
+            self.stopping.set()
+            self.writer.join()
+            self.writer = None
+            self.write_file()
+    
+    def write_file(self):
+        """Replace the metrics file, so readers never see a partial one"""
+        temporary = self.file_path + ".tmp"
+        try:
+            with open(temporary, 'w') as f:
+                f.write(self.registry.render())
+            os.replace(temporary, self.file_path)
+        except OSError as e:
+            print(f"Failed to write metrics to {self.file_path}: {e}")
+    
+    def _writer_thread(self):
+        """Background thread writing the metrics file"""
+        while True:
+            self.write_file()
+            if self.stopping.wait(self.file_interval):
+                return
+
+
+def resident_memory_bytes():
+    """Resident set size of the process"""
+    try:
+        with open('/proc/self/statm', 'r') as f:
+            return int(f.read().split()[1]) * PAGE_SIZE
+    except OSError:
+        # Without /proc, the peak is the best available figure
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+
+def _format_labels(labels):
+    """Render labels as {name="value",...}"""
+    if not labels:
+        return ""
+    pairs = []
+    for name, value in labels.items():
+        if isinstance(value, float):
+            value = _format_value(value)
+        value = str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+        pairs.append(f'{name}="{value}"')
+    return "{" + ",".join(pairs) + "}"
+
+
+def _format_value(value):
+    """Render a sample value"""
+    if isinstance(value, float):
+        if math.isinf(value):
+            return "+Inf" if value > 0 else "-Inf"
+        return repr(value)
+    return str(value)
+
+
+def _executor_wait(priority, fraction):
+    """Recent wait percentile of an executor class, in seconds"""
+    milliseconds = percentile_ms(get_executor().waits[priority], fraction)
+    return milliseconds / 1000 if milliseconds is not None else None
+
+
+# Metrics of the process, maintained wherever the work happens
+REGISTRY = MetricsRegistry()
+
+# Playback
+PLAYS = REGISTRY.counter('framenux_plays_total', "Stations started")
+TIME_TO_FIRST_AUDIO = REGISTRY.histogram(
+    'framenux_time_to_first_audio_seconds', "Time from starting a station until its audio plays",
+    TIME_TO_FIRST_AUDIO_BUCKETS)
+RECONNECTS = REGISTRY.counter('framenux_reconnects_total', "Reconnects after a stream failed or ended")
+BUFFERING_STARTUP = REGISTRY.counter(
+    'framenux_buffering_events_total', "Times playback waited for the stream buffer to refill",
+    {'phase': 'startup'})
+BUFFERING_UNDERRUN = REGISTRY.counter(
+    'framenux_buffering_events_total', "Times playback waited for the stream buffer to refill",
+    {'phase': 'playback'})
+
+# Station list
+SEARCH_DURATION = REGISTRY.histogram(
+    'framenux_search_duration_seconds', "Time to search or filter the stations and show the first page",
+    SEARCH_BUCKETS, {'kind': 'search'})
+FILTER_DURATION = REGISTRY.histogram(
+    'framenux_search_duration_seconds', "Time to search or filter the stations and show the first page",
+    SEARCH_BUCKETS, {'kind': 'filter'})
+CATALOG_LOAD_DURATION = REGISTRY.histogram(
+    'framenux_catalog_load_seconds', "Time to load and index the station catalog", CATALOG_LOAD_BUCKETS)
+CATALOG_STATIONS = REGISTRY.gauge('framenux_catalog_stations', "Stations in the loaded catalog")
+IMAGE_CACHE_HITS = REGISTRY.counter(
+    'framenux_image_cache_requests_total', "Station images shown, by whether they were cached",
+    {'result': 'hit'})
+IMAGE_CACHE_MISSES = REGISTRY.counter(
+    'framenux_image_cache_requests_total', "Station images shown, by whether they were cached",
+    {'result': 'miss'})
+
+# Process
+RESIDENT_MEMORY = REGISTRY.gauge(
+    'process_resident_memory_bytes', "Resident memory size in bytes", function=resident_memory_bytes)
+
+
+def _register_executor_metrics(registry):
+    """Export the queues, outcomes and waits of the shared executor, per priority class"""
+    for priority, name in enumerate(PRIORITY_NAMES):
+        registry.gauge('framenux_executor_queued_tasks', "Background tasks waiting for a worker",
+                       {'class': name}, function=lambda p=priority: len(get_executor().queues[p]))
+        registry.gauge('framenux_executor_running_tasks', "Background tasks running",
+                       {'class': name}, function=lambda p=priority: get_executor().running[p])
+        for outcome in ('completed', 'failed', 'cancelled'):
+            registry.counter('framenux_executor_tasks_total', "Background tasks finished, by outcome",
+                             {'class': name, 'outcome': outcome},
+                             function=lambda p=priority, o=outcome: get_executor().counts[p][o])
+        for quantile in (0.5, 0.95):
+            registry.gauge('framenux_executor_wait_seconds', "Recent wait of background tasks for a worker",
+                           {'class': name, 'quantile': quantile},
+                           function=lambda p=priority, q=quantile: _executor_wait(p, q))
+
+
+_register_executor_metrics(REGISTRY)
\ No newline at end of file
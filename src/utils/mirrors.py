@@ -0,0 +1,258 @@
+#!/usr/bin/env python3
+import os
+import json
+import time
+import queue
+import shutil
+import tempfile
+import threading
+import http.client
+import urllib.error
+import urllib.request
+
+from ..utils import config
+
+# Maximum size of a probe response we are willing to read
+MAX_PROBE_BYTES = 64 * 1024
+
+# Size of the chunks a download is copied in
+DOWNLOAD_CHUNK_BYTES = 64 * 1024
+
+# Errors that mean a mirror did not serve a usable response
+MIRROR_ERRORS = (OSError, ValueError, http.client.HTTPException)
+
+
+class MirrorSelector:
+    """
+    Picks the fastest responsive catalog mirror by racing small requests
+    against all of them, remembers the choice with a TTL and fails over to
+    the next fastest mirror when a download breaks off
+    """
+    
+    def __init__(self, mirrors=None, cache_path=None, ttl=None, probe_timeout=None, read_timeout=None):
+        """
+        Initialize the selector
+        
+        Args:
+            mirrors: Base URLs of the mirrors, in order of preference
+            cache_path: Where the chosen mirror is persisted between runs
+            ttl: Seconds the chosen mirror stays chosen
+            probe_timeout: Seconds a mirror has to answer the probe
+            read_timeout: Seconds a download may stall before failing over
+        """
+        self.mirrors = list(mirrors if mirrors is not None else config.STATIONS_API_MIRRORS)
+        self.cache_path = cache_path or config.MIRROR_PATH
+        self.ttl = ttl if ttl is not None else config.MIRROR_TTL
+        self.probe_timeout = probe_timeout if probe_timeout is not None else config.MIRROR_PROBE_TIMEOUT
+        self.read_timeout = read_timeout if read_timeout is not None else config.MIRROR_READ_TIMEOUT
+        
+        # {'mirror': str, 'expires': float} or None
+        self.choice = None
+        self.lock = threading.Lock()
+        
+        # mirror -> probe latency in seconds (None if it failed), from the last race
+        self.latencies = {}
+        
+        self.load_choice()
+    
+    def load_choice(self):
+        """Load the previously chosen mirror from disk"""
+        try:
+            if os.path.exists(self.cache_path):
+                with open(self.cache_path, 'r') as f:
+                    self.choice = json.load(f)
+        except Exception as e:
+            print(f"Failed to load the chosen mirror: {e}")
+            self.choice = None
+    
+    def save_choice(self):
+        """Persist the chosen mirror to disk"""
+        with self.lock:
+            snapshot = self.choice
+        
+        try:
+            with open(self.cache_path, 'w') as f:
+                json.dump(snapshot, f)
+        except Exception as e:
+            print(f"Failed to save the chosen mirror: {e}")
+    
+    def remember(self, mirror):
+        """Make a mirror the choice for the next TTL seconds"""
+        with self.lock:
+            self.choice = {'mirror': mirror, 'expires': time.time() + self.ttl}
+        self.save_choice()
+    
+    def forget(self, mirror):
+        """Drop a mirror as the choice, e.g. after a download from it failed"""
+        with self.lock:
+            if not self.choice or self.choice.get('mirror') != mirror:
+                return
+            self.choice = None
+        self.save_choice()
+    
+    def choose(self, exclude=()):
+        """
+        Get the mirror to download from
+        
+        Args:
+            exclude: Mirrors that already failed
+        
+        Returns:
+            str: The remembered mirror while it is fresh, otherwise the
+                 winner of a race between the other mirrors, or None if
+                 none of them answered
+        """
+        current = self.current()
+        if current is not None and current not in exclude:
+            return current
+        return self.race([mirror for mirror in self.mirrors if mirror not in exclude])
+    
+    def current(self):
+        """Get the remembered mirror, or None if there is none or it expired"""
+        with self.lock:
+            choice = self.choice
+        
+        if choice and choice.get('mirror') in self.mirrors and choice.get('expires', 0) > time.time():
+            return choice['mirror']
+        return None
+    
+    def race(self, mirrors):
+        """
+        Probe mirrors in parallel and return the first one that answers
+        
+        Args:
+            mirrors: Base URLs of the mirrors to race
+        
+        Returns:
+            str: The fastest responsive mirror, or None
+        """
+        results = queue.Queue()
+        
+        def probe_thread(mirror):
+            results.put((mirror, self.probe(mirror)))
+        
+        for mirror in mirrors:
+            thread = threading.Thread(target=probe_thread, args=(mirror,))
+            thread.daemon = True
+            thread.start()
+        
+        # Slower probes finish in the background and are ignored
+        deadline = time.monotonic() + self.probe_timeout
+        for _ in mirrors:
+            try:
+                mirror, latency = results.get(timeout=max(0.0, deadline - time.monotonic()))
+            except queue.Empty:
+                break
+            self.latencies[mirror] = latency
+            if latency is not None:
+                return mirror
+        return None
+    
+    def probe(self, mirror):
+        """
+        Time a small request to a mirror
+        
+        Returns:
+            float: Seconds until the response was read, or None if it failed
+        """
+        started = time.monotonic()
+        request = urllib.request.Request(mirror + config.MIRROR_PROBE_PATH,
+                                         headers={'User-Agent': config.USER_AGENT})
+        try:
+            with urllib.request.urlopen(request, timeout=self.probe_timeout) as response:
+                response.read(MAX_PROBE_BYTES)
+        except MIRROR_ERRORS:
+            return None
+        return time.monotonic() - started
+    
+    def download(self, path, destination, validate=None, validators=None):
+        """
+        Download a file from the fastest mirror, failing over to the next
+        fastest whenever a download fails or breaks off
+        
+        Each attempt starts over: mirrors are separate databases whose
+        responses differ byte for byte, so a partial file cannot be resumed
+        from another mirror. For the same reason the validators of a
+        previous download are only sent to the mirror that issued them.
+        
+        Args:
+            path: Path of the file on the mirrors
+            destination: Where to store it; it is only replaced once a
+                download completed and passed validation
+            validate: Optional function called with the downloaded file's
+                path, raising ValueError if its content is unusable
+            validators: Optional dict with the 'mirror', 'etag' and
+                'last_modified' of the current file, to download it only
+                if it changed
+        
+        Returns:
+            tuple: (mirror the response came from, response headers, or
+                    None if the file has not changed)
+        
+        Raises:
+            OSError: If no mirror delivered the file
+        """
+        tried = []
+        last_error = None
+        
+        while True:
+            mirror = self.choose(exclude=tried)
+            if mirror is None:
+                break
+            tried.append(mirror)
+            
+            headers = {'User-Agent': config.USER_AGENT}
+            if validators and validators.get('mirror') == mirror:
+                if validators.get('etag'):
+                    headers['If-None-Match'] = validators['etag']
+                if validators.get('last_modified'):
+                    headers['If-Modified-Since'] = validators['last_modified']
+            
+            try:
+                response_headers = self._fetch(mirror + path, destination, validate, headers)
+            except MIRROR_ERRORS as e:
+                print(f"Download from {mirror} failed: {e}")
+                self.forget(mirror)
+                last_error = e
+                continue
+            
+            self.remember(mirror)
+            return mirror, response_headers
+        
+        raise OSError(f"No mirror could deliver {path}" + (f": {last_error}" if last_error else ""))
+    
+    def _fetch(self, url, destination, validate, headers):
+        """
+        Download a URL next to the destination and move it into place
+        
+        Returns:
+            The response headers, or None if the server answered 304 Not Modified
+        """
+        request = urllib.request.Request(url, headers=headers)
+        
+        # A temporary file in the same directory can be renamed atomically
+        fd, temp_path = tempfile.mkstemp(dir=os.path.dirname(destination) or '.', suffix='.part')
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                # The timeout applies to every read, so a stalled mirror fails over
+                try:
+                    response = urllib.request.urlopen(request, timeout=self.read_timeout)
+                except urllib.error.HTTPError as e:
+                    if e.code == 304:
+                        return None
+                    raise
+                
+                with response:
+                    shutil.copyfileobj(response, f, DOWNLOAD_CHUNK_BYTES)
+                    
+                    # Reads end quietly when the connection closes early
+                    if response.length:
+                        raise http.client.IncompleteRead(b'', response.length)
+            
+            if validate:
+                validate(temp_path)
+            os.replace(temp_path, destination)
+            return response.headers
+        finally:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
\ No newline at end of file
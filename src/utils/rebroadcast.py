@@ -0,0 +1,242 @@
+#!/usr/bin/env python3
+import socket
+import threading
+import collections
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from ..utils import config
+
+
+class _Listener:
+    """A connected listener and its bounded queue of unsent data"""
+    
+    def __init__(self, address):
+        self.address = address
+        self.chunks = collections.deque()
+        self.queued_bytes = 0
+        self.sent_bytes = 0
+        self.closed = False
+        
+        # Set when the listener fell too far behind and was disconnected
+        self.dropped = False
+
+
+class _ListenerHandler(BaseHTTPRequestHandler):
+    """Streams the rebroadcast to one listener"""
+    
+    protocol_version = "HTTP/1.0"
+    
+    def setup(self):
+        super().setup()
+        # Keep the kernel from hiding a slow listener behind a huge send buffer
+        self.connection.setsockopt(socket.SOL_SOCKET, socket.SO_SNDBUF, config.REBROADCAST_SOCKET_BUFFER)
+    
+    def log_message(self, format, *args):
+        # Listeners come and go, don't spam the console
+        pass
+    
+    def do_GET(self):
+        rebroadcaster = self.server.rebroadcaster
+        if self.path.split('?')[0] != '/stream':
+            self.send_error(404)
+            return
+        
+        listener = rebroadcaster.add_listener(self.client_address)
+        if listener is None:
+            self.send_error(503, "Too many listeners")
+            return
+        
+        try:
+            self.send_response(200)
+            self.send_header("Content-Type", rebroadcaster.content_type)
+            self.send_header("Cache-Control", "no-cache")
+            if rebroadcaster.station_name:
+                self.send_header("icy-name", rebroadcaster.station_name)
+            self.end_headers()
+            
+            while True:
+                data = rebroadcaster.next_chunk(listener)
+                if data is None:
+                    break
+                self.wfile.write(data)
+                listener.sent_bytes += len(data)
+        except (BrokenPipeError, ConnectionResetError):
+            pass
+        finally:
+            rebroadcaster.remove_listener(listener)
+
+
+class StreamRebroadcaster:
+    """
+    Fans the received, still encoded stream out to listeners on the local
+    network over HTTP, so that several rooms share one upstream connection
+    
+    Every listener has a bounded queue; listeners that fall behind by more
+    than the queue size are disconnected instead of slowing anybody down.
+    """
+    
+    def __init__(self, port=None, host=None, client_buffer=None, max_listeners=None):
+        """
+        Initialize the rebroadcaster
+        
+        Args:
+            port: TCP port to listen on (0 picks a free port)
+            host: Address to bind to
+            client_buffer: Maximum bytes queued per listener
+            max_listeners: Maximum number of simultaneous listeners
+        """
+        self.port = port if port is not None else config.REBROADCAST_PORT
+        self.host = host if host is not None else config.REBROADCAST_HOST
+        self.client_buffer = client_buffer or config.REBROADCAST_CLIENT_BUFFER
+        self.max_listeners = max_listeners or config.REBROADCAST_MAX_LISTENERS
+        
+        self.content_type = "application/octet-stream"
+        self.station_name = None
+        
+        # Recent data handed to new listeners so they start playing at once,
+        # kept well below the listener queue so new listeners are not dropped
+        self.backlog = collections.deque()
+        self.backlog_bytes = 0
+        self.backlog_limit = min(config.REBROADCAST_BACKLOG, self.client_buffer // 4)
+        
+        self.listeners = []
+        self.condition = threading.Condition()
+        
+        # Statistics
+        self.bytes_received = 0
+        self.bytes_sent_closed = 0
+        self.dropped_listeners = 0
+        
+        self.httpd = None
+        self.thread = None
+    
+    def start(self):
+        """Start serving listeners in a background thread"""
+        self.httpd = ThreadingHTTPServer((self.host, self.port), _ListenerHandler)
+        self.httpd.daemon_threads = True
+        self.httpd.rebroadcaster = self
+        self.port = self.httpd.server_address[1]
+        
+        self.thread = threading.Thread(target=self.httpd.serve_forever)
+        self.thread.daemon = True
+        self.thread.start()
+        return self
+    
+    def stop(self):
+        """Disconnect all listeners and stop serving"""
+        self.disconnect_all()
+        if self.httpd:
+            self.httpd.shutdown()
+            self.httpd.server_close()
+            self.httpd = None
+    
+    def set_source(self, content_type, station_name=None):
+        """
+        Announce the format of the data that will be fed next
+        
+        Listeners of a different format are disconnected, their players
+        reconnect and pick up the new format.
+        
+        Args:
+            content_type: MIME type of the encoded stream
+            station_name: Name sent to listeners as icy-name
+        """
+        with self.condition:
+            changed = content_type != self.content_type
+            self.content_type = content_type
+            self.station_name = station_name
+            self.backlog.clear()
+            self.backlog_bytes = 0
+        
+        if changed:
+            self.disconnect_all()
+    
+    def feed(self, data):
+        """
+        Queue encoded stream data for every listener, never blocks on listeners
+        
+        Args:
+            data: Bytes received from upstream
+        """
+        with self.condition:
+            self.bytes_received += len(data)
+            
+            self.backlog.append(data)
+            self.backlog_bytes += len(data)
+            while self.backlog_bytes > self.backlog_limit and len(self.backlog) > 1:
+                self.backlog_bytes -= len(self.backlog.popleft())
+            
+            for listener in self.listeners:
+                if listener.closed:
+                    continue
+                if listener.queued_bytes + len(data) > self.client_buffer:
+                    # Too slow, drop it rather than buffering without bounds
+                    listener.closed = True
+                    listener.dropped = True
+                    self.dropped_listeners += 1
+                    continue
+                listener.chunks.append(data)
+                listener.queued_bytes += len(data)
+            
+            self.condition.notify_all()
+    
+    def add_listener(self, address):
+        """Register a new listener, starting with the recent backlog"""
+        with self.condition:
+            if len(self.listeners) >= self.max_listeners:
+                return None
+            
+            listener = _Listener(address)
+            listener.chunks.extend(self.backlog)
+            listener.queued_bytes = self.backlog_bytes
+            self.listeners.append(listener)
+            return listener
+    
+    def remove_listener(self, listener):
+        """Forget a listener whose connection ended"""
+        with self.condition:
+            listener.closed = True
+            if listener in self.listeners:
+                self.listeners.remove(listener)
+                self.bytes_sent_closed += listener.sent_bytes
+    
+    def next_chunk(self, listener):
+        """
+        Wait for the next piece of data for a listener
+        
+        Returns:
+            bytes: Data to send, or None once the listener is disconnected
+        """
+        with self.condition:
+            while not listener.chunks and not listener.closed:
+                self.condition.wait(1.0)
+            
+            if listener.closed:
+                return None
+            
+            data = listener.chunks.popleft()
+            listener.queued_bytes -= len(data)
+            return data
+    
+    def disconnect_all(self):
+        """Disconnect every listener"""
+        with self.condition:
+            for listener in self.listeners:
+                listener.closed = True
+            self.condition.notify_all()
+    
+    def get_stats(self):
+        """
+        Get listener statistics
+        
+        Returns:
+            dict: Listener count, bytes received and sent, dropped listeners
+        """
+        with self.condition:
+            return {
+                'port': self.port,
+                'listeners': len(self.listeners),
+                'bytes_received': self.bytes_received,
+                'bytes_sent': self.bytes_sent_closed + sum(listener.sent_bytes for listener in self.listeners),
+                'dropped_listeners': self.dropped_listeners,
+            }
@@ -0,0 +1,98 @@
+#!/usr/bin/env python3
+import time
+import random
+from gi.repository import GLib
+
+from ..utils import config
+
+class ReconnectSupervisor:
+    """
+    Decides when a dropped stream is reconnected, using exponential backoff
+    with jitter and a limited retry budget
+    """
+    
+    def __init__(self, base_delay=None, max_delay=None, max_attempts=None, stable_seconds=None, rng=None):
+        """
+        Initialize the supervisor
+        
+        Args:
+            base_delay: Delay before the first retry in seconds
+            max_delay: Upper bound for a single delay in seconds
+            max_attempts: Retries allowed before giving up
+            stable_seconds: Playback time after which the retry budget is refilled
+            rng: Random generator used for jitter
+        """
+        self.base_delay = base_delay if base_delay is not None else config.RECONNECT_BASE_DELAY
+        self.max_delay = max_delay if max_delay is not None else config.RECONNECT_MAX_DELAY
+        self.max_attempts = max_attempts if max_attempts is not None else config.RECONNECT_MAX_ATTEMPTS
+        self.stable_seconds = stable_seconds if stable_seconds is not None else config.RECONNECT_STABLE_SECONDS
+        self.rng = rng or random.Random()
+        
+        # Retries used in the current outage
+        self.attempts = 0
+        
+        # Reconnects over the lifetime of the player
+        self.total_reconnects = 0
+        
+        self.connected_at = None
+        self.source_id = None
+    
+    def next_delay(self):
+        """
+        Get the delay before the next reconnect attempt
+        
+        Returns:
+            float: Seconds to wait, or None if the retry budget is used up
+        """
+        # A stream that played for a while before dropping starts a new outage
+        if self.connected_at is not None and time.monotonic() - self.connected_at >= self.stable_seconds:
+            self.attempts = 0
+        self.connected_at = None
+        
+        if self.attempts >= self.max_attempts:
+            return None
+        
+        delay = min(self.max_delay, self.base_delay * (2 ** self.attempts))
+        self.attempts += 1
+        
+        # Equal jitter: keep half the delay, randomize the other half
+        return delay / 2 + self.rng.uniform(0, delay / 2)
+    
+    def mark_connected(self):
+        """Record that the stream is playing again"""
+        self.connected_at = time.monotonic()
+    
+    def schedule(self, delay, callback):
+        """
+        Call a function on the main loop after a delay
+        
+        Args:
+            delay: Seconds to wait
+            callback: Function to call
+        """
+        self.cancel()
+        self.total_reconnects += 1
+        self.source_id = GLib.timeout_add(int(delay * 1000), self._on_timeout, callback)
+    
+    def _on_timeout(self, callback):
+        """Run a scheduled reconnect"""
+        self.source_id = None
+        callback()
+        return False
+    
+    def cancel(self):
+        """Cancel a scheduled reconnect"""
+        if self.source_id is not None:
+            GLib.source_remove(self.source_id)
+            self.source_id = None
+    
+    def reset(self):
+        """Forget the current outage, e.g. when a new station is played"""
+        self.cancel()
+        self.attempts = 0
+        self.connected_at = None
+    
+    @property
+    def is_pending(self):
+        """True while a reconnect is scheduled"""
+        return self.source_id is not None
@@ -0,0 +1,356 @@
+#!/usr/bin/env python3
+import os
+import re
+import time
+import queue
+import threading
+import urllib.request
+
+from ..utils import config
+
+# File extensions of the encoded formats we may receive
+CONTENT_TYPE_EXTENSIONS = {
+    'audio/mpeg': 'mp3',
+    'audio/aac': 'aac',
+    'audio/aacp': 'aac',
+    'application/ogg': 'ogg',
+    'audio/ogg': 'ogg',
+    'audio/x-wav': 'wav',
+    'audio/flac': 'flac',
+    'audio/x-flac': 'flac',
+}
+
+# Sentinel that tells the writer thread to finish
+_STOP = object()
+
+
+def safe_filename(name):
+    """Turn a station name into something usable as a directory name"""
+    name = re.sub(r'[^\w\- ]+', '_', name or 'station').strip()
+    return name[:80] or 'station'
+
+
+class StreamRecorder:
+    """
+    Writes an encoded stream to disk as it is received, without decoding,
+    split into segments rotated by time and/or size
+    
+    Data is handed over with feed() from any thread and written by a
+    dedicated writer thread, so slow disks never block the caller.
+    """
+    
+    def __init__(self, station_name, directory=None, segment_seconds=None, segment_bytes=None):
+        """
+        Initialize the recorder
+        
+        Args:
+            station_name: Name used for the recording directory
+            directory: Base directory for recordings
+            segment_seconds: Start a new file after this many seconds (0 disables)
+            segment_bytes: Start a new file after this many bytes (0 disables)
+        """
+        self.station_name = station_name
+        self.directory = directory or config.RECORDINGS_DIR
+        self.segment_seconds = segment_seconds if segment_seconds is not None else config.RECORDING_SEGMENT_SECONDS
+        self.segment_bytes = segment_bytes if segment_bytes is not None else config.RECORDING_SEGMENT_BYTES
+        self.content_type = None
+        
+        # Current segment
+        self.file = None
+        self.file_path = None
+        self.segment_started = 0
+        self.segment_written = 0
+        
+        # Statistics
+        self.started = time.monotonic()
+        self.segments = 0
+        self.bytes_written = 0
+        self.write_seconds = 0.0
+        self.max_write_seconds = 0.0
+        self.dropped_chunks = 0
+        self.errors = 0
+        self._rate_sample = (self.started, 0)
+        self.throughput = 0
+        
+        self.queue = queue.Queue(maxsize=config.RECORDING_QUEUE_CHUNKS)
+        self.writer = threading.Thread(target=self._writer_thread)
+        self.writer.daemon = True
+        self.writer.start()
+    
+    def set_source(self, content_type, station_name=None):
+        """
+        Announce the format of the data that will be fed next, starting a new segment
+        
+        Args:
+            content_type: MIME type of the encoded stream
+            station_name: Name of the station the data comes from
+        """
+        self.queue.put(('source', content_type, station_name))
+    
+    def source_failed(self, error):
+        """
+        Count a failed or dropped connection of the source feeding this recorder
+        
+        Args:
+            error: Exception raised by the connection
+        """
+        self.errors += 1
+    
+    def feed(self, data, block=False, timeout=None):
+        """
+        Queue encoded stream data for writing
+        
+        Args:
+            data: Bytes received from the station
+            block: Wait for room instead of dropping data when the disk lags behind
+            timeout: Seconds to wait for room when blocking, None waits forever
+        
+        Returns:
+            bool: True if the data was queued; a blocking call that timed out
+            returns False and leaves retrying to the caller
+        """
+        try:
+            self.queue.put(('data', data), block=block, timeout=timeout)
+            return True
+        except queue.Full:
+            if not block:
+                self.dropped_chunks += 1
+            return False
+    
+    def stop(self):
+        """Flush queued data, close the current segment and end the writer thread"""
+        self.queue.put(_STOP)
+        self.writer.join()
+    
+    def _writer_thread(self):
+        """Background thread writing queued data to the current segment"""
+        while True:
+            item = self.queue.get()
+            if item is _STOP:
+                break
+            
+            try:
+                if item[0] == 'source':
+                    _, self.content_type, station_name = item
+                    if station_name:
+                        self.station_name = station_name
+                    self._close_segment()
+                else:
+                    self._write(item[1])
+            except OSError as e:
+                print(f"Recording of {self.station_name} failed: {e}")
+                self.errors += 1
+                self._close_segment()
+        
+        self._close_segment()
+    
+    def _write(self, data):
+        """Write data to the current segment, rotating it when it is full"""
+        now = time.monotonic()
+        if self.file is not None and (
+            (self.segment_seconds and now - self.segment_started >= self.segment_seconds) or
+            (self.segment_bytes and self.segment_written + len(data) > self.segment_bytes)
+        ):
+            self._close_segment()
+        
+        if self.file is None:
+            self._open_segment()
+        
+        # Flushed so the time includes handing the data to the OS, where a
+        # lagging disk makes writes wait, not just copying it into a buffer
+        self.file.write(data)
+        self.file.flush()
+        elapsed = time.monotonic() - now
+        
+        self.segment_written += len(data)
+        self.bytes_written += len(data)
+        self.write_seconds += elapsed
+        self.max_write_seconds = max(self.max_write_seconds, elapsed)
+    
+    def _open_segment(self):
+        """Start a new segment file named after the station and start time"""
+        station_dir = os.path.join(self.directory, safe_filename(self.station_name))
+        os.makedirs(station_dir, exist_ok=True)
+        
+        extension = CONTENT_TYPE_EXTENSIONS.get(self.content_type, 'bin')
+        timestamp = time.strftime("%Y%m%d-%H%M%S")
+        self.file_path = os.path.join(station_dir, f"{timestamp}-{self.segments:04d}.{extension}")
+        
+        self.file = open(self.file_path, 'wb')
+        self.segment_started = time.monotonic()
+        self.segment_written = 0
+        self.segments += 1
+    
+    def _close_segment(self):
+        """Close the current segment file"""
+        if self.file is not None:
+            self.file.close()
+            self.file = None
+    
+    def get_stats(self):
+        """
+        Get throughput and disk-write statistics
+        
+        Returns:
+            dict: Statistics of this recorder
+        """
+        now = time.monotonic()
+        last_time, last_bytes = self._rate_sample
+        if now - last_time >= 1.0:
+            self.throughput = int((self.bytes_written - last_bytes) * 8 / (now - last_time) / 1000)
+            self._rate_sample = (now, self.bytes_written)
+        
+        return {
+            'station': self.station_name,
+            'file': self.file_path,
+            'segments': self.segments,
+            'bytes_written': self.bytes_written,
+            'throughput_kbps': self.throughput,
+            'write_ms_total': int(self.write_seconds * 1000),
+            'write_ms_max': round(self.max_write_seconds * 1000, 2),
+            'queued_chunks': self.queue.qsize(),
+            'dropped_chunks': self.dropped_chunks,
+            'errors': self.errors,
+            'seconds': int(now - self.started),
+        }
+
+
+class HttpStreamSource:
+    """
+    Downloads a station on its own connection and feeds a recorder,
+    for recording stations other than the one playing
+    """
+    
+    def __init__(self, url, recorder, resolver=None):
+        """
+        Args:
+            url: Station URL, playlists are resolved first
+            recorder: StreamRecorder or TimeshiftBuffer that receives the data
+            resolver: Optional StreamResolver for playlist and redirect URLs
+        """
+        self.url = url
+        self.recorder = recorder
+        self.resolver = resolver
+        self.stopped = threading.Event()
+        self.thread = threading.Thread(target=self._download_thread)
+        self.thread.daemon = True
+    
+    def start(self):
+        """Start downloading in a background thread"""
+        self.thread.start()
+        return self
+    
+    def stop(self):
+        """Stop downloading"""
+        self.stopped.set()
+        self.thread.join(config.RESOLVER_TIMEOUT)
+    
+    def _download_thread(self):
+        """Background thread that copies the stream into the recorder"""
+        attempts = 0
+        while not self.stopped.is_set():
+            try:
+                stream_url = self.url
+                if self.resolver:
+                    stream_url = self.resolver.lookup(self.url) or self.resolver.resolve(self.url)
+                
+                # No Icy-MetaData header, so the server sends plain audio
+                request = urllib.request.Request(stream_url, headers={'User-Agent': config.USER_AGENT})
+                with urllib.request.urlopen(request, timeout=config.RESOLVER_TIMEOUT) as response:
+                    self.recorder.set_source(response.headers.get_content_type())
+                    attempts = 0
+                    while not self.stopped.is_set():
+                        data = response.read1(config.RECORDING_READ_SIZE)
+                        if not data:
+                            raise ConnectionError("the station closed the connection")
+                        # Block rather than lose data, the network just waits,
+                        # but keep checking so stop() never waits on a full queue
+                        while (not self.recorder.feed(data, block=True, timeout=config.RECORDING_FEED_WAIT) and
+                               not self.stopped.is_set()):
+                            pass
+            except Exception as e:
+                if self.stopped.is_set():
+                    break
+                print(f"Recording connection to {self.url} failed: {e}")
+                self.recorder.source_failed(e)
+            
+            # Back off before reconnecting to a dropped station
+            delay = min(config.RECONNECT_MAX_DELAY, config.RECONNECT_BASE_DELAY * (2 ** attempts))
+            attempts += 1
+            self.stopped.wait(delay)
+
+
+class RecordingManager:
+    """
+    Keeps track of all recordings of one process: the playing station, which
+    shares the player's connection, and any number of other stations
+    """
+    
+    def __init__(self, player=None, resolver=None):
+        """
+        Args:
+            player: RadioPlayer whose station can be recorded without a second connection
+            resolver: Optional StreamResolver for stations recorded on their own connection
+        """
+        self.player = player
+        self.resolver = resolver
+        self.current_recorder = None
+        
+        # stationuuid -> (StreamRecorder, HttpStreamSource)
+        self.recordings = {}
+    
+    def start_current(self):
+        """Record whatever the player plays, from its own connection"""
+        if self.current_recorder is None:
+            self.current_recorder = StreamRecorder(self.player.station_name)
+            self.player.add_stream_tap(self.current_recorder)
+        return self.current_recorder
+    
+    def stop_current(self):
+        """Stop recording the playing station"""
+        if self.current_recorder is not None:
+            self.player.remove_stream_tap(self.current_recorder)
+            self.current_recorder.stop()
+            self.current_recorder = None
+    
+    def start_station(self, station):
+        """
+        Record a station on its own connection, concurrently with playback
+        
+        Args:
+            station: Station dictionary
+        """
+        station_uuid = station.get('stationuuid')
+        if station_uuid in self.recordings:
+            return self.recordings[station_uuid][0]
+        
+        recorder = StreamRecorder(station.get('name'))
+        source = HttpStreamSource(station.get('url'), recorder, self.resolver).start()
+        self.recordings[station_uuid] = (recorder, source)
+        return recorder
+    
+    def stop_station(self, station_uuid):
+        """Stop recording a station started with start_station()"""
+        recording = self.recordings.pop(station_uuid, None)
+        if recording:
+            recorder, source = recording
+            source.stop()
+            recorder.stop()
+    
+    def stop_all(self):
+        """Stop every recording"""
+        self.stop_current()
+        for station_uuid in list(self.recordings):
+            self.stop_station(station_uuid)
+    
+    def get_stats(self):
+        """
+        Get the statistics of every recording
+        
+        Returns:
+            dict: Recorder statistics keyed by stationuuid, 'current' for the playing station
+        """
+        stats = {uuid: recorder.get_stats() for uuid, (recorder, _) in self.recordings.items()}
+        if self.current_recorder is not None:
+            stats['current'] = self.current_recorder.get_stats()
+        return stats
\ No newline at end of file
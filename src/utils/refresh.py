@@ -0,0 +1,170 @@
+#!/usr/bin/env python3
+import os
+import json
+import time
+import hashlib
+import threading
+
+from ..utils import config
+from ..utils.mirrors import MirrorSelector
+
+# Size of the chunks the catalog is hashed in
+HASH_CHUNK_BYTES = 1024 * 1024
+
+
+class CatalogRefresher:
+    """
+    Keeps the downloaded stations list fresh
+    
+    Downloads are conditional: the ETag and Last-Modified of the current
+    file are sent along, so an unchanged catalog costs a single 304
+    response. For servers that send neither, a download identical to the
+    current file is recognized by its hash and not reported as a change.
+    A background scheduler refreshes the catalog once it is older than
+    the maximum age.
+    """
+    
+    def __init__(self, mirrors=None, destination=None, meta_path=None, max_age=None,
+                 check_interval=None, on_updated=None):
+        """
+        Initialize the refresher
+        
+        Args:
+            mirrors: Optional MirrorSelector choosing the catalog server
+            destination: Path of the stations file
+            meta_path: Where the validators of the stations file are kept
+            max_age: Seconds after which the catalog is refreshed
+            check_interval: Seconds between checks of the catalog age
+            on_updated: Called from the background thread after a changed
+                catalog was downloaded by the scheduler
+        """
+        self.mirrors = mirrors or MirrorSelector()
+        self.destination = destination or config.STATIONS_JSON_PATH
+        self.meta_path = meta_path or config.CATALOG_META_PATH
+        self.max_age = max_age if max_age is not None else config.CATALOG_MAX_AGE
+        self.check_interval = check_interval if check_interval is not None else config.CATALOG_REFRESH_CHECK_INTERVAL
+        self.on_updated = on_updated
+        
+        # {'mirror', 'etag', 'last_modified', 'sha256', 'checked'} of the current file
+        self.meta = {}
+        self.load_meta()
+        
+        # Only one refresh writes the stations file at a time
+        self.refresh_lock = threading.Lock()
+        self.stopping = threading.Event()
+        self.thread = None
+    
+    def load_meta(self):
+        """Load the validators of the stations file"""
+        try:
+            if os.path.exists(self.meta_path):
+                with open(self.meta_path, 'r') as f:
+                    self.meta = json.load(f)
+        except Exception as e:
+            print(f"Failed to load catalog metadata: {e}")
+            self.meta = {}
+    
+    def save_meta(self):
+        """Persist the validators of the stations file"""
+        try:
+            with open(self.meta_path, 'w') as f:
+                json.dump(self.meta, f)
+        except Exception as e:
+            print(f"Failed to save catalog metadata: {e}")
+    
+    def age(self):
+        """
+        Seconds since the catalog was last confirmed current
+        
+        Returns:
+            float: The age, infinite if there is no stations file
+        """
+        if not os.path.exists(self.destination):
+            return float('inf')
+        checked = self.meta.get('checked') or os.path.getmtime(self.destination)
+        return max(0.0, time.time() - checked)
+    
+    def is_stale(self):
+        """Whether the catalog is older than the maximum age"""
+        return self.age() > self.max_age
+    
+    def refresh(self, conditional=True):
+        """
+        Download the catalog unless it has not changed
+        
+        Args:
+            conditional: Send the validators of the current file
+        
+        Returns:
+            bool: True if the stations file now holds a changed catalog
+        
+        Raises:
+            OSError: If no mirror delivered the catalog
+        """
+        with self.refresh_lock:
+            validators = self.meta if conditional and os.path.exists(self.destination) else None
+            mirror, headers = self.mirrors.download(config.STATIONS_API_PATH, self.destination,
+                                                    validate=_validate_stations, validators=validators)
+            self.meta['checked'] = time.time()
+            
+            if headers is None:
+                print(f"The stations list on {mirror} has not changed")
+                self.save_meta()
+                return False
+            
+            digest = _file_digest(self.destination)
+            changed = digest != self.meta.get('sha256')
+            self.meta.update({
+                'mirror': mirror,
+                'etag': headers.get('ETag'),
+                'last_modified': headers.get('Last-Modified'),
+                'sha256': digest,
+            })
+            self.save_meta()
+            return changed
+    
+    def start(self):
+        """Start refreshing the catalog in the background whenever it is stale"""
+        if self.thread is not None:
+            return
+        self.stopping.clear()
+        self.thread = threading.Thread(target=self._scheduler_thread)
+        self.thread.daemon = True
+        self.thread.start()
+    
+    def stop(self):
+        """Stop the background refreshes"""
+        self.stopping.set()
+        self.thread = None
+    
+    def _scheduler_thread(self):
+        """Background thread that refreshes the catalog once it is stale"""
+        while not self.stopping.is_set():
+            if self.is_stale():
+                try:
+                    changed = self.refresh()
+                except OSError as e:
+                    # Try again at the next check
+                    print(f"Failed to refresh the stations list: {e}")
+                    changed = False
+                
+                if changed and self.on_updated and not self.stopping.is_set():
+                    self.on_updated()
+            
+            self.stopping.wait(self.check_interval)
+
+
+def _validate_stations(path):
+    """Verify that a downloaded stations list is a JSON list"""
+    with open(path, 'r') as f:
+        if not isinstance(json.load(f), list):
+            raise ValueError("The stations list is not a list")
+
+
+def _file_digest(path):
+    """SHA-256 of a file"""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(HASH_CHUNK_BYTES), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
\ No newline at end of file
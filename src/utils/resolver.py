@@ -0,0 +1,259 @@
+#!/usr/bin/env python3
+import os
+import json
+import time
+import queue
+import socket
+import threading
+import configparser
+import urllib.request
+from urllib.parse import urljoin, urlparse
+
+from ..utils import config
+
+# Content types and extensions of playlists that wrap the real stream URL
+PLAYLIST_CONTENT_TYPES = {
+    'audio/x-scpls': 'pls',
+    'application/pls+xml': 'pls',
+    'audio/x-mpegurl': 'm3u',
+    'audio/mpegurl': 'm3u',
+    'application/x-mpegurl': 'm3u',
+    'application/vnd.apple.mpegurl': 'm3u',
+}
+PLAYLIST_EXTENSIONS = {'.pls': 'pls', '.m3u': 'm3u', '.m3u8': 'm3u'}
+
+# Maximum size of a playlist we are willing to read
+MAX_PLAYLIST_BYTES = 64 * 1024
+
+
+class StreamResolver:
+    """
+    Resolves station URLs (playlists, redirect chains) to direct stream URLs
+    in the background and caches the results with a TTL
+    """
+    
+    def __init__(self, cache_path=None, ttl=None, timeout=None):
+        """
+        Initialize the resolver
+        
+        Args:
+            cache_path: Where resolved URLs are persisted between runs
+            ttl: Seconds a resolved URL stays valid
+            timeout: Network timeout for a single request in seconds
+        """
+        self.cache_path = cache_path or config.RESOLVED_URLS_PATH
+        self.ttl = ttl if ttl is not None else config.RESOLVER_TTL
+        self.timeout = timeout if timeout is not None else config.RESOLVER_TIMEOUT
+        
+        # url -> {'resolved': str, 'expires': float}
+        self.cache = {}
+        self.lock = threading.Lock()
+        
+        # Background work queue, and the URLs queued or resolving (guarded by the lock)
+        self.queue = queue.Queue()
+        self.pending = set()
+        self.worker = None
+        
+        self.load_cache()
+    
+    def load_cache(self):
+        """Load previously resolved URLs from disk"""
+        try:
+            if os.path.exists(self.cache_path):
+                with open(self.cache_path, 'r') as f:
+                    self.cache = json.load(f)
+        except Exception as e:
+            print(f"Failed to load resolved URLs: {e}")
+            self.cache = {}
+    
+    def save_cache(self):
+        """Persist resolved URLs to disk, dropping the oldest beyond the size limit"""
+        with self.lock:
+            entries = sorted(self.cache.items(), key=lambda item: item[1]['expires'])
+            self.cache = dict(entries[-config.RESOLVER_MAX_ENTRIES:])
+            snapshot = dict(self.cache)
+        
+        try:
+            with open(self.cache_path, 'w') as f:
+                json.dump(snapshot, f)
+        except Exception as e:
+            print(f"Failed to save resolved URLs: {e}")
+    
+    def lookup(self, url):
+        """
+        Return the cached direct stream URL for a station URL
+        
+        Args:
+            url: Station URL as listed in the catalog
+        
+        Returns:
+            str: The resolved URL, or None if it is unknown or expired
+        """
+        with self.lock:
+            entry = self.cache.get(url)
+        
+        if entry and entry['expires'] > time.time():
+            return entry['resolved']
+        return None
+    
+    def invalidate(self, url):
+        """Forget the resolved URL of a station, e.g. after it failed to play"""
+        with self.lock:
+            self.cache.pop(url, None)
+    
+    def prewarm(self, urls):
+        """
+        Resolve station URLs in the background
+        
+        Args:
+            urls: Station URLs to resolve unless a fresh result is cached
+        """
+        for url in urls:
+            if not url or self.lookup(url):
+                continue
+            with self.lock:
+                if url in self.pending:
+                    continue
+                self.pending.add(url)
+            self.queue.put(url)
+        
+        with self.lock:
+            if self.worker is None:
+                self.worker = threading.Thread(target=self._worker_thread)
+                self.worker.daemon = True
+                self.worker.start()
+    
+    def prewarm_recent(self):
+        """Re-resolve favorites and recently played stations whose cached result has expired"""
+        with self.lock:
+            expired = [url for url, entry in self.cache.items() if entry['expires'] <= time.time()]
+        self.prewarm(expired)
+    
+    def _worker_thread(self):
+        """Background thread that resolves queued URLs"""
+        resolved_any = False
+        
+        while True:
+            try:
+                url = self.queue.get(timeout=1)
+            except queue.Empty:
+                # Exit only if nothing was queued while we were waiting
+                with self.lock:
+                    if self.queue.empty():
+                        self.worker = None
+                        break
+                continue
+            
+            try:
+                resolved = self.resolve(url)
+                with self.lock:
+                    self.cache[url] = {'resolved': resolved, 'expires': time.time() + self.ttl}
+                resolved_any = True
+            except Exception as e:
+                print(f"Failed to resolve {url}: {e}")
+            finally:
+                with self.lock:
+                    self.pending.discard(url)
+        
+        if resolved_any:
+            self.save_cache()
+    
+    def resolve(self, url, depth=0):
+        """
+        Resolve a station URL to a direct stream URL
+        
+        Follows HTTP redirects, unwraps PLS/M3U playlists and warms the DNS
+        lookup of the final host. Blocks, so call it off the main thread.
+        
+        Args:
+            url: Station URL to resolve
+            depth: Current playlist nesting depth
+        
+        Returns:
+            str: Direct stream URL
+        """
+        request = urllib.request.Request(url, headers={'User-Agent': config.USER_AGENT})
+        with urllib.request.urlopen(request, timeout=self.timeout) as response:
+            final_url = response.geturl()
+            content_type = response.headers.get_content_type()
+            
+            playlist_type = PLAYLIST_CONTENT_TYPES.get(content_type)
+            if playlist_type is None:
+                extension = os.path.splitext(urlparse(final_url).path)[1].lower()
+                playlist_type = PLAYLIST_EXTENSIONS.get(extension)
+            
+            if playlist_type is None:
+                # Not a playlist, the redirect target is the stream itself
+                self._warm_dns(final_url)
+                return final_url
+            
+            body = response.read(MAX_PLAYLIST_BYTES).decode('utf-8', errors='replace')
+        
+        if playlist_type == 'pls':
+            entries = parse_pls(body)
+        else:
+            # HLS playlists must be played as a playlist, not unwrapped
+            if '#EXT-X-' in body:
+                return final_url
+            entries = parse_m3u(body)
+        
+        if not entries:
+            raise ValueError("Playlist contains no streams")
+        
+        stream_url = urljoin(final_url, entries[0])
+        if depth < config.RESOLVER_MAX_DEPTH:
+            return self.resolve(stream_url, depth + 1)
+        return stream_url
+    
+    def _warm_dns(self, url):
+        """Look up the stream host so the system resolver cache is warm"""
+        host = urlparse(url).hostname
+        if host:
+            try:
+                socket.getaddrinfo(host, None)
+            except OSError:
+                pass
+
+
+def parse_pls(text):
+    """
+    Extract stream URLs from a PLS playlist
+    
+    Args:
+        text: Playlist contents
+    
+    Returns:
+        list: Stream URLs in playlist order
+    """
+    parser = configparser.ConfigParser(interpolation=None, strict=False)
+    try:
+        parser.read_string(text)
+    except configparser.Error:
+        return []
+    
+    section = next((name for name in parser.sections() if name.lower() == 'playlist'), None)
+    if section is None:
+        return []
+    
+    files = [
+        (int(key[4:]), value.strip())
+        for key, value in parser.items(section)
+        if key.startswith('file') and key[4:].isdigit()
+    ]
+    return [value for _, value in sorted(files) if value]
+
+
+def parse_m3u(text):
+    """
+    Extract stream URLs from an M3U playlist
+    
+    Args:
+        text: Playlist contents
+    
+    Returns:
+        list: Stream URLs in playlist order
+    """
+    return [
+        line.strip() for line in text.splitlines()
+        if line.strip() and not line.strip().startswith('#')
+    ]
\ No newline at end of file
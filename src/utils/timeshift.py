@@ -0,0 +1,294 @@
+#!/usr/bin/env python3
+import time
+import tempfile
+import threading
+import collections
+from urllib.parse import urlparse, parse_qs
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from ..utils import config
+from ..utils.recorder import HttpStreamSource
+
+
+class TimeshiftBuffer:
+    """
+    Bounded buffer of a live stream addressed by absolute byte offsets
+    
+    The newest data is kept in memory. Data pushed out of memory spills into
+    a fixed-size ring file on disk, so the rewind window can be much longer
+    than the memory cap. Data older than both is discarded.
+    """
+    
+    def __init__(self, memory_limit=None, disk_limit=None, spill_dir=None):
+        """
+        Initialize an empty buffer
+        
+        Args:
+            memory_limit: Maximum bytes held in memory
+            disk_limit: Size of the ring file on disk in bytes (0 disables spilling)
+            spill_dir: Directory for the ring file
+        """
+        self.memory_limit = memory_limit if memory_limit is not None else config.TIMESHIFT_MEMORY_BYTES
+        self.disk_limit = disk_limit if disk_limit is not None else config.TIMESHIFT_DISK_BYTES
+        self.content_type = "application/octet-stream"
+        
+        # Absolute offsets of the oldest available and the next written byte
+        self.start = 0
+        self.end = 0
+        
+        # In-memory chunks, oldest first, as (offset, bytes)
+        self.memory = collections.deque()
+        self.memory_bytes = 0
+        
+        # Ring file holding the data that no longer fits in memory
+        self.spill_file = None
+        if self.disk_limit:
+            self.spill_file = tempfile.TemporaryFile(dir=spill_dir or config.APP_DIR)
+        
+        # Set while the upstream connection is down, until the source reconnects
+        self.failed = False
+        self.errors = 0
+        
+        self.closed = False
+        self.condition = threading.Condition()
+    
+    @property
+    def memory_start(self):
+        """Offset of the oldest byte held in memory"""
+        return self.memory[0][0] if self.memory else self.end
+    
+    def set_source(self, content_type, station_name=None):
+        """Remember the format of the buffered stream, the upstream is connected again"""
+        with self.condition:
+            self.content_type = content_type
+            self.failed = False
+    
+    def source_failed(self, error):
+        """
+        Mark the upstream connection as down
+        
+        Readers that caught up with the live edge get the end of the stream
+        instead of waiting for data that does not come, so the player
+        notices and reconnects.
+        
+        Args:
+            error: Exception raised by the connection
+        """
+        with self.condition:
+            self.failed = True
+            self.errors += 1
+            self.condition.notify_all()
+    
+    def feed(self, data, block=False, timeout=None):
+        """
+        Append stream data, spilling the oldest data to disk if memory is full
+        
+        Args:
+            data: Bytes received from the station
+            block: Unused, writes never block
+            timeout: Unused, writes never block
+        
+        Returns:
+            bool: Always True, the data is always taken
+        """
+        with self.condition:
+            self.memory.append((self.end, data))
+            self.memory_bytes += len(data)
+            self.end += len(data)
+            
+            while self.memory_bytes > self.memory_limit and len(self.memory) > 1:
+                offset, chunk = self.memory.popleft()
+                self.memory_bytes -= len(chunk)
+                if self.spill_file is not None:
+                    self._spill(offset, chunk)
+            
+            # Everything before the disk window (or memory, without one) is gone
+            self.start = max(self.start, self.memory_start - self.disk_limit if self.spill_file else self.memory_start)
+            self.condition.notify_all()
+        return True
+    
+    def _spill(self, offset, chunk):
+        """Write a chunk into the ring file at its offset modulo the file size"""
+        while chunk:
+            position = offset % self.disk_limit
+            part = chunk[:self.disk_limit - position]
+            self.spill_file.seek(position)
+            self.spill_file.write(part)
+            offset += len(part)
+            chunk = chunk[len(part):]
+    
+    def _read_spilled(self, offset, size):
+        """Read from the ring file, which holds the bytes before memory_start"""
+        size = min(size, self.memory_start - offset)
+        position = offset % self.disk_limit
+        size = min(size, self.disk_limit - position)
+        self.spill_file.seek(position)
+        return self.spill_file.read(size)
+    
+    def read(self, offset, size, timeout=None):
+        """
+        Read data starting at an absolute offset, waiting for live data
+        
+        Args:
+            offset: Absolute offset to read from; offsets that fell out of the
+                window are moved forward to the oldest available byte
+            size: Maximum number of bytes to return
+            timeout: Seconds to wait for new data
+        
+        Returns:
+            tuple: (data, offset of the returned data), data is empty on
+            timeout and None once the buffer is closed, or at the live edge
+            while the upstream connection is down
+        """
+        with self.condition:
+            while offset >= self.end and not self.closed and not self.failed:
+                if not self.condition.wait(timeout):
+                    return b'', offset
+            
+            # Data buffered before the upstream dropped is still served
+            if self.closed or offset >= self.end:
+                return None, offset
+            
+            offset = max(offset, self.start)
+            
+            if offset < self.memory_start:
+                self.spill_file.flush()
+                return self._read_spilled(offset, size), offset
+            
+            for chunk_offset, chunk in self.memory:
+                if chunk_offset + len(chunk) > offset:
+                    begin = offset - chunk_offset
+                    return chunk[begin:begin + size], offset
+            return b'', offset
+    
+    def close(self):
+        """Release the ring file and wake up all readers"""
+        with self.condition:
+            self.closed = True
+            self.memory.clear()
+            self.memory_bytes = 0
+            if self.spill_file is not None:
+                self.spill_file.close()
+                self.spill_file = None
+            self.condition.notify_all()
+
+
+class _TimeshiftHandler(BaseHTTPRequestHandler):
+    """Serves the buffered stream to the local player from a given offset"""
+    
+    protocol_version = "HTTP/1.0"
+    
+    def log_message(self, format, *args):
+        pass
+    
+    def do_GET(self):
+        session = self.server.session
+        query = parse_qs(urlparse(self.path).query)
+        offset = int(query.get('offset', [session.buffer.end])[0])
+        
+        self.send_response(200)
+        self.send_header("Content-Type", session.buffer.content_type)
+        self.end_headers()
+        
+        try:
+            while True:
+                data, offset = session.buffer.read(offset, config.TIMESHIFT_READ_SIZE, timeout=1.0)
+                if data is None:
+                    break
+                if data:
+                    self.wfile.write(data)
+                    offset += len(data)
+                    session.served_offset = offset
+        except (BrokenPipeError, ConnectionResetError):
+            pass
+
+
+class TimeshiftSession:
+    """
+    Keeps ingesting a station into a TimeshiftBuffer and serves it to the
+    player on a local port, so pausing the player never stalls the upstream
+    connection and short rewinds are possible
+    
+    The station is fetched without ICY metadata, so stream titles are not
+    available while timeshifting.
+    """
+    
+    def __init__(self, url, resolver=None, buffer=None):
+        """
+        Args:
+            url: Station URL to ingest
+            resolver: Optional StreamResolver for playlist and redirect URLs
+            buffer: Optional TimeshiftBuffer, a default sized one is created otherwise
+        """
+        self.buffer = buffer or TimeshiftBuffer()
+        self.source = HttpStreamSource(url, self.buffer, resolver)
+        self.started = time.monotonic()
+        self.served_offset = 0
+        
+        self.httpd = ThreadingHTTPServer(("127.0.0.1", 0), _TimeshiftHandler)
+        self.httpd.daemon_threads = True
+        self.httpd.session = self
+        self.thread = None
+    
+    def start(self):
+        """Start ingesting and serving"""
+        self.source.start()
+        self.thread = threading.Thread(target=self.httpd.serve_forever)
+        self.thread.daemon = True
+        self.thread.start()
+        return self
+    
+    def stop(self):
+        """Stop ingesting, serving and release the buffer"""
+        self.source.stopped.set()
+        self.buffer.close()
+        self.httpd.shutdown()
+        self.httpd.server_close()
+    
+    def url(self, offset=None):
+        """
+        Get the local URL the player should play
+        
+        Args:
+            offset: Absolute offset to start from, None for the live edge
+        """
+        url = f"http://127.0.0.1:{self.httpd.server_address[1]}/timeshift"
+        if offset is not None:
+            url += f"?offset={int(offset)}"
+        return url
+    
+    @property
+    def byte_rate(self):
+        """Average stream byte rate measured while ingesting"""
+        elapsed = time.monotonic() - self.started
+        if elapsed >= 2 and self.buffer.end:
+            return self.buffer.end / elapsed
+        return config.TIMESHIFT_DEFAULT_BYTE_RATE
+    
+    def rewind_offset(self, seconds, position=None):
+        """
+        Compute the offset some seconds before a position
+        
+        Args:
+            seconds: How far to go back
+            position: Offset to go back from, the last served offset by default
+        """
+        position = self.served_offset if position is None else position
+        return max(self.buffer.start, int(position - seconds * self.byte_rate))
+    
+    def get_stats(self):
+        """
+        Get buffer statistics
+        
+        Returns:
+            dict: Window length, memory use and delay behind live
+        """
+        byte_rate = self.byte_rate
+        return {
+            'window_seconds': int((self.buffer.end - self.buffer.start) / byte_rate),
+            'behind_live_seconds': int(max(0, self.buffer.end - self.served_offset) / byte_rate),
+            'memory_bytes': self.buffer.memory_bytes,
+            'ingested_bytes': self.buffer.end,
+            'upstream_failed': self.buffer.failed,
+            'upstream_errors': self.buffer.errors,
+        }
\ No newline at end of file
@@ -0,0 +1,252 @@
+#!/usr/bin/env python3
+import os
+import sys
+import time
+import threading
+import traceback
+from collections import deque, Counter
+
+from ..utils import config
+from ..utils.executor import percentile_ms
+
+
+class StallWatchdog:
+    """
+    Detects stalls of the main loop and reports which handler caused them
+    
+    A high-priority timer on the main loop measures how late each tick
+    runs. A stall lasts from the last tick the loop serviced until the
+    next one, so it is never undercounted and overcounted by at most one
+    tick interval. A monitor thread samples the Python stack of the main
+    loop's thread while a tick is overdue, so the handler that blocks it
+    is caught in the act. Stalls longer than the threshold are written to a
+    log file, each with its stack and the rolling statistics of recent
+    stalls and handlers.
+    """
+    
+    def __init__(self, threshold=None, interval=None, log_path=None, history=None):
+        """
+        Initialize the watchdog
+        
+        Args:
+            threshold: Seconds the loop may go without servicing a tick
+                before it counts as a stall
+            interval: Seconds between ticks of the main-loop timer
+            log_path: File the stalls are written to
+            history: Number of recent stalls the statistics cover
+        """
+        self.threshold = threshold if threshold is not None else config.WATCHDOG_THRESHOLD
+        self.interval = interval if interval is not None else config.WATCHDOG_INTERVAL
+        self.log_path = log_path or config.WATCHDOG_LOG_PATH
+        history = history or config.WATCHDOG_HISTORY
+        
+        # Thread running the main loop, and the code of the function that entered it
+        self.loop_thread = None
+        self.loop_code = None
+        
+        # Tick times and stack samples of the stall in progress
+        self.lock = threading.Lock()
+        self.last_tick = None
+        self.samples = []
+        
+        # Recent tick lateness and stalls, and stalls not yet logged
+        self.latencies = deque(maxlen=history)
+        self.stalls = deque(maxlen=history)
+        self.pending = []
+        self.stall_count = 0
+        
+        self.stopping = threading.Event()
+        self.thread = None
+    
+    def start(self, timeout_add):
+        """
+        Start watching the main loop
+        
+        Args:
+            timeout_add: Function adding a repeating high-priority timer to
+                the main loop, called as timeout_add(milliseconds, callback)
+        """
+        if self.thread is not None:
+            return
+        self.stopping.clear()
+        timeout_add(max(1, int(self.interval * 1000)), self._tick)
+        
+        self.thread = threading.Thread(target=self._monitor_thread)
+        self.thread.daemon = True
+        self.thread.start()
+    
+    def stop(self):
+        """Stop watching and write the stalls not logged yet"""
+        self.stopping.set()
+        if self.thread is not None:
+            self.thread.join()
+            self.thread = None
+        self._write_pending()
+    
+    def _tick(self):
+        """Timer on the main loop measuring how late it runs"""
+        now = time.monotonic()
+        if self.loop_code is None:
+            # The caller of the first tick is the function that runs the main loop
+            self.loop_thread = threading.get_ident()
+            self.loop_code = sys._getframe(1).f_code
+        
+        with self.lock:
+            if self.last_tick is not None:
+                self.latencies.append(max(0.0, now - self.last_tick - self.interval))
+                
+                # The blocking handler started after the last serviced tick,
+                # at any point up to when this tick was due
+                stalled = now - self.last_tick
+                if stalled >= self.threshold:
+                    self._record_stall(stalled)
+            self.samples = []
+            self.last_tick = now
+        
+        # The main loop drops the timer once this returns False
+        return not self.stopping.is_set()
+    
+    def _record_stall(self, duration):
+        """Keep a stall that just ended, with the lock held"""
+        # Attribute the stall to the handler and line seen most often
+        counts = Counter((sample['handler'], sample['location']) for sample in self.samples)
+        if counts:
+            (handler, location), _ = counts.most_common(1)[0]
+            stack = next(sample['stack'] for sample in self.samples
+                         if (sample['handler'], sample['location']) == (handler, location))
+        else:
+            # Nothing sampled: the stall was too short, or C code held the GIL throughout
+            handler, location, stack = "unknown", "unknown", ""
+        
+        stall = {
+            'time': time.time(),
+            'duration': duration,
+            'handler': handler,
+            'location': location,
+            'stack': stack,
+            'samples': len(self.samples),
+        }
+        self.stalls.append(stall)
+        self.pending.append(stall)
+        self.stall_count += 1
+    
+    def _monitor_thread(self):
+        """Background thread sampling the main loop's stack while it is overdue"""
+        while not self.stopping.wait(self.interval / 2):
+            with self.lock:
+                overdue = (self.last_tick is not None and
+                           time.monotonic() - self.last_tick > self.threshold / 2)
+            if overdue:
+                self._sample()
+            self._write_pending()
+    
+    def _sample(self):
+        """Capture the stack of the main loop's thread"""
+        frame = sys._current_frames().get(self.loop_thread)
+        if frame is None:
+            return
+        
+        frames = []
+        while frame is not None:
+            frames.append(frame)
+            frame = frame.f_back
+        frames.reverse()
+        
+        # The handler is the frame the main loop called
+        handler = None
+        for index, frame in enumerate(frames[:-1]):
+            if frame.f_code is self.loop_code:
+                handler = frames[index + 1]
+        
+        sample = {
+            'handler': _describe(handler) if handler is not None else "main loop (no Python handler)",
+            'location': _describe(frames[-1]),
+            'stack': ''.join(traceback.format_stack(frames[-1])),
+        }
+        del frames, frame, handler
+        
+        with self.lock:
+            self.samples.append(sample)
+    
+    def _write_pending(self):
+        """Append the stalls not logged yet to the log file"""
+        with self.lock:
+            stalls, self.pending = self.pending, []
+        if not stalls:
+            return
+        
+        summary = self.format_summary()
+        lines = []
+        for stall in stalls:
+            when = time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(stall['time']))
+            message = f"Main loop stalled for {stall['duration'] * 1000:.0f} ms in {stall['handler']}"
+            print(message)
+            lines.append(f"{when} {message}, at {stall['location']} ({stall['samples']} samples)\n")
+            lines.append(stall['stack'])
+        lines.append(summary + "\n")
+        
+        try:
+            # Keep one previous log, so the file does not grow without bound
+            if os.path.exists(self.log_path) and os.path.getsize(self.log_path) > config.WATCHDOG_LOG_MAX_BYTES:
+                os.replace(self.log_path, self.log_path + ".1")
+            with open(self.log_path, 'a') as f:
+                f.writelines(lines)
+        except OSError as e:
+            print(f"Failed to write the stall log: {e}")
+    
+    def get_stats(self):
+        """
+        Rolling statistics of the main loop
+        
+        Returns:
+            dict: Tick lateness and stall percentiles in ms over the recent
+                history, the total stall count and the slowest handlers
+        """
+        with self.lock:
+            latencies = list(self.latencies)
+            stalls = list(self.stalls)
+            count = self.stall_count
+        
+        handlers = {}
+        for stall in stalls:
+            entry = handlers.setdefault(stall['handler'], {'count': 0, 'total_ms': 0.0, 'max_ms': 0.0})
+            entry['count'] += 1
+            entry['total_ms'] += stall['duration'] * 1000
+            entry['max_ms'] = max(entry['max_ms'], stall['duration'] * 1000)
+        slowest = sorted(handlers.items(), key=lambda item: item[1]['total_ms'], reverse=True)
+        
+        durations = [stall['duration'] for stall in stalls]
+        return {
+            'stalls': count,
+            'latency_ms_p50': percentile_ms(latencies, 0.5),
+            'latency_ms_p95': percentile_ms(latencies, 0.95),
+            'latency_ms_max': percentile_ms(latencies, 1.0),
+            'stall_ms_p50': percentile_ms(durations, 0.5),
+            'stall_ms_p95': percentile_ms(durations, 0.95),
+            'stall_ms_max': percentile_ms(durations, 1.0),
+            'handlers': dict(slowest[:config.WATCHDOG_TOP_HANDLERS]),
+        }
+    
+    def format_summary(self):
+        """The rolling statistics as the lines of the log file"""
+        stats = self.get_stats()
+        lines = [
+            f"  recent stalls: {len(self.stalls)} (total {stats['stalls']}), "
+            f"p50 {stats['stall_ms_p50']} ms, p95 {stats['stall_ms_p95']} ms, max {stats['stall_ms_max']} ms",
+            f"  tick lateness: p50 {stats['latency_ms_p50']} ms, p95 {stats['latency_ms_p95']} ms, "
+            f"max {stats['latency_ms_max']} ms",
+        ]
+        for handler, entry in stats['handlers'].items():
+            lines.append(f"  {entry['count']:4d}x {entry['total_ms']:8.0f} ms total, "
+                         f"max {entry['max_ms']:6.0f} ms  {handler}")
+        return "\n".join(lines)
+
+
+def _describe(frame):
+    """File, line and function of a frame, relative to the working directory"""
+    path = frame.f_code.co_filename
+    try:
+        path = os.path.relpath(path)
+    except ValueError:
+        pass
+    return f"{frame.f_code.co_name} ({path}:{frame.f_lineno})"
\ No newline at end of file